@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the backend API.
+
+Swaps GeminiService.model for a local fake with configurable latency, jitter,
+output size and streaming, drives every route in-process with a concurrent
+load generator, then sweeps ContentService over growing galleries. Nothing
+touches the real API or the real data directory.
+
+Results are written as JSON (benchmark_results/<timestamp>.json by default);
+pass --compare with an earlier result file to print the change per scenario.
+
+Usage:
+  python benchmark.py
+  python benchmark.py --requests 500 --concurrency 32 --latency 0.2 --jitter 0.05
+  python benchmark.py --skip-routes --gallery-sizes 1000,10000,100000 --backends log,sqlite
+  python benchmark.py --compare benchmark_results/20250101-120000.json
+
+Requires httpx (pip install httpx), the same client FastAPI's TestClient uses.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "video script hook intro outro camera lighting edit transition color grade audio music "
+    "voiceover thumbnail title tutorial review vlog travel cooking fitness gaming tech unboxing "
+    "storytelling cinematic drone timelapse broll interview podcast shorts reels tiktok youtube "
+    "instagram trending viral audience engagement retention analytics brand sponsor launch "
+    "product recipe workout morning routine budget beginner advanced tips tricks guide setup"
+).split()
+
+CONTENT_TYPES = ("script", "image", "video", "text")
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakeGeminiModel:
+    """Stand-in for genai.GenerativeModel with tunable latency and output size.
+
+    Each call sleeps for latency +/- jitter seconds, or straggler_latency
+    for a straggler_rate fraction of calls. Streaming calls spread that time
+    evenly across chunks of chunk_chars characters. Plain text responses are
+    cut at max_output_tokens (about 4 characters per token) like the real API.
+    """
+
+    def __init__(
+        self,
+        latency: float,
+        jitter: float,
+        output_chars: int,
+        chunk_chars: int,
+        seed: int = 0,
+        model_name: str = "benchmark-fake",
+        straggler_rate: float = 0.0,
+        straggler_latency: float = 0.0
+    ):
+        self.model_name = f"models/{model_name}"
+        self.latency = latency
+        self.jitter = jitter
+        self.straggler_rate = straggler_rate
+        self.straggler_latency = straggler_latency
+        self.chunk_chars = max(1, chunk_chars)
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._text = self._build_text(output_chars)
+        self._pack = json.dumps({
+            "analysis": self._text[:200],
+            "script": self._text,
+            "hashtags": [f"#{word}" for word in WORDS[:15]],
+            "editing_style": "cinematic",
+            "editing_suggestions": self._text[:500],
+            "suggested_tools": ["script_writer", "video_editor"]
+        })
+
+    def _build_text(self, output_chars: int) -> str:
+        # Hashtag lines first so every parser finds something to extract
+        lines = [f"#{word}" for word in WORDS[:10]]
+        body = "Use a cinematic style with fast cuts and smooth transitions. "
+        text = "\n".join(lines) + "\n"
+        while len(text) < output_chars:
+            text += body
+        return text[:max(output_chars, len(lines))]
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            if self._random.random() < self.straggler_rate:
+                return self.straggler_latency
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def generate_content(self, prompt, stream: bool = False, generation_config=None, **kwargs):
+        delay = self._delay()
+        generation_config = generation_config or {}
+        text = self._text
+        if generation_config.get("max_output_tokens"):
+            text = text[:generation_config["max_output_tokens"] * 4]
+        if stream:
+            return self._stream(delay, text)
+        time.sleep(delay)
+        # Schema-constrained calls get a JSON document that satisfies the pack schema
+        if generation_config.get("response_mime_type") == "application/json":
+            return FakeResponse(self._pack)
+        return FakeResponse(text)
+
+    def _stream(self, delay: float, text: str):
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield FakeResponse(chunk)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0
+    }
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size in MB (peak on platforms without /proc, None on Windows)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 2)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 2)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def random_entry(rng: random.Random, content_words: int) -> Dict:
+    content_type = rng.choice(CONTENT_TYPES)
+    return {
+        "content_type": content_type,
+        "title": " ".join(rng.choices(WORDS, k=5)),
+        "content": " ".join(rng.choices(WORDS, k=content_words)),
+        "metadata": {"tone": rng.choice(("casual", "professional", "funny")), "duration": str(rng.randint(1, 10))}
+    }
+
+
+def seed_gallery(content_service, count: int, content_words: int, seed: int) -> List[str]:
+    """Insert count random items in chunks and return their ids"""
+    rng = random.Random(seed)
+    ids = []
+    for start in range(0, count, 1000):
+        entries = [random_entry(rng, content_words) for _ in range(min(1000, count - start))]
+        ids.extend(content_service.save_many(entries))
+    return ids
+
+
+# Route scenarios
+
+def route_scenarios(state: Dict) -> List[Dict]:
+    """One entry per route: name, HTTP method, path and request builder for request i.
+
+    Generation requests use a distinct topic per request so the response
+    cache and request coalescing do not hide upstream cost.
+    """
+    ids = state["content_ids"]
+    delete_ids = state["delete_ids"]
+    rng = random.Random(1)
+
+    def topic(i):
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} benchmark {i}"
+
+    return [
+        {"name": "health", "method": "GET", "path": lambda i: "/health"},
+        {"name": "scripts_generate", "method": "POST", "path": lambda i: "/api/scripts/generate",
+         "json": lambda i: {"topic": topic(i), "tone": "casual", "duration": "3"}},
+        {"name": "scripts_generate_stream", "method": "POST", "stream": True,
+         "path": lambda i: "/api/scripts/generate/stream",
+         "json": lambda i: {"topic": topic(i), "tone": "casual", "duration": "3"}},
+        {"name": "images_generate", "method": "POST", "path": lambda i: "/api/images/generate",
+         "json": lambda i: {"prompt": topic(i), "style": "realistic", "size": 1024}},
+        {"name": "hashtags_generate", "method": "POST", "path": lambda i: "/api/hashtags/generate",
+         "json": lambda i: {"topic": topic(i), "platform": "instagram"}},
+        {"name": "prompt_process", "method": "POST", "path": lambda i: "/api/prompt/process",
+         "json": lambda i: {"prompt": topic(i)}},
+        {"name": "video_suggestions", "method": "POST", "path": lambda i: "/api/video/suggestions",
+         "json": lambda i: {"prompt": topic(i)}},
+        {"name": "video_suggestions_stream", "method": "POST", "stream": True,
+         "path": lambda i: "/api/video/suggestions/stream",
+         "json": lambda i: {"prompt": topic(i)}},
+        {"name": "pack_generate", "method": "POST", "path": lambda i: "/api/pack/generate",
+         "json": lambda i: {"topic": topic(i), "tone": "casual", "duration": "3", "platform": "youtube"}},
+        {"name": "batch_generate", "method": "POST", "path": lambda i: "/api/batch/generate",
+         "json": lambda i: {"jobs": [
+             {"type": "script", "topic": topic(i)},
+             {"type": "hashtags", "topic": topic(i)},
+             {"type": "image", "prompt": topic(i)},
+             {"type": "video_suggestions", "prompt": topic(i)}
+         ]}},
+        {"name": "jobs_submit", "method": "POST", "path": lambda i: "/api/jobs", "drain_jobs": True,
+         "json": lambda i: {"type": "hashtags", "topic": topic(i)}},
+        {"name": "jobs_get", "method": "GET",
+         "path": lambda i: f"/api/jobs/{state['job_ids'][i % len(state['job_ids'])]}"},
+        {"name": "gallery_list", "method": "GET", "path": lambda i: "/api/gallery"},
+        {"name": "gallery_page", "method": "GET", "path": lambda i: "/api/gallery?limit=20&fields=title,type,preview"},
+        {"name": "gallery_search", "method": "GET",
+         "path": lambda i: f"/api/gallery/search?q={rng.choice(WORDS)}+{rng.choice(WORDS)}&limit=20"},
+        {"name": "gallery_get", "method": "GET", "path": lambda i: f"/api/gallery/{ids[i % len(ids)]}"},
+        {"name": "gallery_delete", "method": "DELETE",
+         "path": lambda i: f"/api/gallery/{delete_ids[i % len(delete_ids)]}"},
+        {"name": "metrics", "method": "GET", "path": lambda i: "/metrics"},
+    ]
+
+
+async def send(client, scenario: Dict, i: int) -> int:
+    kwargs = {"json": scenario["json"](i)} if "json" in scenario else {}
+    if scenario.get("stream"):
+        async with client.stream(scenario["method"], scenario["path"](i), **kwargs) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+    response = await client.request(scenario["method"], scenario["path"](i), **kwargs)
+    return response.status_code
+
+
+async def run_scenario(client, scenario: Dict, requests: int, concurrency: int, warmup: int) -> Dict:
+    """Send requests with at most concurrency in flight and summarize latency, throughput and memory"""
+    for i in range(warmup):
+        await send(client, scenario, requests + i)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            started = time.perf_counter()
+            try:
+                status = str(await send(client, scenario, i))
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    memory_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+
+    result = {"name": scenario["name"], "concurrency": concurrency, **summarize(latencies, elapsed)}
+    result["errors"] = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    result["statuses"] = statuses
+    result["rss_mb_before"] = memory_before
+    result["rss_mb_after"] = rss_mb()
+    return result
+
+
+async def wait_for_jobs(job_service, gemini_service, timeout: float = 120):
+    """Wait until the job queue is empty and no upstream call is in flight"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if job_service.queue_depth() == 0 and gemini_service.get_stats()["in_flight"] == 0:
+            return
+        await asyncio.sleep(0.05)
+
+
+async def bench_routes(args, data_dir: str) -> Tuple[List[Dict], Dict]:
+    """Run the route scenarios; returns their results and GeminiService stats at the end"""
+    import httpx
+    import main as app_module
+    from services.content_service import ContentService
+    from services.gemini_service import GeminiService
+    from services.model_routing import ModelRouter
+
+    gemini_service = GeminiService()
+    # Every routed model name gets its own fake, so routing and fallbacks still apply
+    gemini_service.router = ModelRouter.from_env(
+        lambda name: FakeGeminiModel(
+            args.latency, args.jitter, args.output_chars, args.chunk_chars, args.seed, name,
+            straggler_rate=args.straggler_rate, straggler_latency=args.straggler_latency
+        )
+    )
+    content_service = ContentService(storage_file=os.path.join(data_dir, "content.json"))
+    app_module.gemini_service = gemini_service
+    app_module.content_service = content_service
+    job_service = app_module.get_job_service()
+
+    state = {
+        "content_ids": seed_gallery(content_service, args.route_gallery_size, args.content_words, args.seed),
+        "delete_ids": seed_gallery(content_service, args.requests + args.warmup, args.content_words, args.seed + 1),
+        "job_ids": []
+    }
+
+    results = []
+    transport = httpx.ASGITransport(app=app_module.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in route_scenarios(state):
+                if args.scenarios and scenario["name"] not in args.scenarios:
+                    continue
+                if scenario["name"] == "jobs_get":
+                    state["job_ids"] = [record["id"] for record in job_service.store.list()] or ["missing"]
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+                if scenario.get("drain_jobs"):
+                    await wait_for_jobs(job_service, gemini_service)
+                results.append(result)
+                print(f"  {result['name']:<26} {result['rps']:>9.1f} rps  p50 {result['p50_ms']:>9.2f} ms  "
+                      f"p95 {result['p95_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  errors {result['errors']}")
+        upstream = gemini_service.get_stats()
+    finally:
+        await job_service.stop()
+        app_module.job_service = None
+        app_module.gemini_service = None
+        app_module.content_service = None
+        gemini_service.close()
+        content_service.close()
+    return results, upstream
+
+
+# Gallery size sweep
+
+def time_operation(operation, iterations: int) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def bench_gallery(args, size: int, backend: str, data_dir: str) -> Dict:
+    from services.content_service import ContentService
+
+    rng = random.Random(args.seed)
+    memory_before = rss_mb()
+    service = ContentService(storage_file=os.path.join(data_dir, "content.json"), backend=backend)
+    try:
+        started = time.perf_counter()
+        ids = seed_gallery(service, size, args.content_words, args.seed)
+        seed_seconds = time.perf_counter() - started
+
+        middle = service.list_content_page(limit=size // 2)["next_cursor"]
+        started = time.perf_counter()
+        service.search_content_page(WORDS[0])
+        index_build_seconds = time.perf_counter() - started
+
+        ops = args.gallery_ops
+        # Full listings are O(n) per call, so they get fewer iterations
+        full_ops = max(1, min(ops, 5))
+        operations = {
+            "get": (lambda i: service.get_content(rng.choice(ids)), ops),
+            "page_first": (lambda i: service.list_content_page(limit=20), ops),
+            "page_middle": (lambda i: service.list_content_page(limit=20, cursor=middle), ops),
+            "page_by_type": (lambda i: service.list_content_page(content_type="script", limit=20), ops),
+            "page_projected": (lambda i: service.list_content_page(limit=20, fields=["title", "type", "preview"]), ops),
+            "search": (lambda i: service.search_content_page(f"{rng.choice(WORDS)} {rng.choice(WORDS)}"), ops),
+            "list_all": (lambda i: service.get_all_content(), full_ops),
+            "save": (lambda i: service.save_content(**random_entry(rng, args.content_words)), ops),
+            "delete": (lambda i: service.delete_content(ids[i]), min(ops, len(ids))),
+        }
+        result = {
+            "size": size,
+            "backend": backend,
+            "seed_seconds": round(seed_seconds, 3),
+            "seed_items_per_second": round(size / seed_seconds, 1) if seed_seconds > 0 else 0.0,
+            "index_build_seconds": round(index_build_seconds, 3),
+            "operations": {}
+        }
+        for name, (operation, iterations) in operations.items():
+            result["operations"][name] = time_operation(operation, iterations)
+        result["rss_mb_before"] = memory_before
+        result["rss_mb_after"] = rss_mb()
+        return result
+    finally:
+        service.close()
+
+
+def bench_gallery_sweep(args) -> List[Dict]:
+    results = []
+    for size in args.gallery_sizes:
+        for backend in args.backends:
+            data_dir = tempfile.mkdtemp(prefix="benchmark-gallery-")
+            try:
+                result = bench_gallery(args, size, backend, data_dir)
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+            results.append(result)
+            ops = result["operations"]
+            print(f"  {size:>7} items  {backend:<6}  seed {result['seed_items_per_second']:>9.0f} items/s  "
+                  f"index {result['index_build_seconds']:>6.2f} s  get p95 {ops['get']['p95_ms']:.3f} ms  "
+                  f"page p95 {ops['page_middle']['p95_ms']:.3f} ms  search p95 {ops['search']['p95_ms']:.3f} ms  "
+                  f"list_all p95 {ops['list_all']['p95_ms']:.1f} ms")
+    return results
+
+
+# Comparison
+
+def compare(previous: Dict, current: Dict):
+    """Print p95 and throughput changes against an earlier result file"""
+    def pct(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nCompared with {previous['meta'].get('git_commit') or 'previous run'} "
+          f"({previous['meta'].get('timestamp')}):")
+    old_routes = {result["name"]: result for result in previous.get("routes", [])}
+    for result in current.get("routes", []):
+        old = old_routes.get(result["name"])
+        if old:
+            print(f"  {result['name']:<26} p95 {pct(old['p95_ms'], result['p95_ms']):>8}  "
+                  f"rps {pct(old['rps'], result['rps']):>8}")
+    old_gallery = {(result["size"], result["backend"]): result for result in previous.get("gallery", [])}
+    for result in current.get("gallery", []):
+        old = old_gallery.get((result["size"], result["backend"]))
+        if not old:
+            continue
+        for name, stats in result["operations"].items():
+            if name in old["operations"]:
+                print(f"  {result['size']:>7} {result['backend']:<6} {name:<15} "
+                      f"p95 {pct(old['operations'][name]['p95_ms'], stats['p95_ms']):>8}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark with a fake Gemini model")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per route scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed requests before each scenario")
+    parser.add_argument("--scenarios", help="comma-separated route scenarios to run (default: all)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="+/- seconds of uniform latency jitter")
+    parser.add_argument("--straggler-rate", type=float, default=0.0, help="fraction of fake calls that straggle")
+    parser.add_argument("--straggler-latency", type=float, default=1.0, help="straggler latency in seconds")
+    parser.add_argument("--hedge", action="store_true", help="enable hedged requests (GEMINI_HEDGE_ENABLED)")
+    parser.add_argument("--output-chars", type=int, default=2000, help="fake model response size")
+    parser.add_argument("--chunk-chars", type=int, default=100, help="characters per streamed chunk")
+    parser.add_argument("--cache", action="store_true", help="keep the Gemini response cache enabled")
+    parser.add_argument("--route-gallery-size", type=int, default=1000, help="gallery items seeded for route scenarios")
+    parser.add_argument("--content-words", type=int, default=60, help="words per seeded gallery item")
+    parser.add_argument("--gallery-sizes", default="1000,10000,100000", help="comma-separated sweep sizes")
+    parser.add_argument("--backends", default="log,sqlite", help="comma-separated content backends to sweep")
+    parser.add_argument("--gallery-ops", type=int, default=200, help="iterations per gallery operation")
+    parser.add_argument("--skip-routes", action="store_true", help="skip the route scenarios")
+    parser.add_argument("--skip-gallery", action="store_true", help="skip the gallery size sweep")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",")] if args.scenarios else None
+    args.gallery_sizes = [int(size) for size in args.gallery_sizes.split(",") if size.strip()]
+    args.backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    return args
+
+
+def main():
+    args = parse_args()
+
+    # Keep the run offline and away from real data and settings
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.pop("CONTENT_SQLITE_PATH", None)
+    os.environ.pop("GEMINI_CACHE_DISK_PATH", None)
+    if not args.cache:
+        os.environ["GEMINI_CACHE_ENABLED"] = "false"
+    if args.hedge:
+        os.environ["GEMINI_HEDGE_ENABLED"] = "true"
+
+    timestamp = datetime.now()
+    report = {
+        "meta": {
+            "timestamp": timestamp.isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        }
+    }
+
+    if not args.skip_routes:
+        print(f"Route scenarios ({args.requests} requests, concurrency {args.concurrency}, "
+              f"fake latency {args.latency}s +/- {args.jitter}s):")
+        data_dir = tempfile.mkdtemp(prefix="benchmark-routes-")
+        try:
+            report["routes"], report["upstream"] = asyncio.run(bench_routes(args, data_dir))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if not args.skip_gallery:
+        print("\nGallery size sweep:")
+        report["gallery"] = bench_gallery_sweep(args)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "benchmark_results", f"{timestamp:%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+
+# Reference point for the startup timings reported by /ready
+LOAD_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, RootModel
+from typing import Any, Dict, Optional, List, Literal, Union, Annotated
+import asyncio
 import os
+import json
+import math
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 import uuid
 from dotenv import load_dotenv
 
@@ -12,12 +23,93 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from services.gemini_service import GeminiService
-from services.content_service import ContentService
+from services.content_service import ContentFilter, ContentService, EXPORT_BATCH_SIZE, PROJECTABLE_FIELDS, project_item
+from services.batch_service import BatchService
+from services.job_service import JobService
+from services.resilience import UpstreamUnavailable
+from services.compression import CompressionMiddleware
+from services.search_index import QueryTooBroad
+from services.metrics import (
+    REGISTRY,
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    HTTP_IN_FLIGHT,
+    UPSTREAM_STATE,
+    CACHE_ENTRIES,
+    CACHE_EVENTS,
+    JOB_QUEUE_DEPTH,
+    STARTUP_SECONDS,
+    FIRST_REQUEST_SECONDS
+)
+
+# Startup progress for /ready: "starting", then "ready" or "failed"
+startup_state = {"status": "starting", "phases_ms": {}, "error": None, "warmup_error": None, "first_request": None}
+
+# Requests that do not count as the first real request after start
+PROBE_ROUTES = ("/", "/health", "/ready", "/metrics")
+
+async def startup_phase(name: str, func, *args):
+    """Run one blocking startup step on a worker thread and record its duration"""
+    started = time.perf_counter()
+    try:
+        return await asyncio.to_thread(func, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        startup_state["phases_ms"][name] = round(elapsed * 1000, 1)
+        STARTUP_SECONDS.set(elapsed, phase=name)
+
+async def warm_up():
+    """Initialize services in the background so the server accepts connections at once.
+
+    /ready passes once this finishes. GEMINI_WARMUP=true also makes one cheap
+    upstream call per model so connection setup does not land on a user.
+    """
+    try:
+        content_svc = await startup_phase("content_store", get_content_service)
+        await startup_phase("search_index", content_svc.warm_up)
+        service = await startup_phase("gemini_client", get_gemini_service)
+        # Resume jobs left unfinished by a previous run
+        get_job_service()
+        call_upstream = os.getenv("GEMINI_WARMUP", "false").lower() in ("1", "true", "yes")
+        try:
+            await startup_phase("gemini_models", service.warm_up, call_upstream)
+        except Exception as e:
+            # The service still works; the first real call pays the setup instead
+            startup_state["warmup_error"] = str(e)
+        startup_state["status"] = "ready"
+    except HTTPException as e:
+        startup_state["status"] = "failed"
+        startup_state["error"] = e.detail
+    except Exception as e:
+        startup_state["status"] = "failed"
+        startup_state["error"] = str(e)
+    elapsed = time.perf_counter() - LOAD_STARTED
+    startup_state["phases_ms"]["ready"] = round(elapsed * 1000, 1)
+    STARTUP_SECONDS.set(elapsed, phase="ready")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    elapsed = time.perf_counter() - LOAD_STARTED
+    startup_state["phases_ms"]["load"] = round(elapsed * 1000, 1)
+    STARTUP_SECONDS.set(elapsed, phase="load")
+    warmup = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        await asyncio.gather(warmup, return_exceptions=True)
+        if job_service is not None:
+            await job_service.stop()
+        if gemini_service is not None:
+            gemini_service.close()
+        if content_service is not None:
+            content_service.close()
 
 app = FastAPI(
     title="Creator Studio Co-Pilot API",
     description="Backend API for Creator Studio Co-Pilot using Gemini AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -29,46 +121,301 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services (lazy initialization to handle errors gracefully)
+# Negotiated brotli/gzip for large JSON and text responses (SSE streams are left alone)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1000")))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template, not raw path, so ids do not explode cardinality
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        elapsed = time.perf_counter() - started
+        HTTP_LATENCY.observe(elapsed, method=request.method, route=path)
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=str(status))
+        if startup_state["first_request"] is None and path not in PROBE_ROUTES:
+            startup_state["first_request"] = {
+                "route": path,
+                "latency_ms": round(elapsed * 1000, 1),
+                "since_load_ms": round((time.perf_counter() - LOAD_STARTED) * 1000, 1)
+            }
+            FIRST_REQUEST_SECONDS.set(elapsed)
+
+# Initialize services (lazy initialization to handle errors gracefully).
+# Startup warmup builds them on a worker thread while early requests may
+# already ask for them, so creation is guarded by a lock per service.
 gemini_service = None
 content_service = None
+job_service = None
+_gemini_lock = threading.Lock()
+_content_lock = threading.Lock()
 
 def get_gemini_service():
     global gemini_service
     if gemini_service is None:
-        try:
-            gemini_service = GeminiService()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to initialize Gemini service: {str(e)}. Please check your GEMINI_API_KEY in .env file."
-            )
+        with _gemini_lock:
+            if gemini_service is None:
+                try:
+                    gemini_service = GeminiService()
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to initialize Gemini service: {str(e)}. Please check your GEMINI_API_KEY in .env file."
+                    )
     return gemini_service
 
 def get_content_service():
     global content_service
     if content_service is None:
-        content_service = ContentService()
+        with _content_lock:
+            if content_service is None:
+                content_service = ContentService()
     return content_service
 
+def get_job_service():
+    # Must be called from the event loop: starting the service spawns its workers
+    global job_service
+    if job_service is None:
+        service = JobService(get_gemini_service(), get_content_service())
+        service.start()
+        job_service = service
+    return job_service
+
+def upstream_unavailable(e: UpstreamUnavailable) -> HTTPException:
+    """503 (or 429 when upstream is throttling) telling clients when to retry"""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))}
+    )
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def cache_allowed(cache_control: Optional[str]) -> bool:
+    """Honour a client's Cache-Control: no-cache by bypassing the response cache"""
+    directives = (cache_control or "").lower()
+    return "no-cache" not in directives and "no-store" not in directives
+
+def mark_approximate(response: Response, service: GeminiService):
+    """Tell the client when its answer was reused from a similar earlier request"""
+    similarity = service.approximate_match()
+    if similarity is not None:
+        response.headers["X-Cache"] = "approximate"
+        response.headers["X-Cache-Similarity"] = str(similarity)
+
+async def ndjson_lines(chunks, max_line_bytes: int):
+    """Split a streamed body into (line number, line) pairs, skipping blank lines.
+
+    Only the current partial line is buffered; a line longer than
+    max_line_bytes is discarded and yielded as None.
+    """
+    buffer = bytearray()
+    line_number = 0
+    too_long = False
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) >= 0:
+            line_number += 1
+            line = bytes(buffer[start:end])
+            if too_long or end - start > max_line_bytes:
+                too_long = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            too_long = True
+            buffer.clear()
+    if too_long or buffer.strip():
+        yield line_number + 1, None if too_long else bytes(buffer)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse and validate a comma-separated fields= projection"""
+    if not fields:
+        return None
+    field_list = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = set(field_list) - PROJECTABLE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return field_list
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+async def gallery_validators(content_svc: ContentService) -> dict:
+    """Cache validators for gallery responses, derived from the store version.
+
+    The ETag changes on every write. Last-Modified has one-second
+    resolution, so a second write within the same second would leave it
+    unchanged; it is only sent once that second is over.
+    """
+    version, modified_at = await content_svc.validators_async()
+    validators = {"ETag": f'W/"{version}"', "Cache-Control": "no-cache"}
+    if int(modified_at) < int(time.time()):
+        validators["Last-Modified"] = formatdate(modified_at, usegmt=True)
+    return validators
+
+async def json_response(payload: dict, headers: dict) -> Response:
+    """JSON response serialized on a worker thread.
+
+    FastAPI encodes returned dicts on the event loop, which for a large
+    gallery listing takes longer than reading it from the store.
+    """
+    body = await asyncio.to_thread(json.dumps, payload)
+    return Response(body, media_type="application/json", headers=headers)
+
+def not_modified(request: Request, validators: dict) -> bool:
+    """Whether the client's copy is current.
+
+    If-None-Match wins over If-Modified-Since, and If-Modified-Since is
+    only trusted while Last-Modified is being sent (see gallery_validators).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, validators["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in validators:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(validators["Last-Modified"]) <= since
+    return False
+
+def blob_url(blob_hash: str) -> str:
+    return f"/api/blobs/{blob_hash}"
+
+def parse_range(range_header: Optional[str], size: int):
+    """Return (start, end) for a single "bytes=" range, None to send the whole blob.
+
+    Raises 416 for ranges outside the blob. Multi-range requests get the
+    whole blob, which RFC 9110 allows.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(end_text)), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+# Free-text fields longer than this are rejected outright; anything shorter is
+# still cut to the per-field prompt budget (GEMINI_INPUT_BUDGETS) by GeminiService
+MAX_INPUT_CHARS = int(os.getenv("MAX_INPUT_CHARS", "20000"))
+
 # Request Models
 class ScriptRequest(BaseModel):
-    topic: str
-    tone: str = "professional"
-    duration: str = "5"
-    keywords: Optional[str] = None
+    topic: str = Field(..., max_length=MAX_INPUT_CHARS)
+    tone: str = Field("professional", max_length=100)
+    # Whole minutes; the output token cap is derived from it
+    duration: str = Field("5", pattern=r"^[1-9][0-9]?$")
+    keywords: Optional[str] = Field(None, max_length=MAX_INPUT_CHARS)
 
 class ImageRequest(BaseModel):
-    prompt: str
-    style: str = "realistic"
+    prompt: str = Field(..., max_length=MAX_INPUT_CHARS)
+    style: str = Field("realistic", max_length=100)
     size: int = 1024
 
 class HashtagRequest(BaseModel):
-    topic: str
-    platform: Optional[str] = "general"
+    topic: str = Field(..., max_length=MAX_INPUT_CHARS)
+    platform: Optional[str] = Field("general", max_length=100)
+    count: int = Field(20, ge=1, le=50)
 
 class PromptRequest(BaseModel):
-    prompt: str
+    prompt: str = Field(..., max_length=MAX_INPUT_CHARS)
+
+# Upper bound on the ids of one bulk gallery request
+MAX_BULK_IDS = int(os.getenv("MAX_BULK_IDS", "10000"))
+
+class GalleryFilter(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=MAX_BULK_IDS)
+    content_type: Optional[str] = None
+    # ISO timestamps; created_from is inclusive, created_before exclusive
+    created_from: Optional[str] = None
+    created_before: Optional[str] = None
+    # Items whose metadata has all of these key/value pairs
+    metadata: Optional[Dict[str, Any]] = None
+    dry_run: bool = False
+
+    def content_filter(self) -> ContentFilter:
+        return ContentFilter(
+            ids=self.ids,
+            content_type=self.content_type,
+            created_from=self.created_from,
+            created_before=self.created_before,
+            metadata=self.metadata
+        )
+
+class GalleryUpdateRequest(GalleryFilter):
+    set_metadata: Dict[str, Any] = Field(default_factory=dict)
+    remove_metadata: List[str] = Field(default_factory=list)
+
+class PackRequest(ScriptRequest):
+    platform: Optional[str] = Field("general", max_length=100)
+
+class ScriptJob(ScriptRequest):
+    type: Literal["script"]
+
+class ImageJob(ImageRequest):
+    type: Literal["image"]
+
+class HashtagJob(HashtagRequest):
+    type: Literal["hashtags"]
+
+class VideoSuggestionJob(PromptRequest):
+    type: Literal["video_suggestions"]
+
+BatchJob = Annotated[
+    Union[ScriptJob, ImageJob, HashtagJob, VideoSuggestionJob],
+    Field(discriminator="type")
+]
+
+# Upper bounds for /api/batch/generate
+MAX_BATCH_JOBS = int(os.getenv("MAX_BATCH_JOBS", "200"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+class BatchRequest(BaseModel):
+    jobs: List[BatchJob] = Field(..., min_length=1, max_length=MAX_BATCH_JOBS)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class JobRequest(RootModel[BatchJob]):
+    pass
 
 class ContentItem(BaseModel):
     id: str
@@ -85,23 +432,54 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    result = {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    # Only report upstream stats once the service exists; health checks must not initialize it
+    if gemini_service is not None:
+        result["upstream"] = gemini_service.get_stats()
+    return result
+
+@app.get("/ready")
+async def ready():
+    # Unlike /health (the process is up), this passes only once startup warmup finished
+    status_code = 200 if startup_state["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=startup_state)
+
+@app.get("/metrics")
+async def metrics():
+    # Point-in-time state is sampled on scrape; like /health this never initializes services
+    if gemini_service is not None:
+        stats = gemini_service.get_stats()
+        for state in ("in_flight", "queued", "max_concurrency", "coalesced"):
+            UPSTREAM_STATE.set(stats[state], state=state)
+        UPSTREAM_STATE.set(1 if stats["resilience"]["breaker_state"] == "open" else 0, state="breaker_open")
+        if "cache" in stats:
+            for event in ("hits", "disk_hits", "misses", "stores", "evictions"):
+                CACHE_EVENTS.set_total(stats["cache"][event], cache="exact", event=event)
+            CACHE_ENTRIES.set(stats["cache"]["size"], cache="exact")
+        if "fuzzy_cache" in stats:
+            for event in ("hits", "misses", "stores", "evictions"):
+                CACHE_EVENTS.set_total(stats["fuzzy_cache"][event], cache="fuzzy", event=event)
+            CACHE_ENTRIES.set(stats["fuzzy_cache"]["size"], cache="fuzzy")
+    if job_service is not None:
+        JOB_QUEUE_DEPTH.set(job_service.queue_depth())
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # Script Generation Endpoint
 @app.post("/api/scripts/generate")
-async def generate_script(request: ScriptRequest):
+async def generate_script(request: ScriptRequest, cache_control: Optional[str] = Header(None)):
     try:
         service = get_gemini_service()
         content_svc = get_content_service()
-        script = service.generate_script(
+        script = await service.generate_script_async(
             topic=request.topic,
             tone=request.tone,
             duration=request.duration,
-            keywords=request.keywords
+            keywords=request.keywords,
+            use_cache=cache_allowed(cache_control)
         )
         
         # Save to content service
-        content_id = content_svc.save_content(
+        content_id = await content_svc.save_content_async(
             content_type="script",
             title=request.topic,
             content=script,
@@ -122,37 +500,101 @@ async def generate_script(request: ScriptRequest):
                 "topic": request.topic
             }
         }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
 
+# Streaming Script Generation Endpoint (Server-Sent Events)
+# Emits "data" chunks as the model writes, then a final "done" event once the
+# assembled script is saved. A client disconnect cancels the upstream call.
+@app.post("/api/scripts/generate/stream")
+async def generate_script_stream(request: ScriptRequest):
+    service = get_gemini_service()
+    content_svc = get_content_service()
+
+    async def events():
+        parts = []
+        stream = service.stream_script_async(
+            topic=request.topic,
+            tone=request.tone,
+            duration=request.duration,
+            keywords=request.keywords
+        )
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield sse_event({"text": chunk})
+
+            script = "".join(parts)
+            content_id = await content_svc.save_content_async(
+                content_type="script",
+                title=request.topic,
+                content=script,
+                metadata={
+                    "tone": request.tone,
+                    "duration": request.duration,
+                    "keywords": request.keywords
+                }
+            )
+        except UpstreamUnavailable as e:
+            yield sse_event({"success": False, "detail": str(e), "retry_after": math.ceil(e.retry_after)}, event="error")
+            return
+        except Exception as e:
+            yield sse_event({"success": False, "detail": f"Error generating script: {str(e)}"}, event="error")
+            return
+        finally:
+            await stream.aclose()
+
+        yield sse_event({
+            "success": True,
+            "script": script,
+            "content_id": content_id,
+            "metadata": {
+                "tone": request.tone,
+                "duration": request.duration,
+                "topic": request.topic
+            }
+        }, event="done")
+
+    return sse_response(events())
+
 # Image Generation Endpoint
 @app.post("/api/images/generate")
-async def generate_image(request: ImageRequest):
+async def generate_image(request: ImageRequest, cache_control: Optional[str] = Header(None)):
     try:
         service = get_gemini_service()
         content_svc = get_content_service()
-        image_data = service.generate_image(
+        image_data = await service.generate_image_async(
             prompt=request.prompt,
             style=request.style,
-            size=request.size
+            size=request.size,
+            use_cache=cache_allowed(cache_control)
         )
         
+        # Image bytes go to the blob store; the gallery record keeps the hash
+        blob_hash = await content_svc.save_image_blob_async(image_data)
+        metadata = {
+            "style": request.style,
+            "size": request.size,
+            "prompt": request.prompt
+        }
+        if blob_hash:
+            metadata["image_blob"] = blob_hash
+
         # Save to content service
-        content_id = content_svc.save_content(
+        content_id = await content_svc.save_content_async(
             content_type="image",
             title=request.prompt[:50],
-            content=image_data.get("image_url", ""),
-            metadata={
-                "style": request.style,
-                "size": request.size,
-                "prompt": request.prompt
-            }
+            content=image_data.get("image_url") or "",
+            metadata=metadata
         )
         
         return {
             "success": True,
-            "image_url": image_data.get("image_url"),
+            "image_url": image_data.get("image_url") or (blob_url(blob_hash) if blob_hash else None),
             "image_base64": image_data.get("image_base64"),
+            "image_blob": blob_hash,
             "content_id": content_id,
             "metadata": {
                 "style": request.style,
@@ -160,61 +602,383 @@ async def generate_image(request: ImageRequest):
                 "prompt": request.prompt
             }
         }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating image: {str(e)}")
 
 # Hashtag Generation Endpoint
 @app.post("/api/hashtags/generate")
-async def generate_hashtags(request: HashtagRequest):
+async def generate_hashtags(request: HashtagRequest, response: Response, cache_control: Optional[str] = Header(None)):
     try:
         service = get_gemini_service()
-        hashtags = service.generate_hashtags(
+        hashtags = await service.generate_hashtags_async(
             topic=request.topic,
-            platform=request.platform
+            platform=request.platform,
+            count=request.count,
+            use_cache=cache_allowed(cache_control)
         )
-        
+        mark_approximate(response, service)
+
         return {
             "success": True,
             "hashtags": hashtags,
             "count": len(hashtags)
         }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating hashtags: {str(e)}")
 
 # General Prompt Processing (for Dashboard)
 @app.post("/api/prompt/process")
-async def process_prompt(request: PromptRequest):
+async def process_prompt(request: PromptRequest, response: Response, cache_control: Optional[str] = Header(None)):
     try:
         service = get_gemini_service()
-        suggestions = service.process_prompt(request.prompt)
-        
+        suggestions = await service.process_prompt_async(request.prompt, use_cache=cache_allowed(cache_control))
+        mark_approximate(response, service)
+
         return {
             "success": True,
             "suggestions": suggestions,
             "prompt": request.prompt
         }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing prompt: {str(e)}")
 
+# Content Pack Endpoint
+# One structured generation instead of the process_prompt -> script -> hashtags ->
+# video suggestions round trips. The script, hashtags and editing suggestions are
+# saved as separate gallery items that share a pack_id.
+@app.post("/api/pack/generate")
+async def generate_pack(request: PackRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        service = get_gemini_service()
+        content_svc = get_content_service()
+        pack = await service.generate_pack_async(
+            topic=request.topic,
+            tone=request.tone,
+            duration=request.duration,
+            keywords=request.keywords,
+            platform=request.platform or "general",
+            use_cache=cache_allowed(cache_control)
+        )
+
+        pack_id = str(uuid.uuid4())
+        script_id, hashtags_id, suggestions_id = await content_svc.save_many_async([
+            {
+                "content_type": "script",
+                "title": request.topic,
+                "content": pack["script"],
+                "metadata": {
+                    "tone": request.tone,
+                    "duration": request.duration,
+                    "keywords": request.keywords,
+                    "pack_id": pack_id
+                }
+            },
+            {
+                "content_type": "hashtags",
+                "title": request.topic,
+                "content": "\n".join(pack["hashtags"]),
+                "metadata": {"platform": request.platform or "general", "pack_id": pack_id}
+            },
+            {
+                "content_type": "video_suggestions",
+                "title": request.topic,
+                "content": pack["editing_suggestions"],
+                "metadata": {
+                    "editing_style": pack["editing_style"],
+                    "suggested_tools": pack["suggested_tools"],
+                    "analysis": pack["analysis"],
+                    "pack_id": pack_id
+                }
+            }
+        ])
+
+        return {
+            "success": True,
+            "pack_id": pack_id,
+            "pack": pack,
+            "content_ids": {
+                "script": script_id,
+                "hashtags": hashtags_id,
+                "video_suggestions": suggestions_id
+            }
+        }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating content pack: {str(e)}")
+
+# Batch Generation Endpoint
+# Runs mixed script/hashtags/image/video_suggestions jobs concurrently (bounded by
+# "concurrency", capped at BATCH_MAX_CONCURRENCY) and saves all scripts and
+# images in a single store write. Each job reports its own result or error.
+@app.post("/api/batch/generate")
+async def generate_batch(request: BatchRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        batch_svc = BatchService(get_gemini_service(), get_content_service())
+        concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+        results = await batch_svc.run_batch(
+            [job.model_dump() for job in request.jobs],
+            concurrency=concurrency,
+            use_cache=cache_allowed(cache_control)
+        )
+        succeeded = sum(1 for result in results if result["success"])
+        return {
+            "success": True,
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running batch: {str(e)}")
+
+# Background Jobs
+# POST returns a job id immediately; poll GET /api/jobs/{job_id} or watch
+# /api/jobs/{job_id}/events (Server-Sent Events) until it succeeds or fails.
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    try:
+        job_svc = get_job_service()
+        params = request.root.model_dump(exclude={"type"})
+        job = await job_svc.submit(request.root.type, params)
+        return {
+            "success": True,
+            "job": job
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting job: {str(e)}")
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    try:
+        job_svc = get_job_service()
+        job = await job_svc.get_job_async(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {
+            "success": True,
+            "job": job
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching job: {str(e)}")
+
+@app.get("/api/jobs/{job_id}/events")
+async def watch_job(job_id: str):
+    job_svc = get_job_service()
+    if not await job_svc.get_job_async(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in job_svc.watch(job_id):
+            yield sse_event(job, event="done" if job["status"] in ("succeeded", "failed") else "status")
+
+    return sse_response(events())
+
 # Content Gallery Endpoints
+# Without limit/cursor the whole gallery is returned as before. With them, items
+# are paged by (created_at, id); pass next_cursor back to get the next page.
+# fields= (e.g. "title,type,preview") projects items down to lightweight cards.
+# Store reads and JSON encoding run on worker threads.
 @app.get("/api/gallery")
-async def get_gallery(content_type: Optional[str] = None):
+async def get_gallery(
+    request: Request,
+    content_type: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    field_list = parse_fields(fields)
+    try:
+        content_svc = get_content_service()
+        validators = await gallery_validators(content_svc)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        if limit is None and cursor is None:
+            items = await content_svc.get_all_content_async(content_type)
+            if field_list:
+                items = [project_item(item, field_list) for item in items]
+            return await json_response({
+                "success": True,
+                "items": items,
+                "count": len(items)
+            }, validators)
+
+        page = await content_svc.list_content_page_async(
+            content_type=content_type,
+            limit=limit or 50,
+            cursor=cursor,
+            fields=field_list
+        )
+        return await json_response({
+            "success": True,
+            "items": page["items"],
+            "count": len(page["items"]),
+            "next_cursor": page["next_cursor"]
+        }, validators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching gallery: {str(e)}")
+
+# Full-text search over titles and content, ranked by relevance (BM25).
+# Every word must match; words of 3+ characters also match longer words they
+# prefix. A prefix matching too many words is rejected with 400.
+@app.get("/api/gallery/search")
+async def search_gallery(
+    request: Request,
+    response: Response,
+    q: str,
+    content_type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = None
+):
+    field_list = parse_fields(fields)
     try:
         content_svc = get_content_service()
-        items = content_svc.get_all_content(content_type)
+        validators = await gallery_validators(content_svc)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        response.headers.update(validators)
+        results = await content_svc.search_content_page_async(
+            q,
+            limit=limit,
+            offset=offset,
+            content_type=content_type,
+            fields=field_list
+        )
         return {
             "success": True,
-            "items": items,
-            "count": len(items)
+            "items": results["items"],
+            "count": len(results["items"]),
+            "total": results["total"],
+            "query": q
         }
+    except QueryTooBroad as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching gallery: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching gallery: {str(e)}")
+
+# NDJSON backup/migration: export streams one item per line in (created_at, id)
+# order; import takes the same format as a streamed body and stores it in batches
+# of GALLERY_IMPORT_BATCH_SIZE. Imported items keep their id (re-importing
+# replaces them), and each rejected line is reported with its line number.
+# Image bytes live in the blob store and are not part of the export.
+GALLERY_IMPORT_BATCH_SIZE = int(os.getenv("GALLERY_IMPORT_BATCH_SIZE", "500"))
+GALLERY_IMPORT_MAX_LINE_BYTES = int(os.getenv("GALLERY_IMPORT_MAX_LINE_BYTES", str(16 * 1024 * 1024)))
+# Errors listed in an import response; "failed" still counts all of them
+MAX_IMPORT_ERRORS = 100
+
+@app.get("/api/gallery/export")
+async def export_gallery(content_type: Optional[str] = None):
+    try:
+        content_svc = get_content_service()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting gallery: {str(e)}")
+
+    def lines():
+        # A sync generator runs in the threadpool, so store reads never block
+        # the event loop; lines go out in chunks rather than one message each
+        chunk = []
+        for item in content_svc.iter_content(content_type):
+            chunk.append(json.dumps(item) + "\n")
+            if len(chunk) >= EXPORT_BATCH_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="gallery.ndjson"'}
+    )
+
+@app.post("/api/gallery/import")
+async def import_gallery(request: Request):
+    imported = failed = 0
+    errors = []
+    batch = []
+
+    async def flush():
+        nonlocal imported, failed
+        result = await content_svc.import_lines_async(batch)
+        imported += result["imported"]
+        failed += len(result["errors"])
+        errors.extend(result["errors"][:MAX_IMPORT_ERRORS - len(errors)])
+        batch.clear()
+
+    try:
+        content_svc = get_content_service()
+        async for line in ndjson_lines(request.stream(), GALLERY_IMPORT_MAX_LINE_BYTES):
+            batch.append(line)
+            if len(batch) >= GALLERY_IMPORT_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+        return {
+            "success": True,
+            "imported": imported,
+            "failed": failed,
+            "errors": errors
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing gallery after {imported} items: {str(e)}")
+
+# Bulk gallery changes: delete, or patch metadata of, every item matching the
+# ids and/or filter in one store write. With dry_run nothing changes; the ids
+# that would be deleted/updated come back as would_delete/would_update.
+@app.post("/api/gallery/bulk-delete")
+async def bulk_delete_content(request: GalleryFilter):
+    try:
+        content_svc = get_content_service()
+        result = await content_svc.bulk_delete_async(request.content_filter(), dry_run=request.dry_run)
+        return {"success": True, "dry_run": request.dry_run, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting content: {str(e)}")
+
+@app.post("/api/gallery/bulk-update")
+async def bulk_update_content(request: GalleryUpdateRequest):
+    if not request.set_metadata and not request.remove_metadata:
+        raise HTTPException(status_code=400, detail="Give set_metadata and/or remove_metadata")
+    try:
+        content_svc = get_content_service()
+        result = await content_svc.bulk_update_metadata_async(
+            request.content_filter(),
+            set_metadata=request.set_metadata,
+            remove_metadata=request.remove_metadata,
+            dry_run=request.dry_run
+        )
+        return {"success": True, "dry_run": request.dry_run, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating content: {str(e)}")
 
 @app.get("/api/gallery/{content_id}")
-async def get_content(content_id: str):
+async def get_content(request: Request, response: Response, content_id: str):
     try:
         content_svc = get_content_service()
-        item = content_svc.get_content(content_id)
+        validators = await gallery_validators(content_svc)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        response.headers.update(validators)
+        item = await content_svc.get_content_async(content_id)
         if not item:
             raise HTTPException(status_code=404, detail="Content not found")
         return {
@@ -230,7 +994,7 @@ async def get_content(content_id: str):
 async def delete_content(content_id: str):
     try:
         content_svc = get_content_service()
-        success = content_svc.delete_content(content_id)
+        success = await content_svc.delete_content_async(content_id)
         if not success:
             raise HTTPException(status_code=404, detail="Content not found")
         return {
@@ -242,19 +1006,117 @@ async def delete_content(content_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting content: {str(e)}")
 
+# Blob Endpoints
+# Binary assets (generated images) are stored once per SHA-256 and never change,
+# so responses are cacheable forever and the hash doubles as a strong ETag.
+# File writes, the fsync on commit and stat calls run on worker threads.
+@app.post("/api/blobs")
+async def upload_blob(file: UploadFile = File(...)):
+    try:
+        writer = await asyncio.to_thread(get_content_service().blobs.writer)
+        try:
+            while chunk := await file.read(64 * 1024):
+                await asyncio.to_thread(writer.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+        blob = await asyncio.to_thread(writer.commit)
+        return {
+            "success": True,
+            "hash": blob["hash"],
+            "size": blob["size"],
+            "url": blob_url(blob["hash"])
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error storing blob: {str(e)}")
+
+@app.api_route("/api/blobs/{blob_hash}", methods=["GET", "HEAD"])
+async def get_blob(
+    request: Request,
+    blob_hash: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
+    blobs = get_content_service().blobs
+    blob = await asyncio.to_thread(blobs.stat, blob_hash)
+    if not blob:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    etag = f'"{blob_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    size = blob["size"]
+    # A stale If-Range validator means the client's partial copy is unusable: send everything
+    byte_range = parse_range(range_header, size) if size and (not if_range or if_range.strip() == etag) else None
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status_code, headers=headers, media_type=blob["media_type"])
+    return StreamingResponse(
+        blobs.read(blob_hash, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=blob["media_type"]
+    )
+
 # Video Editing Suggestions
 @app.post("/api/video/suggestions")
-async def get_video_suggestions(request: PromptRequest):
+async def get_video_suggestions(request: PromptRequest, cache_control: Optional[str] = Header(None)):
     try:
         service = get_gemini_service()
-        suggestions = service.get_video_editing_suggestions(request.prompt)
+        suggestions = await service.get_video_editing_suggestions_async(
+            request.prompt,
+            use_cache=cache_allowed(cache_control)
+        )
         return {
             "success": True,
             "suggestions": suggestions
         }
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting video suggestions: {str(e)}")
 
+# Streaming Video Editing Suggestions (Server-Sent Events)
+@app.post("/api/video/suggestions/stream")
+async def get_video_suggestions_stream(request: PromptRequest):
+    service = get_gemini_service()
+
+    async def events():
+        parts = []
+        stream = service.stream_video_editing_suggestions_async(request.prompt)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield sse_event({"text": chunk})
+        except UpstreamUnavailable as e:
+            yield sse_event({"success": False, "detail": str(e), "retry_after": math.ceil(e.retry_after)}, event="error")
+            return
+        except Exception as e:
+            yield sse_event({"success": False, "detail": f"Error getting video suggestions: {str(e)}"}, event="error")
+            return
+        finally:
+            await stream.aclose()
+
+        yield sse_event({
+            "success": True,
+            "suggestions": service.parse_video_editing_suggestions("".join(parts))
+        }, event="done")
+
+    return sse_response(events())
+
 # Error handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -265,5 +1127,7 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from services.shared_state import worker_count
+    # WEB_CONCURRENCY workers; more than one needs the app as an import string
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=worker_count())
 
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from services.content_service import ContentService
+from services.gemini_service import GeminiService
+
+JOB_TYPES = ("script", "hashtags", "image", "video_suggestions")
+
+
+class BatchService:
+    """Runs generation jobs through GeminiService and persists their output.
+
+    Jobs are plain dicts with a "type" from JOB_TYPES plus the fields of the
+    matching single-item request (topic, tone, prompt, ...). Scripts and
+    images are saved to the gallery exactly as their single-item routes do.
+    """
+
+    def __init__(self, gemini_service: GeminiService, content_service: ContentService):
+        self.gemini_service = gemini_service
+        self.content_service = content_service
+
+    async def run_job(self, job: Dict, use_cache: bool = True) -> Tuple[Dict, Optional[Dict]]:
+        """Run one job and return (result payload, gallery entry to save or None)"""
+        job_type = job["type"]
+        service = self.gemini_service
+
+        if job_type == "script":
+            script = await service.generate_script_async(
+                topic=job["topic"],
+                tone=job.get("tone", "professional"),
+                duration=job.get("duration", "5"),
+                keywords=job.get("keywords"),
+                use_cache=use_cache
+            )
+            entry = {
+                "content_type": "script",
+                "title": job["topic"],
+                "content": script,
+                "metadata": {
+                    "tone": job.get("tone", "professional"),
+                    "duration": job.get("duration", "5"),
+                    "keywords": job.get("keywords")
+                }
+            }
+            return {"script": script}, entry
+
+        if job_type == "image":
+            image_data = await service.generate_image_async(
+                prompt=job["prompt"],
+                style=job.get("style", "realistic"),
+                size=job.get("size", 1024),
+                use_cache=use_cache
+            )
+            blob_hash = await self.content_service.save_image_blob_async(image_data)
+            entry = {
+                "content_type": "image",
+                "title": job["prompt"][:50],
+                "content": image_data.get("image_url") or "",
+                "metadata": {
+                    "style": job.get("style", "realistic"),
+                    "size": job.get("size", 1024),
+                    "prompt": job["prompt"]
+                }
+            }
+            if blob_hash:
+                entry["metadata"]["image_blob"] = blob_hash
+            return {**image_data, "image_blob": blob_hash}, entry
+
+        if job_type == "hashtags":
+            hashtags = await service.generate_hashtags_async(
+                topic=job["topic"],
+                platform=job.get("platform") or "general",
+                count=job.get("count", 20),
+                use_cache=use_cache
+            )
+            return {"hashtags": hashtags, "count": len(hashtags)}, None
+
+        if job_type == "video_suggestions":
+            suggestions = await service.get_video_editing_suggestions_async(job["prompt"], use_cache=use_cache)
+            return {"suggestions": suggestions}, None
+
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    async def run_batch(self, jobs: List[Dict], concurrency: int, use_cache: bool = True) -> List[Dict]:
+        """Run jobs with at most `concurrency` in flight and save all output in one write.
+
+        Returns one result per job, in input order. A failing job yields an
+        error entry and does not affect the others.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(index: int, job: Dict) -> Tuple[Dict, Optional[Dict]]:
+            async with semaphore:
+                try:
+                    result, entry = await self.run_job(job, use_cache)
+                except Exception as e:
+                    return {"index": index, "type": job["type"], "success": False, "error": str(e)}, None
+                return {"index": index, "type": job["type"], "success": True, "result": result}, entry
+
+        outcomes = await asyncio.gather(*(run(index, job) for index, job in enumerate(jobs)))
+
+        to_save = [(result, entry) for result, entry in outcomes if entry is not None]
+        content_ids = await self.content_service.save_many_async([entry for _, entry in to_save])
+        for (result, _), content_id in zip(to_save, content_ids):
+            result["content_id"] = content_id
+
+        return [result for result, _ in outcomes]
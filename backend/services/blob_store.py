@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import os
+import re
+import uuid
+from typing import Dict, Iterable, Iterator, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Leading bytes of the image formats we expect, for the served Content-Type
+MAGIC_TYPES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def is_blob_hash(value: str) -> bool:
+    return bool(HASH_PATTERN.match(value or ""))
+
+
+def sniff_media_type(head: bytes) -> str:
+    for magic, media_type in MAGIC_TYPES:
+        if head.startswith(magic):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class BlobWriter:
+    """Streams a blob to a temp file while hashing it; commit() moves it into place"""
+
+    def __init__(self, store: "BlobStore"):
+        self.store = store
+        self.temp_path = os.path.join(store.root, "tmp", f"{uuid.uuid4().hex}.tmp")
+        self._file = open(self.temp_path, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Dict:
+        """Finish the write and return {"hash", "size"}; identical content is stored once"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        blob_hash = self._hash.hexdigest()
+        path = self.store.path(blob_hash)
+        if os.path.exists(path):
+            os.remove(self.temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.temp_path, path)
+        return {"hash": blob_hash, "size": self.size}
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class BlobStore:
+    """Content-addressed storage for binary assets such as generated images.
+
+    Blobs are immutable files named by the SHA-256 of their bytes under
+    root/<first two hex chars>/<hash>, so the same bytes are stored once
+    and a hash reference never goes stale. Gallery records keep only the
+    hash. Blobs are shared between records and are not removed when a
+    record is deleted.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    def path(self, blob_hash: str) -> str:
+        if not is_blob_hash(blob_hash):
+            raise ValueError(f"Invalid blob hash: {blob_hash}")
+        return os.path.join(self.root, blob_hash[:2], blob_hash)
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def put_stream(self, chunks: Iterable[bytes]) -> Dict:
+        """Store the concatenated chunks and return {"hash", "size"}"""
+        writer = self.writer()
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def put_bytes(self, data: bytes) -> Dict:
+        return self.put_stream(data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+
+    def put_base64(self, encoded: str) -> Dict:
+        """Decode base64 (optionally a data: URL) in chunks and store the bytes"""
+        if encoded.startswith("data:"):
+            encoded = encoded.split(",", 1)[1]
+        encoded = "".join(encoded.split())
+        # Multiples of 4 characters decode independently
+        step = CHUNK_SIZE // 3 * 4
+        return self.put_stream(
+            base64.b64decode(encoded[i:i + step], validate=True) for i in range(0, len(encoded), step)
+        )
+
+    def exists(self, blob_hash: str) -> bool:
+        return is_blob_hash(blob_hash) and os.path.exists(self.path(blob_hash))
+
+    def stat(self, blob_hash: str) -> Optional[Dict]:
+        """Return {"hash", "size", "media_type"} or None if the blob does not exist"""
+        if not self.exists(blob_hash):
+            return None
+        path = self.path(blob_hash)
+        with open(path, "rb") as f:
+            head = f.read(16)
+        return {"hash": blob_hash, "size": os.path.getsize(path), "media_type": sniff_media_type(head)}
+
+    def read(self, blob_hash: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the bytes in [start, end] (inclusive, end defaults to the last byte) in chunks"""
+        path = self.path(blob_hash)
+        if end is None:
+            end = os.path.getsize(path) - 1
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
@@ -0,0 +1,126 @@
+import gzip
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies above this size are compressed on a worker thread instead of the event loop
+THREADPOOL_THRESHOLD = 64 * 1024
+
+# Media types worth compressing; everything else (images, blobs) is sent as is
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv", "application/x-ndjson")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, preferring br at equal quality"""
+    preferences = {}
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        preferences[name.strip().lower()] = quality
+
+    wildcard = preferences.get("*", 0.0)
+    candidates = [("br", 1)] if brotli is not None else []
+    candidates.append(("gzip", 0))
+    scored = [(preferences.get(name, wildcard), rank, name) for name, rank in candidates]
+    quality, _, name = max(scored)
+    return name if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """Compresses complete text/JSON responses with brotli or gzip.
+
+    Only responses with a known Content-Length are compressed. Streamed
+    responses (SSE) pass through untouched so events are not held back by
+    the compressor; blobs are binary and keep their byte ranges.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if self._compressible(message):
+                    # Held back until the body arrives
+                    start_message = message
+                    return
+                await send(message)
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            if message.get("more_body"):
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if len(body) > THREADPOOL_THRESHOLD:
+                body = await run_in_threadpool(self._compress, encoding, body)
+            else:
+                body = self._compress(encoding, body)
+            headers = [
+                (key, value) for key, value in start["headers"]
+                if key.lower() not in (b"content-length", b"vary")
+            ]
+            vary = [value for key, value in start["headers"] if key.lower() == b"vary"]
+            headers.append((b"vary", vary[0] + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, start_message) -> bool:
+        """Complete (Content-Length), large enough, not yet encoded, and a text media type"""
+        if start_message["status"] != 200:
+            return False
+        content_type = content_length = None
+        for key, value in start_message["headers"]:
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1").split(";")[0].strip()
+            elif key == b"content-length":
+                content_length = int(value)
+        if content_length is None or content_length < self.minimum_size:
+            return False
+        return content_type in COMPRESSIBLE_TYPES
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
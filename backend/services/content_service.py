@@ -1,38 +1,1007 @@
+import asyncio
+import base64
+import bisect
 import json
 import os
+import sqlite3
+import threading
+import time
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Tuple
 import uuid
 
+from services.blob_store import BlobStore
+from services.metrics import CONTENT_STORE_LATENCY
+from services.search_index import SearchIndex
+from services.shared_state import FileLock, multi_process
+
+# Compact the log once tombstoned/overwritten records outnumber live ones
+# and there are at least this many of them
+COMPACTION_MIN_DEAD = 100
+
+# Fields a gallery listing may project; "preview" is a truncated content body
+PROJECTABLE_FIELDS = {"id", "type", "title", "content", "preview", "created_at", "metadata"}
+PREVIEW_LENGTH = 200
+
+# Versions of per-item change rows a SQLite store keeps so other workers can
+# catch up incrementally; a worker further behind rebuilds its search index
+CHANGE_LOG_RETENTION = 10000
+
+# PRAGMA synchronous levels accepted for the SQLite store. In WAL mode FULL
+# fsyncs the WAL on every commit; NORMAL only at checkpoints, so the last
+# commits can be lost on power or OS failure (never on a process crash)
+SQLITE_SYNCHRONOUS_LEVELS = ("FULL", "EXTRA", "NORMAL")
+
+# Items read from the store per query while streaming an export
+EXPORT_BATCH_SIZE = 500
+
+
+def load_legacy_content(storage_file: str) -> List[Dict]:
+    """Load all content from the legacy JSON document"""
+    try:
+        with open(storage_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def encode_cursor(item: Dict) -> str:
+    """Build an opaque keyset cursor pointing just past item"""
+    raw = json.dumps([item["created_at"], item["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor into its (created_at, id) key"""
+    try:
+        created_at, content_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(content_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def project_item(item: Dict, fields: List[str]) -> Dict:
+    """Return only the requested fields of item (id is always included)"""
+    projected = {"id": item["id"]}
+    for field in fields:
+        if field == "preview":
+            content = item.get("content") or ""
+            projected["preview"] = content[:PREVIEW_LENGTH] + ("..." if len(content) > PREVIEW_LENGTH else "")
+        elif field in item:
+            projected[field] = item[field]
+    return projected
+
+
+def metadata_value(value) -> Optional[str]:
+    """Normalize a metadata value for indexing and equality matching"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def patch_metadata(metadata: Dict, set_metadata: Dict, remove_metadata: List[str]) -> Dict:
+    """Return metadata with remove_metadata keys dropped and set_metadata merged in"""
+    patched = {key: value for key, value in metadata.items() if key not in remove_metadata}
+    patched.update(set_metadata)
+    return patched
+
+
+class ContentFilter:
+    """Selects gallery items for a bulk operation; all given criteria must match.
+
+    created_from is inclusive and created_before exclusive. metadata
+    values match by equality, as normalized by metadata_value. A filter
+    needs ids or at least one criterion, so a bulk operation never covers
+    the whole gallery by accident.
+    """
+
+    def __init__(
+        self,
+        ids: Optional[List[str]] = None,
+        content_type: Optional[str] = None,
+        created_from: Optional[str] = None,
+        created_before: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ):
+        if ids is None and not (content_type or created_from or created_before or metadata):
+            raise ValueError("Give ids or at least one of content_type, created_from, created_before, metadata")
+        for value in (created_from, created_before):
+            if value:
+                datetime.fromisoformat(value)
+        self.ids = list(dict.fromkeys(ids)) if ids is not None else None
+        self.content_type = content_type
+        self.created_from = created_from
+        self.created_before = created_before
+        self.metadata = {key: metadata_value(value) for key, value in (metadata or {}).items()}
+
+    def matches_key(self, created_at: str, content_type: str) -> bool:
+        """Check the criteria answerable without reading the item"""
+        if self.content_type and content_type != self.content_type:
+            return False
+        if self.created_from and created_at < self.created_from:
+            return False
+        return not (self.created_before and created_at >= self.created_before)
+
+    def matches_metadata(self, metadata: Dict) -> bool:
+        return all(
+            key in metadata and metadata_value(metadata[key]) == value
+            for key, value in self.metadata.items()
+        )
+
+
+def parse_import_line(line: bytes) -> Dict:
+    """Parse one NDJSON export line into a storable item, raising ValueError if invalid.
+
+    type, title and content are required; a missing id or created_at is
+    generated, so exports re-import with their ids and order intact.
+    """
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Line is not a JSON object")
+    for field in ("type", "title", "content"):
+        if not isinstance(record.get(field), str):
+            raise ValueError(f"Missing or non-string field: {field}")
+    content_id = record.get("id") or str(uuid.uuid4())
+    created_at = record.get("created_at") or datetime.now().isoformat()
+    if not isinstance(content_id, str) or not isinstance(created_at, str):
+        raise ValueError("id and created_at must be strings")
+    datetime.fromisoformat(created_at)
+    metadata = record.get("metadata") or {}
+    if not isinstance(metadata, dict):
+        raise ValueError("metadata must be an object")
+    return {
+        "id": content_id,
+        "type": record["type"],
+        "title": record["title"],
+        "content": record["content"],
+        "created_at": created_at,
+        "metadata": metadata
+    }
+
+
+class LogContentStore:
+    """Content store backed by an append-only log.
+
+    Every save appends a "put" record and every delete appends a tombstone,
+    so writes take constant time. An in-memory index maps content ids to
+    the byte offset of their latest record and is rebuilt by replaying the
+    log at startup. Dead records are dropped by background compaction.
+    A sorted (created_at, id) key list backs keyset pagination.
+
+    Writes are group-committed: put/put_many/delete return once their
+    record is fsynced, and concurrent writers share one fsync issued at
+    most once per commit_interval seconds.
+
+    The index lives in this process only, so the log has a single owner: a
+    second process opening it gets a RuntimeError instead of silently
+    diverging. Multi-process deployments use SQLiteContentStore.
+    """
+
+    def __init__(self, storage_file: str, commit_interval: float = 0.002):
+        # storage_file is the legacy JSON document; it is imported into the
+        # log once and left untouched afterwards
+        self.storage_file = storage_file
+        self.log_file = os.path.splitext(storage_file)[0] + ".log"
+        self._lock = threading.RLock()
+        self._index: Dict[str, int] = {}
+        # id -> (created_at, type), and all (created_at, id) keys in sorted order
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._sorted: List[Tuple[str, str]] = []
+        self._dead = 0
+        self._compacting = False
+        # Group commit state: the log is durable up to _durable_size within
+        # the current _generation (compaction starts a new, fully synced log)
+        self.commit_interval = commit_interval
+        self._commit_cond = threading.Condition()
+        self._syncing = False
+        self._last_sync = 0.0
+        self._generation = 0
+        self._owner_lock = FileLock(self.log_file + ".lock")
+        if not self._owner_lock.acquire(blocking=False):
+            raise RuntimeError(
+                f"{self.log_file} is in use by another process; to run several "
+                "workers set WEB_CONCURRENCY to their number (or CONTENT_STORE_BACKEND=sqlite)"
+            )
+        self._ensure_storage_exists()
+        self._load_index()
+        self._open_handles()
+        self._durable_size = self._log_size
+
+    def _ensure_storage_exists(self):
+        """Ensure the storage directory and log exist, importing legacy JSON once"""
+        os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
+        if os.path.exists(self.log_file):
+            return
+        tmp_file = self.log_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            for item in load_legacy_content(self.storage_file):
+                f.write(self._encode({"op": "put", "item": item}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.log_file)
+
+    def _encode(self, record: Dict) -> bytes:
+        return (json.dumps(record) + "\n").encode("utf-8")
+
+    def _load_index(self):
+        """Replay the log to rebuild the id -> offset index"""
+        offset = 0
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                # A torn write from a crash; drop it and everything after
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._apply(record, offset)
+                offset += len(line)
+        if offset != os.path.getsize(self.log_file):
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(offset)
+        self._log_size = offset
+
+    def _apply(self, record: Dict, offset: int):
+        """Apply one log record to the in-memory index"""
+        if record.get("op") == "put":
+            item = record["item"]
+            content_id = item["id"]
+            if content_id in self._index:
+                self._dead += 1
+                self._remove_key(content_id)
+            self._index[content_id] = offset
+            self._entries[content_id] = (item.get("created_at", ""), item.get("type", ""))
+            bisect.insort(self._sorted, (item.get("created_at", ""), content_id))
+        elif record.get("op") == "del":
+            if self._index.pop(record["id"], None) is not None:
+                self._dead += 1
+                self._remove_key(record["id"])
+            # The tombstone itself is dead weight once applied
+            self._dead += 1
+
+    def _remove_key(self, content_id: str):
+        created_at, _ = self._entries.pop(content_id)
+        key = (created_at, content_id)
+        position = bisect.bisect_left(self._sorted, key)
+        if position < len(self._sorted) and self._sorted[position] == key:
+            del self._sorted[position]
+
+    def _open_handles(self):
+        self._writer = open(self.log_file, 'ab')
+        self._reader = open(self.log_file, 'rb')
+
+    def close(self):
+        """Close the log file handles and give up ownership of the log"""
+        with self._lock:
+            self._writer.close()
+            self._reader.close()
+            self._owner_lock.release()
+
+    def _append(self, record: Dict) -> int:
+        """Append a record to the log and return its offset (caller holds the lock)"""
+        data = self._encode(record)
+        offset = self._log_size
+        self._writer.write(data)
+        self._writer.flush()
+        self._log_size += len(data)
+        return offset
+
+    def _commit(self, generation: int, end: int):
+        """Block until the log is durable up to end; the first waiter syncs for everyone.
+
+        Must be called without holding the store lock.
+        """
+        with self._commit_cond:
+            while not (generation < self._generation or end <= self._durable_size):
+                if not self._syncing:
+                    self._syncing = True
+                    break
+                self._commit_cond.wait()
+            else:
+                return
+        try:
+            self._sync()
+        finally:
+            with self._commit_cond:
+                self._syncing = False
+                self._commit_cond.notify_all()
+
+    def _sync(self):
+        """fsync everything appended so far, at most once per commit interval"""
+        # Waiting first lets more writers join this commit
+        delay = self._last_sync + self.commit_interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self._writer.flush()
+            generation, end = self._generation, self._log_size
+            # A duplicate descriptor stays valid if compaction swaps the log meanwhile
+            fd = os.dup(self._writer.fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._last_sync = time.monotonic()
+        with self._commit_cond:
+            if generation == self._generation:
+                self._durable_size = max(self._durable_size, end)
+
+    def _read_at(self, offset: int) -> Dict:
+        """Read the item stored in the put record at offset (caller holds the lock)"""
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["item"]
+
+    def put(self, item: Dict):
+        """Store a content item, replacing any item with the same ID"""
+        record = {"op": "put", "item": item}
+        with self._lock:
+            self._apply(record, self._append(record))
+            self._maybe_compact()
+            generation, end = self._generation, self._log_size
+        self._commit(generation, end)
+
+    def _append_many(self, records: List[Dict]):
+        """Append and apply several records with one write (caller holds the lock)"""
+        encoded = [self._encode(record) for record in records]
+        offset = self._log_size
+        self._writer.write(b"".join(encoded))
+        self._writer.flush()
+        for record, data in zip(records, encoded):
+            self._apply(record, offset)
+            offset += len(data)
+        self._log_size = offset
+
+    def put_many(self, items: List[Dict]):
+        """Store several content items with a single append, replacing any with the same ID"""
+        with self._lock:
+            self._append_many([{"op": "put", "item": item} for item in items])
+            # Re-imports replace every id, which can leave most of the log dead
+            self._maybe_compact()
+            generation, end = self._generation, self._log_size
+        self._commit(generation, end)
+
+    def get(self, content_id: str) -> Optional[Dict]:
+        """Get a content item by ID"""
+        with self._lock:
+            offset = self._index.get(content_id)
+            if offset is None:
+                return None
+            return self._read_at(offset)
+
+    def list(self, content_type: Optional[str] = None) -> List[Dict]:
+        """List content items in insertion order, optionally filtered by type"""
+        with self._lock:
+            content_list = [self._read_at(offset) for offset in self._index.values()]
+
+        if content_type:
+            return [item for item in content_list if item.get("type") == content_type]
+
+        return content_list
+
+    def page(
+        self,
+        content_type: Optional[str],
+        limit: int,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict]:
+        """Return up to limit items ordered by (created_at, id), starting after the given key"""
+        items = []
+        with self._lock:
+            position = bisect.bisect_right(self._sorted, after) if after else 0
+            while position < len(self._sorted) and len(items) < limit:
+                content_id = self._sorted[position][1]
+                position += 1
+                if content_type and self._entries[content_id][1] != content_type:
+                    continue
+                items.append(self._read_at(self._index[content_id]))
+        return items
+
+    def delete(self, content_id: str) -> bool:
+        """Delete a content item by ID"""
+        with self._lock:
+            if content_id not in self._index:
+                return False
+            tombstone = {"op": "del", "id": content_id}
+            self._apply(tombstone, self._append(tombstone))
+            self._maybe_compact()
+            generation, end = self._generation, self._log_size
+        self._commit(generation, end)
+        return True
+
+    def _match(self, content_filter: ContentFilter) -> List[str]:
+        """IDs of items matching the filter (caller holds the lock).
+
+        Type and created_at are checked against the in-memory index and a
+        created_at range is found by bisection, so only items that pass
+        those are read to check metadata.
+        """
+        if content_filter.ids is not None:
+            keys = [(self._entries[content_id][0], content_id) for content_id in content_filter.ids if content_id in self._entries]
+        else:
+            low = bisect.bisect_left(self._sorted, (content_filter.created_from,)) if content_filter.created_from else 0
+            high = bisect.bisect_left(self._sorted, (content_filter.created_before,)) if content_filter.created_before else len(self._sorted)
+            keys = self._sorted[low:high]
+        content_ids = [
+            content_id for created_at, content_id in keys
+            if content_filter.matches_key(created_at, self._entries[content_id][1])
+        ]
+        if content_filter.metadata:
+            content_ids = [
+                content_id for content_id in content_ids
+                if content_filter.matches_metadata(self._read_at(self._index[content_id]).get("metadata") or {})
+            ]
+        return content_ids
+
+    def delete_where(self, content_filter: ContentFilter, dry_run: bool = False) -> List[str]:
+        """Delete all matching items with a single append and return their IDs"""
+        with self._lock:
+            content_ids = self._match(content_filter)
+            if dry_run or not content_ids:
+                return content_ids
+            self._append_many([{"op": "del", "id": content_id} for content_id in content_ids])
+            self._maybe_compact()
+            generation, end = self._generation, self._log_size
+        self._commit(generation, end)
+        return content_ids
+
+    def patch_where(
+        self,
+        content_filter: ContentFilter,
+        set_metadata: Dict,
+        remove_metadata: List[str],
+        dry_run: bool = False
+    ) -> Tuple[int, List[str]]:
+        """Patch the metadata of all matching items with a single append.
+
+        Returns the number of matches and the IDs of the items whose
+        metadata actually changed; unchanged items are not rewritten.
+        """
+        with self._lock:
+            content_ids = self._match(content_filter)
+            records = []
+            for content_id in content_ids:
+                item = self._read_at(self._index[content_id])
+                metadata = item.get("metadata") or {}
+                patched = patch_metadata(metadata, set_metadata, remove_metadata)
+                if patched != metadata:
+                    records.append({"op": "put", "item": {**item, "metadata": patched}})
+            changed = [record["item"]["id"] for record in records]
+            if dry_run or not records:
+                return len(content_ids), changed
+            self._append_many(records)
+            self._maybe_compact()
+            generation, end = self._generation, self._log_size
+        self._commit(generation, end)
+        return len(content_ids), changed
+
+    def _maybe_compact(self):
+        """Start background compaction when dead records dominate (caller holds the lock)"""
+        if self._compacting:
+            return
+        if self._dead < COMPACTION_MIN_DEAD or self._dead <= len(self._index):
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name="content-compaction", daemon=True).start()
+
+    def compact(self):
+        """Rewrite the log with only live records.
+
+        Live records are copied without holding the lock; records appended
+        meanwhile are carried over verbatim before the new log is swapped in.
+        """
+        with self._lock:
+            self._compacting = True
+            snapshot = list(self._index.items())
+            snapshot_end = self._log_size
+        tmp_file = self.log_file + ".compact"
+        try:
+            new_index: Dict[str, int] = {}
+            with open(tmp_file, 'wb') as out, open(self.log_file, 'rb') as src:
+                for content_id, offset in snapshot:
+                    src.seek(offset)
+                    new_index[content_id] = out.tell()
+                    out.write(src.readline())
+
+                with self._lock:
+                    src.seek(snapshot_end)
+                    dead = 0
+                    for line in src.read(self._log_size - snapshot_end).splitlines(keepends=True):
+                        record = json.loads(line)
+                        if record["op"] == "put":
+                            if record["item"]["id"] in new_index:
+                                dead += 1
+                            new_index[record["item"]["id"]] = out.tell()
+                        else:
+                            if new_index.pop(record["id"], None) is not None:
+                                dead += 1
+                            dead += 1
+                        out.write(line)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    out.close()
+
+                    # Swap in the compacted log; handles must be closed first on Windows
+                    self._writer.close()
+                    self._reader.close()
+                    src.close()
+                    try:
+                        os.replace(tmp_file, self.log_file)
+                        self._index = new_index
+                        self._dead = dead
+                        # The new log was fsynced above, so every pending commit is durable
+                        with self._commit_cond:
+                            self._generation += 1
+                            self._durable_size = os.path.getsize(self.log_file)
+                            self._commit_cond.notify_all()
+                    finally:
+                        self._log_size = os.path.getsize(self.log_file)
+                        self._open_handles()
+        finally:
+            self._compacting = False
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+
+class SQLiteContentStore:
+    """Content store backed by SQLite in WAL mode.
+
+    Items live in a `content` table indexed on id and (type, created_at);
+    metadata is mirrored into `content_metadata` rows indexed on (key, value)
+    so items can be filtered by metadata without scanning. WAL lets several
+    processes read while one writes.
+
+    Every write also bumps a counter in `store_version` and records the
+    touched ids under that version in `content_changes`, in the same
+    transaction. All processes sharing the database thus agree on whether
+    content changed (see changes()) and can replay what other processes
+    changed (see changes_since()).
+    """
+
+    SCHEMA_VERSION = 4
+
+    def __init__(self, db_file: str, storage_file: str, synchronous: str = "FULL"):
+        self.db_file = db_file
+        self.storage_file = storage_file
+        self.synchronous = synchronous.upper()
+        if self.synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown CONTENT_SQLITE_SYNCHRONOUS: {synchronous}")
+        self._local = threading.local()
+        # Versions committed by this process, which changes_since() leaves out
+        self._written = set()
+        self._written_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        self._migrate()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL by default: a write returns only once it survives power loss
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _migrate(self):
+        """Create the schema and import existing content exactly once"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+            if version < 1:
+                self._create_schema(conn)
+                for item in self._existing_content():
+                    self._insert(conn, item)
+            if version < 2:
+                # Keyset pagination orders by (created_at, id)
+                conn.execute("DROP INDEX IF EXISTS idx_content_type_created")
+                conn.execute("DROP INDEX IF EXISTS idx_content_created")
+                conn.execute("CREATE INDEX idx_content_type_created ON content (type, created_at, id)")
+                conn.execute("CREATE INDEX idx_content_created ON content (created_at, id)")
+            if version < 3:
+                # The epoch keeps counters of a recreated database from matching old ones
+                conn.execute("""
+                    CREATE TABLE store_version (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        epoch TEXT NOT NULL,
+                        version INTEGER NOT NULL,
+                        modified_at REAL NOT NULL
+                    )
+                """)
+                conn.execute(
+                    "INSERT INTO store_version (id, epoch, version, modified_at) VALUES (1, ?, 0, ?)",
+                    (uuid.uuid4().hex[:8], time.time())
+                )
+            if version < 4:
+                # op is "put", "del" or "patch" (metadata only)
+                conn.execute("""
+                    CREATE TABLE content_changes (
+                        version INTEGER NOT NULL,
+                        content_id TEXT NOT NULL,
+                        op TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX idx_content_changes_version ON content_changes (version)")
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        """Create the version 1 tables"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS content (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS content_metadata (
+                content_id TEXT NOT NULL REFERENCES content (id),
+                key TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (content_id, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_content_metadata_key_value ON content_metadata (key, value)")
+
+    def _existing_content(self) -> List[Dict]:
+        """Content to import on first start: the append-only log if present, else content.json"""
+        log_file = os.path.splitext(self.storage_file)[0] + ".log"
+        if os.path.exists(log_file):
+            store = LogContentStore(self.storage_file)
+            try:
+                return store.list()
+            finally:
+                store.close()
+        return load_legacy_content(self.storage_file)
+
+    def _insert(self, conn: sqlite3.Connection, item: Dict):
+        metadata = item.get("metadata") or {}
+        conn.execute(
+            "INSERT OR REPLACE INTO content (id, type, title, content, created_at, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+            (item["id"], item.get("type", ""), item.get("title", ""), item.get("content") or "",
+             item.get("created_at", ""), json.dumps(metadata))
+        )
+        conn.execute("DELETE FROM content_metadata WHERE content_id = ?", (item["id"],))
+        conn.executemany(
+            "INSERT INTO content_metadata (content_id, key, value) VALUES (?, ?, ?)",
+            [(item["id"], key, metadata_value(value)) for key, value in metadata.items()]
+        )
+
+    def _row_to_item(self, row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "type": row["type"],
+            "title": row["title"],
+            "content": row["content"],
+            "created_at": row["created_at"],
+            "metadata": json.loads(row["metadata"])
+        }
+
+    def _record_changes(self, conn: sqlite3.Connection, content_ids: List[str], op: str) -> int:
+        """Bump the change counter and log the touched ids under the new version (inside the write)"""
+        conn.execute("UPDATE store_version SET version = version + 1, modified_at = ?", (time.time(),))
+        version = conn.execute("SELECT version FROM store_version").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO content_changes (version, content_id, op) VALUES (?, ?, ?)",
+            [(version, content_id, op) for content_id in content_ids]
+        )
+        conn.execute("DELETE FROM content_changes WHERE version <= ?", (version - CHANGE_LOG_RETENTION,))
+        return version
+
+    def _committed(self, version: int):
+        """Remember a version this process committed; only call once the transaction is committed"""
+        with self._written_lock:
+            self._written.add(version)
+
+    def changes(self) -> Tuple[str, int, float]:
+        """Return (epoch, change counter, modified_at) as committed by any process"""
+        row = self._connect().execute("SELECT epoch, version, modified_at FROM store_version").fetchone()
+        return row["epoch"], row["version"], row["modified_at"]
+
+    def changes_since(self, epoch: str, version: int) -> Optional[Tuple[int, List[Tuple[str, str]]]]:
+        """Changes other processes committed after version, as (current version, [(content_id, op)]).
+
+        Returns None when the changes are no longer all logged (the
+        database was recreated or version is too old); the caller must
+        then start over from a full read.
+        """
+        conn = self._connect()
+        with conn:
+            # One read transaction, so the counter and the change rows agree
+            conn.execute("BEGIN")
+            current_epoch, current = conn.execute("SELECT epoch, version FROM store_version").fetchone()
+            if current_epoch != epoch or current - version >= CHANGE_LOG_RETENTION:
+                return None
+            rows = conn.execute(
+                "SELECT version, content_id, op FROM content_changes WHERE version > ? ORDER BY version, rowid",
+                (version,)
+            ).fetchall()
+        with self._written_lock:
+            own = {written for written in self._written if written <= current}
+            self._written -= own
+        return current, [(row["content_id"], row["op"]) for row in rows if row["version"] not in own]
+
+    def put(self, item: Dict):
+        """Store a content item, replacing any item with the same ID"""
+        conn = self._connect()
+        with conn:
+            self._insert(conn, item)
+            version = self._record_changes(conn, [item["id"]], "put")
+        self._committed(version)
+
+    def put_many(self, items: List[Dict]):
+        """Store several content items in one transaction, replacing any with the same ID"""
+        conn = self._connect()
+        with conn:
+            for item in items:
+                self._insert(conn, item)
+            version = self._record_changes(conn, [item["id"] for item in items], "put")
+        self._committed(version)
+
+    def get(self, content_id: str) -> Optional[Dict]:
+        """Get a content item by ID"""
+        row = self._connect().execute("SELECT * FROM content WHERE id = ?", (content_id,)).fetchone()
+        return self._row_to_item(row) if row else None
+
+    def list(self, content_type: Optional[str] = None) -> List[Dict]:
+        """List content items oldest first, optionally filtered by type"""
+        if content_type:
+            rows = self._connect().execute(
+                "SELECT * FROM content WHERE type = ? ORDER BY created_at, rowid", (content_type,)
+            )
+        else:
+            rows = self._connect().execute("SELECT * FROM content ORDER BY created_at, rowid")
+        return [self._row_to_item(row) for row in rows]
+
+    def page(
+        self,
+        content_type: Optional[str],
+        limit: int,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict]:
+        """Return up to limit items ordered by (created_at, id), starting after the given key"""
+        clauses, params = [], []
+        if content_type:
+            clauses.append("type = ?")
+            params.append(content_type)
+        if after:
+            clauses.append("(created_at > ? OR (created_at = ? AND id > ?))")
+            params.extend([after[0], after[0], after[1]])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT * FROM content {where} ORDER BY created_at, id LIMIT ?", params + [limit]
+        )
+        return [self._row_to_item(row) for row in rows]
+
+    def delete(self, content_id: str) -> bool:
+        """Delete a content item by ID"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM content_metadata WHERE content_id = ?", (content_id,))
+            deleted = conn.execute("DELETE FROM content WHERE id = ?", (content_id,)).rowcount > 0
+            version = self._record_changes(conn, [content_id], "del") if deleted else None
+        if version is not None:
+            self._committed(version)
+        return deleted
+
+    def _match(self, conn: sqlite3.Connection, content_filter: ContentFilter, columns: str = "id") -> List[sqlite3.Row]:
+        """Rows of items matching the filter, through the id, (type, created_at) and metadata indexes"""
+        clauses, params = [], []
+        if content_filter.ids is not None:
+            clauses.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(content_filter.ids))
+        if content_filter.content_type:
+            clauses.append("type = ?")
+            params.append(content_filter.content_type)
+        if content_filter.created_from:
+            clauses.append("created_at >= ?")
+            params.append(content_filter.created_from)
+        if content_filter.created_before:
+            clauses.append("created_at < ?")
+            params.append(content_filter.created_before)
+        for key, value in content_filter.metadata.items():
+            clauses.append("id IN (SELECT content_id FROM content_metadata WHERE key = ? AND value IS ?)")
+            params.extend([key, value])
+        where = " AND ".join(clauses) or "1"
+        return conn.execute(f"SELECT {columns} FROM content WHERE {where} ORDER BY created_at, id", params).fetchall()
+
+    def delete_where(self, content_filter: ContentFilter, dry_run: bool = False) -> List[str]:
+        """Delete all matching items in one transaction and return their IDs"""
+        conn = self._connect()
+        with conn:
+            if not dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+            content_ids = [row["id"] for row in self._match(conn, content_filter)]
+            if dry_run or not content_ids:
+                return content_ids
+            ids_json = json.dumps(content_ids)
+            conn.execute("DELETE FROM content_metadata WHERE content_id IN (SELECT value FROM json_each(?))", (ids_json,))
+            conn.execute("DELETE FROM content WHERE id IN (SELECT value FROM json_each(?))", (ids_json,))
+            version = self._record_changes(conn, content_ids, "del")
+        self._committed(version)
+        return content_ids
+
+    def patch_where(
+        self,
+        content_filter: ContentFilter,
+        set_metadata: Dict,
+        remove_metadata: List[str],
+        dry_run: bool = False
+    ) -> Tuple[int, List[str]]:
+        """Patch the metadata of all matching items in one transaction.
+
+        Returns the number of matches and the IDs of the items whose
+        metadata actually changed; unchanged items are not rewritten.
+        """
+        conn = self._connect()
+        with conn:
+            if not dry_run:
+                conn.execute("BEGIN IMMEDIATE")
+            rows = self._match(conn, content_filter, "*")
+            patched_items = []
+            for row in rows:
+                item = self._row_to_item(row)
+                patched = patch_metadata(item["metadata"], set_metadata, remove_metadata)
+                if patched != item["metadata"]:
+                    patched_items.append({**item, "metadata": patched})
+            changed = [item["id"] for item in patched_items]
+            if dry_run or not patched_items:
+                return len(rows), changed
+            for item in patched_items:
+                self._insert(conn, item)
+            version = self._record_changes(conn, changed, "patch")
+        self._committed(version)
+        return len(rows), changed
+
+
 class ContentService:
-    def __init__(self, storage_file: Optional[str] = None):
+    """Gallery content API on top of a pluggable store.
+
+    The store is chosen with CONTENT_STORE_BACKEND: "log" (default) for the
+    append-only log, or "sqlite" for a SQLite database (CONTENT_SQLITE_PATH,
+    default data/content.db). With several worker processes (WEB_CONCURRENCY
+    or the server's --workers above 1) only "sqlite" is supported and is the default;
+    versions then come from the shared database and the search index
+    replays the items other workers changed.
+    """
+
+    def __init__(self, storage_file: Optional[str] = None, backend: Optional[str] = None):
         # Use absolute path relative to backend directory
         if storage_file is None:
             backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             storage_file = os.path.join(backend_dir, "data", "content.json")
         self.storage_file = storage_file
-        self._ensure_storage_exists()
-    
-    def _ensure_storage_exists(self):
-        """Ensure the storage directory and file exist"""
         os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-        if not os.path.exists(self.storage_file):
-            with open(self.storage_file, 'w') as f:
-                json.dump([], f)
-    
-    def _load_content(self) -> List[Dict]:
-        """Load all content from storage"""
-        try:
-            with open(self.storage_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-    
-    def _save_content(self, content_list: List[Dict]):
-        """Save content list to storage"""
-        with open(self.storage_file, 'w') as f:
-            json.dump(content_list, f, indent=2)
-    
+
+        self.commit_interval = float(os.getenv("CONTENT_COMMIT_INTERVAL_MS", "2")) / 1000
+        default_backend = "sqlite" if multi_process() else "log"
+        self.backend = (backend or os.getenv("CONTENT_STORE_BACKEND") or default_backend).lower()
+        if self.backend not in ("log", "sqlite"):
+            raise ValueError(f"Unknown CONTENT_STORE_BACKEND: {self.backend}")
+        if self.backend == "log" and multi_process():
+            raise ValueError("CONTENT_STORE_BACKEND=log supports a single worker; use sqlite with several workers")
+        # Shared stores are written by every worker process
+        self.shared = self.backend == "sqlite"
+        self.store = self._open_store(storage_file, os.getenv("CONTENT_SQLITE_PATH"))
+
+        # Built from the store on the first search, then kept current by
+        # save/delete; with a shared store also by replaying other workers' changes
+        self.search_index = SearchIndex()
+        self._index_lock = threading.Lock()
+        # (epoch, version) of the shared store the search index reflects
+        self._indexed_version: Optional[Tuple[str, int]] = None
+
+        # Bumped on every change so HTTP clients can revalidate cheaply. The
+        # epoch keeps versions from a previous process from matching. Shared
+        # stores keep their own counter instead.
+        self._version = 0
+        self._epoch = uuid.uuid4().hex[:8]
+        self._modified_at = time.time()
+        self._version_lock = threading.Lock()
+
+        # Binary assets live outside the records, which keep only the blob hash
+        self.blobs = BlobStore(os.getenv("BLOB_STORE_PATH") or os.path.join(os.path.dirname(self.storage_file), "blobs"))
+
+    def _open_store(self, storage_file: str, db_file: Optional[str] = None):
+        if self.backend == "sqlite":
+            return SQLiteContentStore(
+                db_file or os.path.splitext(storage_file)[0] + ".db",
+                storage_file,
+                synchronous=os.getenv("CONTENT_SQLITE_SYNCHRONOUS", "FULL")
+            )
+        return LogContentStore(storage_file, commit_interval=self.commit_interval)
+
+    def open_store(self, name: str):
+        """Open a separate store of the configured backend for non-gallery records.
+
+        Records must be item-shaped (id, type, title, content, created_at,
+        metadata); they never appear in gallery listings or search.
+        """
+        return self._open_store(os.path.join(os.path.dirname(self.storage_file), f"{name}.json"))
+
+    def version(self) -> str:
+        """Opaque token that changes whenever gallery content changes"""
+        if self.shared:
+            epoch, version, _ = self.store.changes()
+            return f"{epoch}-{version}"
+        return f"{self._epoch}-{self._version}"
+
+    @property
+    def modified_at(self) -> float:
+        """Time of the last gallery change"""
+        if self.shared:
+            return self.store.changes()[2]
+        return self._modified_at
+
+    def validators(self) -> Tuple[str, float]:
+        """version() and modified_at read together, with a single store query when shared"""
+        if self.shared:
+            epoch, version, modified_at = self.store.changes()
+            return f"{epoch}-{version}", modified_at
+        return f"{self._epoch}-{self._version}", self._modified_at
+
+    async def validators_async(self) -> Tuple[str, float]:
+        """validators() on a worker thread when it has to query the shared store"""
+        if not self.shared:
+            return self.validators()
+        return await asyncio.to_thread(self.validators)
+
+    def _changed(self):
+        with self._version_lock:
+            self._version += 1
+            self._modified_at = time.time()
+
+    def _sync_search_index(self):
+        """Build the search index on first use; with a shared store, catch up on other workers' changes.
+
+        Changes are replayed item by item from the store's change log. Only
+        when they are no longer logged is the index rebuilt from scratch.
+        """
+        if not self.shared:
+            self.search_index.build(self.store.list)
+            return
+        with self._index_lock:
+            if self.search_index.built and self._indexed_version is not None:
+                epoch, version = self._indexed_version
+                delta = self.store.changes_since(epoch, version)
+                if delta is not None:
+                    version, changes = delta
+                    # Metadata patches do not touch indexed fields; otherwise
+                    # the last change to an item decides
+                    latest = {content_id: op for content_id, op in changes if op != "patch"}
+                    for content_id, op in latest.items():
+                        item = self.store.get(content_id) if op == "put" else None
+                        if item is not None:
+                            self.search_index.add(item)
+                        else:
+                            self.search_index.remove(content_id)
+                    self._indexed_version = (epoch, version)
+                    return
+                self.search_index.reset()
+            epoch, version, _ = self.store.changes()
+            # Changes committed during the build are replayed again next time, which is harmless
+            self.search_index.build(self.store.list)
+            self._indexed_version = (epoch, version)
+
+    def close(self):
+        """Release storage handles"""
+        self.store.close()
+
     def save_content(
         self,
         content_type: str,
@@ -41,62 +1010,278 @@ class ContentService:
         metadata: Optional[Dict] = None
     ) -> str:
         """Save content and return content ID"""
-        content_list = self._load_content()
-        
-        content_id = str(uuid.uuid4())
-        content_item = {
-            "id": content_id,
+        content_item = self._new_item(content_type, title, content, metadata)
+
+        with CONTENT_STORE_LATENCY.time(operation="save", backend=self.backend):
+            self.store.put(content_item)
+        self.search_index.add(content_item)
+        self._changed()
+
+        return content_item["id"]
+
+    def save_many(self, entries: List[Dict]) -> List[str]:
+        """Save several items in one store write and return their IDs in order.
+
+        Each entry holds the save_content arguments: content_type, title,
+        content and optionally metadata.
+        """
+        content_items = [
+            self._new_item(entry["content_type"], entry["title"], entry["content"], entry.get("metadata"))
+            for entry in entries
+        ]
+        if content_items:
+            with CONTENT_STORE_LATENCY.time(operation="save_many", backend=self.backend):
+                self.store.put_many(content_items)
+            for content_item in content_items:
+                self.search_index.add(content_item)
+            self._changed()
+        return [content_item["id"] for content_item in content_items]
+
+    def save_image_blob(self, image_data: Dict) -> Optional[str]:
+        """Move inline image bytes (image_base64) into the blob store and return the hash"""
+        encoded = image_data.get("image_base64")
+        if not encoded:
+            return None
+        return self.blobs.put_base64(encoded)["hash"]
+
+    async def save_image_blob_async(self, image_data: Dict) -> Optional[str]:
+        """save_image_blob on a worker thread, since decoding and fsyncing the blob blocks"""
+        return await asyncio.to_thread(self.save_image_blob, image_data)
+
+    async def save_content_async(
+        self,
+        content_type: str,
+        title: str,
+        content: str,
+        metadata: Optional[Dict] = None
+    ) -> str:
+        """save_content on a worker thread, so waiting for the commit does not block the event loop"""
+        return await asyncio.to_thread(self.save_content, content_type, title, content, metadata)
+
+    async def save_many_async(self, entries: List[Dict]) -> List[str]:
+        """Async variant of save_many"""
+        return await asyncio.to_thread(self.save_many, entries)
+
+    def _new_item(
+        self,
+        content_type: str,
+        title: str,
+        content: str,
+        metadata: Optional[Dict] = None
+    ) -> Dict:
+        return {
+            "id": str(uuid.uuid4()),
             "type": content_type,
             "title": title,
             "content": content,
             "created_at": datetime.now().isoformat(),
             "metadata": metadata or {}
         }
-        
-        content_list.append(content_item)
-        self._save_content(content_list)
-        
-        return content_id
-    
+
+    def iter_content(self, content_type: Optional[str] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict]:
+        """Yield every item ordered by (created_at, id), reading batch_size at a time.
+
+        Only one batch is held in memory however large the gallery is.
+        Items saved while iterating are included if they sort after the
+        current position.
+        """
+        after = None
+        while True:
+            with CONTENT_STORE_LATENCY.time(operation="page", backend=self.backend):
+                items = self.store.page(content_type, batch_size, after)
+            yield from items
+            if len(items) < batch_size:
+                return
+            after = (items[-1]["created_at"], items[-1]["id"])
+
+    def import_lines(self, lines: List[Tuple[int, Optional[bytes]]]) -> Dict:
+        """Import numbered NDJSON lines with a single store write.
+
+        Items keep their id, so importing the same export twice replaces
+        rather than duplicates. A None line was too long to read. Returns
+        the number imported and an error for each rejected line.
+        """
+        items, errors = [], []
+        for line_number, line in lines:
+            try:
+                if line is None:
+                    raise ValueError("Line too long")
+                items.append(parse_import_line(line))
+            except ValueError as e:
+                errors.append({"line": line_number, "error": str(e)})
+        if items:
+            with CONTENT_STORE_LATENCY.time(operation="import", backend=self.backend):
+                self.store.put_many(items)
+            for item in items:
+                self.search_index.add(item)
+            self._changed()
+        return {"imported": len(items), "errors": errors}
+
+    async def import_lines_async(self, lines: List[Tuple[int, Optional[bytes]]]) -> Dict:
+        """Async variant of import_lines"""
+        return await asyncio.to_thread(self.import_lines, lines)
+
     def get_content(self, content_id: str) -> Optional[Dict]:
         """Get content by ID"""
-        content_list = self._load_content()
-        for item in content_list:
-            if item.get("id") == content_id:
-                return item
-        return None
-    
+        with CONTENT_STORE_LATENCY.time(operation="get", backend=self.backend):
+            return self.store.get(content_id)
+
+    async def get_content_async(self, content_id: str) -> Optional[Dict]:
+        """Async variant of get_content"""
+        return await asyncio.to_thread(self.get_content, content_id)
+
     def get_all_content(self, content_type: Optional[str] = None) -> List[Dict]:
         """Get all content, optionally filtered by type"""
-        content_list = self._load_content()
-        
-        if content_type:
-            return [item for item in content_list if item.get("type") == content_type]
-        
-        return content_list
-    
+        with CONTENT_STORE_LATENCY.time(operation="list", backend=self.backend):
+            return self.store.list(content_type)
+
+    async def get_all_content_async(self, content_type: Optional[str] = None) -> List[Dict]:
+        """Async variant of get_all_content"""
+        return await asyncio.to_thread(self.get_all_content, content_type)
+
+    def list_content_page(
+        self,
+        content_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Get one page of content ordered by (created_at, id).
+
+        Returns the (optionally projected) items and the cursor for the
+        next page, which is None on the last page.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        # Fetch one extra item to learn whether another page exists
+        with CONTENT_STORE_LATENCY.time(operation="page", backend=self.backend):
+            items = self.store.page(content_type, limit + 1, after)
+        next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+        items = items[:limit]
+        if fields:
+            items = [project_item(item, fields) for item in items]
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def list_content_page_async(
+        self,
+        content_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Async variant of list_content_page"""
+        return await asyncio.to_thread(self.list_content_page, content_type, limit, cursor, fields)
+
     def delete_content(self, content_id: str) -> bool:
         """Delete content by ID"""
-        content_list = self._load_content()
-        original_length = len(content_list)
-        
-        content_list = [item for item in content_list if item.get("id") != content_id]
-        
-        if len(content_list) < original_length:
-            self._save_content(content_list)
-            return True
-        return False
-    
+        with CONTENT_STORE_LATENCY.time(operation="delete", backend=self.backend):
+            deleted = self.store.delete(content_id)
+        if deleted:
+            self.search_index.remove(content_id)
+            self._changed()
+        return deleted
+
+    async def delete_content_async(self, content_id: str) -> bool:
+        """Async variant of delete_content"""
+        return await asyncio.to_thread(self.delete_content, content_id)
+
+    def bulk_delete(self, content_filter: ContentFilter, dry_run: bool = False) -> Dict:
+        """Delete every matching item in one store write.
+
+        Returns the matched count, the deleted count and the deleted ids.
+        With dry_run nothing changes: "deleted" is 0 and the ids that would
+        be deleted are listed under "would_delete" instead.
+        """
+        with CONTENT_STORE_LATENCY.time(operation="bulk_delete", backend=self.backend):
+            content_ids = self.store.delete_where(content_filter, dry_run=dry_run)
+        if content_ids and not dry_run:
+            for content_id in content_ids:
+                self.search_index.remove(content_id)
+            self._changed()
+        if dry_run:
+            return {"matched": len(content_ids), "deleted": 0, "would_delete": content_ids}
+        return {"matched": len(content_ids), "deleted": len(content_ids), "ids": content_ids}
+
+    def bulk_update_metadata(
+        self,
+        content_filter: ContentFilter,
+        set_metadata: Optional[Dict] = None,
+        remove_metadata: Optional[List[str]] = None,
+        dry_run: bool = False
+    ) -> Dict:
+        """Merge set_metadata into and drop remove_metadata keys from every matching item in one store write.
+
+        "updated" counts the items whose metadata changed and "ids" lists
+        them. With dry_run nothing changes: "updated" is 0 and the ids that
+        would change are listed under "would_update" instead.
+        """
+        with CONTENT_STORE_LATENCY.time(operation="bulk_update", backend=self.backend):
+            matched, content_ids = self.store.patch_where(
+                content_filter, set_metadata or {}, remove_metadata or [], dry_run=dry_run
+            )
+        # The search index covers title and content only, so it stays valid
+        if content_ids and not dry_run:
+            self._changed()
+        if dry_run:
+            return {"matched": matched, "updated": 0, "would_update": content_ids}
+        return {"matched": matched, "updated": len(content_ids), "ids": content_ids}
+
+    async def bulk_delete_async(self, content_filter: ContentFilter, dry_run: bool = False) -> Dict:
+        """Async variant of bulk_delete"""
+        return await asyncio.to_thread(self.bulk_delete, content_filter, dry_run)
+
+    async def bulk_update_metadata_async(
+        self,
+        content_filter: ContentFilter,
+        set_metadata: Optional[Dict] = None,
+        remove_metadata: Optional[List[str]] = None,
+        dry_run: bool = False
+    ) -> Dict:
+        """Async variant of bulk_update_metadata"""
+        return await asyncio.to_thread(self.bulk_update_metadata, content_filter, set_metadata, remove_metadata, dry_run)
+
+    def warm_up(self):
+        """Build the search index now rather than on the first search"""
+        self._sync_search_index()
+
     def search_content(self, query: str) -> List[Dict]:
-        """Search content by query"""
-        content_list = self._load_content()
-        query_lower = query.lower()
-        
-        results = []
-        for item in content_list:
-            if (query_lower in item.get("title", "").lower() or 
-                query_lower in item.get("content", "").lower()):
-                results.append(item)
-        
-        return results
+        """Search content by query, best matches first"""
+        return self.search_content_page(query, limit=None)["items"]
 
+    def search_content_page(
+        self,
+        query: str,
+        limit: Optional[int] = 20,
+        offset: int = 0,
+        content_type: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """Search title and content through the inverted index.
+
+        Returns one page of ranked items (each with a "score") and the
+        total number of matches.
+        """
+        with CONTENT_STORE_LATENCY.time(operation="search", backend=self.backend):
+            self._sync_search_index()
+            ranked, total = self.search_index.search(query, limit=limit, offset=offset, content_type=content_type)
+
+        items = []
+        for content_id, score in ranked:
+            item = self.store.get(content_id)
+            if item is None:
+                continue
+            if fields:
+                item = project_item(item, fields)
+            item["score"] = round(score, 4)
+            items.append(item)
+        return {"items": items, "total": total}
+
+    async def search_content_page_async(
+        self,
+        query: str,
+        limit: Optional[int] = 20,
+        offset: int = 0,
+        content_type: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict:
+        """search_content_page on a worker thread, since building or catching up the index reads the store"""
+        return await asyncio.to_thread(self.search_content_page, query, limit, offset, content_type, fields)
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from services.response_cache import parse_ttls
+
+# Methods that may answer from a similar earlier input, with the minimum
+# Jaccard similarity of their normalized word sets. Only cheap, short-output
+# methods where a near match is as good as an exact one are listed.
+DEFAULT_THRESHOLDS = {
+    "generate_hashtags": 0.8,
+    "process_prompt": 0.85,
+}
+
+# MinHash signature length, split into LSH bands of NUM_PERM / BANDS rows.
+# 16 bands of 4 rows make pairs above ~0.5 similarity collide in some band
+# with high probability; candidates are then checked exactly.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(0x5EED)
+PERMUTATIONS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+# Words that carry no topic; negations are kept on purpose
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in into is it me my of on or our so the this "
+    "to we what with you your please some about give make do does can should".split()
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Crude plural folding so "tips"/"tip" and "beginners"/"beginner" match"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def word_set(text: str) -> FrozenSet[str]:
+    """Normalized, order-insensitive words of a user input"""
+    return frozenset(stem(word) for word in TOKEN_PATTERN.findall(text.casefold()) if word not in STOPWORDS)
+
+
+def minhash(words: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big") for word in words]
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+
+def jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    return len(first & second) / len(first | second) if first or second else 0.0
+
+
+class FuzzyCache:
+    """Near-duplicate response cache keyed on the user's input, not the full prompt.
+
+    Each entry is filed under a scope (method, model and any exact-match
+    parameters such as platform) and the MinHash signature of its input's
+    word set. Lookups collect candidates that share an LSH band with the
+    query and reuse the most similar one whose exact Jaccard similarity
+    reaches the method's threshold. Entries expire with the method's
+    response cache TTL and the least recently used are evicted first.
+    """
+
+    def __init__(
+        self,
+        thresholds: Optional[Dict[str, float]] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        max_entries: int = 5000
+    ):
+        self.thresholds = thresholds if thresholds is not None else dict(DEFAULT_THRESHOLDS)
+        self.ttls = ttls if ttls is not None else parse_ttls(None)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # entry key -> (words, band keys, value, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bands: Dict[tuple, set] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["FuzzyCache"]:
+        """Build from GEMINI_FUZZY_CACHE_* settings, or None unless GEMINI_FUZZY_CACHE_ENABLED"""
+        if os.getenv("GEMINI_FUZZY_CACHE_ENABLED", "false").lower() not in ("1", "true", "yes"):
+            return None
+        thresholds = dict(DEFAULT_THRESHOLDS)
+        for entry in os.getenv("GEMINI_FUZZY_THRESHOLDS", "").split(","):
+            if "=" in entry:
+                method, value = entry.split("=", 1)
+                thresholds[method.strip()] = float(value)
+        return cls(
+            thresholds={method: value for method, value in thresholds.items() if value > 0},
+            ttls=parse_ttls(os.getenv("GEMINI_CACHE_TTLS")),
+            max_entries=int(os.getenv("GEMINI_FUZZY_CACHE_MAX_ENTRIES", "5000"))
+        )
+
+    def enabled_for(self, method: str) -> bool:
+        return method in self.thresholds and self.ttls.get(method, 0) > 0
+
+    def _signature(self, method: str, scope: str, text: str):
+        words = word_set(text)
+        if not words:
+            return None, None, None
+        signature = minhash(words)
+        band_keys = [(method, scope, band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        key = hashlib.sha256(f"{method}\n{scope}\n{' '.join(sorted(words))}".encode("utf-8")).hexdigest()
+        return words, band_keys, key
+
+    def get(self, method: str, scope: str, text: str) -> Optional[Tuple[str, float]]:
+        """Return (response, similarity) for the closest earlier input above the threshold, or None"""
+        if not self.enabled_for(method):
+            return None
+        words, band_keys, _ = self._signature(method, scope, text)
+        if words is None:
+            return None
+        now = time.time()
+        with self._lock:
+            best, best_similarity = None, 0.0
+            candidates = set()
+            for band_key in band_keys:
+                candidates.update(self._bands.get(band_key, ()))
+            for key in candidates:
+                entry_words, _, _, expires_at = self._entries[key]
+                if expires_at <= now:
+                    self._remove(key)
+                    continue
+                similarity = jaccard(words, entry_words)
+                if similarity > best_similarity:
+                    best, best_similarity = key, similarity
+            if best is None or best_similarity < self.thresholds[method]:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            return self._entries[best][2], round(best_similarity, 4)
+
+    def set(self, method: str, scope: str, text: str, value: str):
+        """Remember the response generated for this input"""
+        if not self.enabled_for(method):
+            return
+        words, band_keys, key = self._signature(method, scope, text)
+        if words is None:
+            return
+        expires_at = time.time() + self.ttls[method]
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (words, band_keys, value, expires_at)
+            for band_key in band_keys:
+                self._bands.setdefault(band_key, set()).add(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        """Drop an entry and its band postings (caller holds the lock)"""
+        _, band_keys, _, _ = self._entries.pop(key)
+        for band_key in band_keys:
+            members = self._bands.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._bands[band_key]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["thresholds"] = self.thresholds
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
@@ -1,14 +1,66 @@
-import google.generativeai as genai
+import asyncio
 import os
 import json
-from typing import List, Optional, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Optional, Dict, Set, Tuple
 import base64
 from io import BytesIO
 from dotenv import load_dotenv
 
+from services.metrics import (
+    UPSTREAM_LATENCY,
+    UPSTREAM_PROMPT_CHARS,
+    UPSTREAM_RESPONSE_CHARS,
+    UPSTREAM_TOKENS
+)
+from services.fuzzy_cache import FuzzyCache
+from services.generation_config import (
+    GenerationSettings,
+    hashtag_output_tokens,
+    pack_output_tokens,
+    script_output_tokens,
+    script_words
+)
+from services.hedging import Hedger
+from services.model_routing import ModelRouter
+from services.resilience import Resilience, UpstreamUnavailable, is_retryable, is_throttled
+from services.response_cache import ResponseCache, cache_key
+
 # Load environment variables
 load_dotenv()
 
+EDITING_STYLES = ["cinematic", "vintage", "dynamic", "professional"]
+SUGGESTED_TOOLS = ["script_writer", "image_creator", "video_editor", "hashtag_generator"]
+
+# Response schema for generate_pack: the model returns exactly this JSON object
+PACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "script": {"type": "string"},
+        "hashtags": {"type": "array", "items": {"type": "string"}},
+        "editing_style": {"type": "string", "format": "enum", "enum": EDITING_STYLES},
+        "editing_suggestions": {"type": "string"},
+        "suggested_tools": {
+            "type": "array",
+            "items": {"type": "string", "format": "enum", "enum": SUGGESTED_TOOLS}
+        },
+    },
+    "required": ["analysis", "script", "hashtags", "editing_style", "editing_suggestions", "suggested_tools"],
+}
+
+# Methods whose output is constrained to JSON by the model itself
+STRUCTURED_OUTPUT = {
+    "generate_pack": {"response_mime_type": "application/json", "response_schema": PACK_SCHEMA},
+}
+
+# Similarity of the earlier input whose response was reused, for the current request
+approximate_match_var: ContextVar[Optional[float]] = ContextVar("approximate_match", default=None)
+
 class GeminiService:
     def __init__(self):
         # Get API key from environment variable
@@ -16,31 +68,506 @@ class GeminiService:
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
         
+        # The SDK takes most of a second to import, so it is loaded here
+        # (during startup warmup) rather than when the app module loads
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
-        # Try gemini-1.5-pro first, fallback to gemini-pro
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-pro')
-        except Exception:
-            try:
-                self.model = genai.GenerativeModel('gemini-pro')
-            except Exception:
-                # Fallback to any available model
-                self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # Each method has a primary and a fallback model (GEMINI_MODEL_ROUTES);
+        # the fallback takes over on errors or when the primary is too slow
+        self.router = ModelRouter.from_env(genai.GenerativeModel)
         # For image generation, we'll use a different approach since Gemini doesn't directly generate images
         # We'll use Gemini to enhance prompts and suggest image generation strategies
-        
-    def generate_script(
+
+        # The SDK call is blocking, so async callers run it on a dedicated pool.
+        # The semaphore caps concurrent upstream requests; excess callers queue.
+        # The pool has room for a hedge and a fallback call next to every primary call.
+        self.max_concurrency = max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency * 3,
+            thread_name_prefix="gemini"
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._stats = {
+            "in_flight": 0,
+            "queued": 0,
+            "completed": 0,
+            "failed": 0,
+            "queue_wait_total_ms": 0.0,
+            "queue_wait_max_ms": 0.0,
+            "coalesced": 0,
+        }
+        # Upstream calls in flight keyed on model + normalized prompt, so
+        # identical concurrent requests share one call (single-flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Raw responses keyed on model + normalized prompt (None when disabled)
+        self.cache = ResponseCache.from_env()
+        # Opt-in tier reusing responses to near-duplicate user inputs (GEMINI_FUZZY_CACHE_*)
+        self.fuzzy_cache = FuzzyCache.from_env()
+        # Rate limiting, retries and circuit breaking around every upstream call
+        self.resilience = Resilience()
+        # Duplicate requests for calls slower than recent latency (GEMINI_HEDGE_*)
+        self.hedger = Hedger.from_env()
+        # Per-method temperature, output caps and stop sequences, and the
+        # character budgets free-text inputs are cut to
+        self.generation = GenerationSettings.from_env()
+
+    def warm_up(self, call_upstream: bool = False):
+        """Build every routed model ahead of the first request.
+
+        With call_upstream, each model also answers one count_tokens request,
+        which uses no generation quota but sets up the connection and auth.
+        """
+        names = {name for route in self.router.routes.values() for name in route if name}
+        for name in sorted(names):
+            model = self.router.model(name)
+            if call_upstream:
+                model.count_tokens("warmup")
+
+    def close(self):
+        """Release the upstream worker pool"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict:
+        """Return upstream concurrency and queueing metrics"""
+        stats = dict(self._stats)
+        started = stats["completed"] + stats["failed"] + stats["in_flight"]
+        stats["max_concurrency"] = self.max_concurrency
+        stats["queue_wait_avg_ms"] = round(stats["queue_wait_total_ms"] / started, 2) if started else 0.0
+        stats["queue_wait_total_ms"] = round(stats["queue_wait_total_ms"], 2)
+        stats["queue_wait_max_ms"] = round(stats["queue_wait_max_ms"], 2)
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        if self.fuzzy_cache is not None:
+            stats["fuzzy_cache"] = self.fuzzy_cache.get_stats()
+        stats["resilience"] = self.resilience.get_stats()
+        stats["routing"] = self.router.get_stats()
+        stats["hedging"] = self.hedger.get_stats()
+        stats["generation"] = self.generation.get_stats()
+        return stats
+
+    def _generation_config(self, method: str, max_output_tokens: Optional[int] = None) -> Dict:
+        """generation_config for one call: structured output schema plus the method's settings"""
+        return {**STRUCTURED_OUTPUT.get(method, {}), **self.generation.config(method, max_output_tokens)}
+
+    def _call_model(self, model, method: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        """Call the model synchronously and return the response text"""
+        UPSTREAM_PROMPT_CHARS.inc(len(prompt), method=method)
+        model_name = getattr(model, "model_name", "")
+        generation_config = self.generation.for_model(model_name, generation_config)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if generation_config:
+                response = model.generate_content(prompt, generation_config=generation_config)
+            else:
+                response = model.generate_content(prompt)
+            if not response or not response.text:
+                raise Exception("Empty response from Gemini API")
+            outcome = "ok"
+        finally:
+            elapsed = time.perf_counter() - started
+            UPSTREAM_LATENCY.observe(elapsed, method=method, model=model_name, outcome=outcome)
+        self.hedger.observe(method, model_name, elapsed)
+        UPSTREAM_RESPONSE_CHARS.inc(len(response.text), method=method)
+        self._record_usage(method, response)
+        return response.text
+
+    def _record_usage(self, method: str, response):
+        """Count tokens when the response carries usage metadata"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        UPSTREAM_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, method=method, kind="prompt")
+        UPSTREAM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, method=method, kind="response")
+
+    async def _call_routed_async(
+        self,
+        method: str,
+        prompt: str,
+        generation_config: Optional[Dict],
+        started: Set[str],
+        use_fallback: bool = False
+    ) -> str:
+        """Call the method's model once, hedging it or starting the fallback next to it when it is slow.
+
+        A call still running after the method's hedge delay gets a duplicate
+        on the same model (within the hedge budget, and only with a free
+        concurrency slot and rate-limit token); a primary running past the
+        latency budget gets the fallback model under the same condition.
+        The first success wins and the remaining calls are cancelled.
+        Cancelling cannot stop an SDK call already running on a worker
+        thread, so its result is discarded when it arrives.
+
+        started collects the roles ("primary", "hedge", "fallback") started
+        for this request, so the fallback model runs at most once per
+        request. use_fallback calls the fallback model instead of the
+        primary (see _fall_back_async).
+        """
+        loop = asyncio.get_running_loop()
+        model, fallback, budget = self.router.route(method)
+        if use_fallback:
+            model, fallback = fallback, None
+        elif "fallback" in started:
+            fallback = None
+        hedge_at = self.hedger.delay(method, getattr(model, "model_name", ""))
+        fallback_at = budget if fallback is not None and budget else None
+
+        def start(model, role: str, extra_slot: bool = False):
+            def call():
+                try:
+                    return self._call_model(model, method, prompt, generation_config)
+                finally:
+                    # Held until the SDK call really ends, even if it lost and was cancelled
+                    if extra_slot:
+                        loop.call_soon_threadsafe(self._semaphore.release)
+
+            future = loop.run_in_executor(self._executor, call)
+            # Losing calls may fail after the winner returned; retrieve their errors
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            pending[future] = role
+            started.add(role)
+
+        pending: Dict[asyncio.Future, str] = {}
+        start(model, "fallback" if use_fallback else "primary")
+        started_at = loop.time()
+        error = None
+        try:
+            while True:
+                deadlines = [at for at in (hedge_at, fallback_at) if at is not None]
+                timeout = max(0.0, min(deadlines) - (loop.time() - started_at)) if deadlines else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    role = pending.pop(future)
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    if role == "hedge":
+                        self.hedger.record_win(method)
+                    elif role == "fallback":
+                        self.router.record_fallback(method, "won")
+                    return future.result()
+                if not pending:
+                    raise error
+
+                elapsed = loop.time() - started_at
+                if hedge_at is not None and elapsed >= hedge_at:
+                    hedge_at = None
+                    if self.hedger.try_hedge(method):
+                        if await self._reserve_extra_call():
+                            self.hedger.record_sent(method)
+                            start(model, "hedge", extra_slot=True)
+                        else:
+                            self.hedger.refund(method)
+                if fallback_at is not None and elapsed >= fallback_at:
+                    fallback_at = None
+                    if await self._reserve_extra_call():
+                        self.router.record_fallback(method, "latency")
+                        start(fallback, "fallback", extra_slot=True)
+                    else:
+                        self.router.record_fallback(method, "saturated")
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _reserve_extra_call(self) -> bool:
+        """Without waiting, take a concurrency slot and a rate-limit token for an extra upstream call.
+
+        Extra calls (hedges, latency fallbacks) run next to a call that already holds both, so
+        they count against GEMINI_MAX_CONCURRENCY and the quota like any
+        other call. The caller releases the slot when the call ends.
+        """
+        if self._semaphore.locked():
+            return False
+        # Never suspends while a slot is free
+        await self._semaphore.acquire()
+        if await self.resilience.rate_limiter.try_reserve_async():
+            return True
+        self._semaphore.release()
+        return False
+
+    def _upstream_failed(self, error: Exception) -> bool:
+        """Report a failed upstream call to the breaker; return whether to retry it"""
+        if is_retryable(error):
+            self.resilience.breaker.record_failure()
+            return True
+        # Not an upstream health signal (bad request, empty response, ...)
+        self.resilience.breaker.release_trial()
+        return False
+
+    async def _attempt_async(
+        self,
+        method: str,
+        prompt: str,
+        generation_config: Optional[Dict],
+        started: Set[str],
+        use_fallback: bool = False
+    ) -> str:
+        """One routed call behind the circuit breaker, rate limiter and concurrency cap"""
+        self.resilience.breaker.before_call()
+        try:
+            await asyncio.sleep(await self.resilience.rate_limiter.reserve_async())
+            async with self._upstream_slot():
+                text = await self._call_routed_async(method, prompt, generation_config, started, use_fallback)
+        except asyncio.CancelledError:
+            self.resilience.breaker.release_trial()
+            raise
+        except Exception as e:
+            self._upstream_failed(e)
+            raise
+        self.resilience.breaker.record_success()
+        return text
+
+    async def _fall_back_async(
+        self,
+        method: str,
+        prompt: str,
+        generation_config: Optional[Dict],
+        started: Set[str],
+        error: Exception,
+        attempts: int
+    ) -> str:
+        """Last resort once retries of the primary ran out on a retryable error.
+
+        Server errors get one call to the fallback model, unless it already
+        ran for this request. Throttling never falls back: a second model
+        would only add load to a quota that is already exhausted. When
+        nothing is left, the error becomes UpstreamUnavailable (429 or 503
+        with Retry-After).
+        """
+        fallback = self.router.route(method)[1]
+        if fallback is not None and "fallback" not in started and not is_throttled(error):
+            self.router.record_fallback(method, "error")
+            try:
+                return await self._attempt_async(method, prompt, generation_config, started, use_fallback=True)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+        retry_after = max(
+            self.resilience.breaker.retry_after(),
+            self.resilience.retry.max_delay_for(attempts),
+            1.0
+        )
+        raise UpstreamUnavailable(retry_after, throttled=is_throttled(error)) from error
+
+    async def _cache_lookup_async(self, method: str, prompt: str, use_cache: bool):
+        """Return (key, cached text); key is None when the method is not cacheable.
+
+        Memory hits are served inline; disk-tier reads run on a thread.
+        """
+        if self.cache is None or self.cache.ttl_for(method) <= 0:
+            return None, None
+        key = cache_key(self.router.primary_name(method), prompt)
+        return key, await self.cache.get_async(key) if use_cache else None
+
+    def approximate_match(self) -> Optional[float]:
+        """Similarity of the near-duplicate input whose response this request reused, if any"""
+        return approximate_match_var.get()
+
+    def _fuzzy_scope(self, method: str, scope: str) -> str:
+        return f"{self.router.primary_name(method)}\n{scope}"
+
+    def _fuzzy_lookup(self, method: str, fuzzy_input: Optional[Tuple[str, str]], use_cache: bool) -> Optional[str]:
+        """Reuse the response to a similar earlier input; fuzzy_input is (exact-match scope, user text)"""
+        if self.fuzzy_cache is None or fuzzy_input is None or not use_cache:
+            return None
+        scope, user_text = fuzzy_input
+        match = self.fuzzy_cache.get(method, self._fuzzy_scope(method, scope), user_text)
+        if match is None:
+            return None
+        approximate_match_var.set(match[1])
+        return match[0]
+
+    def _fuzzy_store(self, method: str, fuzzy_input: Optional[Tuple[str, str]], text: str):
+        if self.fuzzy_cache is not None and fuzzy_input is not None:
+            scope, user_text = fuzzy_input
+            self.fuzzy_cache.set(method, self._fuzzy_scope(method, scope), user_text, text)
+
+    @asynccontextmanager
+    async def _upstream_slot(self):
+        """Wait for a free upstream slot and account for queueing and outcome"""
+        queued_at = time.perf_counter()
+        self._stats["queued"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._stats["queued"] -= 1
+        try:
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            self._stats["queue_wait_total_ms"] += wait_ms
+            self._stats["queue_wait_max_ms"] = max(self._stats["queue_wait_max_ms"], wait_ms)
+            self._stats["in_flight"] += 1
+            try:
+                yield
+            except BaseException:
+                self._stats["failed"] += 1
+                raise
+            self._stats["completed"] += 1
+        finally:
+            self._stats["in_flight"] -= 1
+            self._semaphore.release()
+
+    async def _generate_async(
+        self,
+        method: str,
+        prompt: str,
+        use_cache: bool = True,
+        generation_config: Optional[Dict] = None,
+        fuzzy_input: Optional[Tuple[str, str]] = None
+    ) -> str:
+        """Generate text for prompt without blocking the event loop, serving repeat prompts from the cache.
+
+        Callers with the same rendered prompt while a call is in flight wait
+        for that call instead of starting their own. Its result (or error) is
+        delivered to every waiter; errors are never cached.
+        """
+        key, text = await self._cache_lookup_async(method, prompt, use_cache)
+        if text is not None:
+            return text
+        text = self._fuzzy_lookup(method, fuzzy_input, use_cache)
+        if text is not None:
+            return text
+
+        flight_key = key or cache_key(self.router.primary_name(method), prompt)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_async(method, prompt, key, generation_config, fuzzy_input))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda done: self._end_flight(flight_key, done))
+        else:
+            self._stats["coalesced"] += 1
+        # Shielded so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _end_flight(self, flight_key: str, task: asyncio.Task):
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        if not task.cancelled():
+            # Mark the error as retrieved even if every waiter went away
+            task.exception()
+
+    async def _fetch_async(
+        self,
+        method: str,
+        prompt: str,
+        key: Optional[str],
+        generation_config: Optional[Dict] = None,
+        fuzzy_input: Optional[Tuple[str, str]] = None
+    ) -> str:
+        """Call upstream, retrying retryable errors with backoff.
+
+        Backoff sleeps happen outside the concurrency slot so retries do not
+        starve other requests. Once retries run out, _fall_back_async
+        decides between one fallback call and UpstreamUnavailable.
+        """
+        retry = self.resilience.retry
+        started: Set[str] = set()
+        attempt = 0
+        while True:
+            try:
+                text = await self._attempt_async(method, prompt, generation_config, started)
+                break
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= retry.max_retries:
+                    text = await self._fall_back_async(method, prompt, generation_config, started, e, attempt)
+                    break
+                await asyncio.sleep(retry.delay(attempt))
+                attempt += 1
+                retry.retries += 1
+        if key is not None:
+            await self.cache.set_async(key, text, self.cache.ttl_for(method))
+        self._fuzzy_store(method, fuzzy_input, text)
+        return text
+
+    async def _stream_async(
+        self,
+        method: str,
+        prompt: str,
+        error_prefix: str,
+        generation_config: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """Yield response text chunks as the model produces them.
+
+        The streaming SDK iterator is consumed on the worker pool and handed
+        over through a queue. Closing this generator (e.g. on client
+        disconnect) stops the worker from reading further chunks.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        # Streams use the primary model only: once chunks reach the client
+        # there is nothing to fall back to
+        model = self.router.route(method)[0]
+        generation_config = self.generation.for_model(getattr(model, "model_name", ""), generation_config)
+
+        def produce():
+            UPSTREAM_PROMPT_CHARS.inc(len(prompt), method=method)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                for chunk in model.generate_content(prompt, stream=True, generation_config=generation_config):
+                    if cancelled.is_set():
+                        outcome = "cancelled"
+                        break
+                    if chunk.text:
+                        UPSTREAM_RESPONSE_CHARS.inc(len(chunk.text), method=method)
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                else:
+                    outcome = "ok"
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                UPSTREAM_LATENCY.observe(
+                    time.perf_counter() - started,
+                    method=method,
+                    model=getattr(model, "model_name", ""),
+                    outcome=outcome
+                )
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        # Streams are not retried: chunks may already have reached the client
+        breaker = self.resilience.breaker
+        breaker.before_call()
+        try:
+            await asyncio.sleep(await self.resilience.rate_limiter.reserve_async())
+            async with self._upstream_slot():
+                loop.run_in_executor(self._executor, produce)
+                received = False
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        self._upstream_failed(item)
+                        raise item
+                    received = True
+                    yield item
+                if not received:
+                    breaker.release_trial()
+                    raise Exception("Empty response from Gemini API")
+            breaker.record_success()
+        except Exception as e:
+            raise Exception(f"{error_prefix}: {str(e)}")
+        finally:
+            breaker.release_trial()
+            cancelled.set()
+
+    def _script_prompt(
         self,
         topic: str,
-        tone: str = "professional",
-        duration: str = "5",
-        keywords: Optional[str] = None
+        tone: str,
+        duration: str,
+        keywords: Optional[str]
     ) -> str:
-        """Generate a video script using Gemini AI"""
-        
         # Calculate approximate word count based on duration (average 150 words per minute)
-        word_count = int(duration) * 150
-        
+        word_count = script_words(duration)
+        topic = self.generation.clip("topic", topic)
+        keywords = self.generation.clip("keywords", keywords)
+
         prompt = f"""Create a {duration}-minute video script about "{topic}".
 
 Requirements:
@@ -58,29 +585,45 @@ Format the script with:
 4. Natural transitions between sections
 
 Write the script in a conversational style that works well for video narration."""
+        return prompt
 
+    async def generate_script_async(
+        self,
+        topic: str,
+        tone: str = "professional",
+        duration: str = "5",
+        keywords: Optional[str] = None,
+        use_cache: bool = True
+    ) -> str:
+        """Generate a video script using Gemini AI"""
+        prompt = self._script_prompt(topic, tone, duration, keywords)
+        config = self._generation_config("generate_script", script_output_tokens(duration))
         try:
-            response = self.model.generate_content(prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            return response.text
+            return await self._generate_async("generate_script", prompt, use_cache, config)
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate script: {str(e)}")
-    
-    def generate_image(
+
+    def stream_script_async(
         self,
-        prompt: str,
-        style: str = "realistic",
-        size: int = 1024
-    ) -> Dict:
-        """Generate image prompt enhancement and suggestions using Gemini"""
-        
+        topic: str,
+        tone: str = "professional",
+        duration: str = "5",
+        keywords: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream a video script chunk by chunk as it is generated"""
+        prompt = self._script_prompt(topic, tone, duration, keywords)
+        config = self._generation_config("generate_script", script_output_tokens(duration))
+        return self._stream_async("generate_script", prompt, "Failed to generate script", config)
+
+    def _image_prompt(self, prompt: str, style: str, size: int) -> str:
         # Since Gemini doesn't directly generate images, we'll:
         # 1. Enhance the prompt using Gemini
         # 2. Return an enhanced prompt that can be used with image generation APIs
         # 3. For now, return a placeholder structure
-        
-        enhancement_prompt = f"""Enhance this image generation prompt to be more detailed and effective:
+        prompt = self.generation.clip("prompt", prompt)
+        return f"""Enhance this image generation prompt to be more detailed and effective:
 
 Original prompt: "{prompt}"
 Style: {style}
@@ -95,38 +638,49 @@ Provide an enhanced, detailed prompt that includes:
 
 Return only the enhanced prompt, nothing else."""
 
+    def _parse_image(self, text: str, prompt: str, style: str, size: int) -> Dict:
+        enhanced_prompt = text.strip()
+
+        # For actual image generation, you would integrate with:
+        # - Stable Diffusion API
+        # - DALL-E API
+        # - Or other image generation services
+
+        # Return structure with enhanced prompt
+        return {
+            "enhanced_prompt": enhanced_prompt,
+            "original_prompt": prompt,
+            "style": style,
+            "size": size,
+            "image_url": None,  # Placeholder - integrate with actual image generation API
+            "image_base64": None,  # Placeholder
+            "note": "Image generation requires integration with an image generation API. Enhanced prompt provided."
+        }
+
+    async def generate_image_async(
+        self,
+        prompt: str,
+        style: str = "realistic",
+        size: int = 1024,
+        use_cache: bool = True
+    ) -> Dict:
+        """Generate image prompt enhancement and suggestions using Gemini"""
         try:
-            response = self.model.generate_content(enhancement_prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            enhanced_prompt = response.text.strip()
-            
-            # For actual image generation, you would integrate with:
-            # - Stable Diffusion API
-            # - DALL-E API
-            # - Or other image generation services
-            
-            # Return structure with enhanced prompt
-            return {
-                "enhanced_prompt": enhanced_prompt,
-                "original_prompt": prompt,
-                "style": style,
-                "size": size,
-                "image_url": None,  # Placeholder - integrate with actual image generation API
-                "image_base64": None,  # Placeholder
-                "note": "Image generation requires integration with an image generation API. Enhanced prompt provided."
-            }
+            text = await self._generate_async(
+                "generate_image",
+                self._image_prompt(prompt, style, size),
+                use_cache,
+                self._generation_config("generate_image")
+            )
+            return self._parse_image(text, prompt, style, size)
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to enhance image prompt: {str(e)}")
-    
-    def generate_hashtags(
-        self,
-        topic: str,
-        platform: str = "general"
-    ) -> List[str]:
-        """Generate relevant hashtags using Gemini AI"""
-        
-        prompt = f"""Generate 20 relevant, trending hashtags for content about: "{topic}"
+
+    def _hashtags_prompt(self, topic: str, platform: str, count: int) -> str:
+        topic = self.generation.clip("topic", topic)
+        return f"""Generate {count} relevant, trending hashtags for content about: "{topic}"
 
 Platform: {platform}
 
@@ -142,29 +696,46 @@ Example format:
 #hashtag2
 #hashtag3"""
 
+    def _parse_hashtags(self, text: str, topic: str, count: int) -> List[str]:
+        hashtags = [
+            tag.strip()
+            for tag in text.split('\n')
+            if tag.strip().startswith('#')
+        ]
+        # If no hashtags found, try to extract from text
+        if not hashtags:
+            # Try to find hashtags without # prefix
+            lines = [line.strip() for line in text.split('\n') if line.strip()]
+            hashtags = [f"#{line.replace('#', '')}" for line in lines[:count] if line]
+        # Limit to the requested number of hashtags
+        return hashtags[:count] if hashtags else [f"#{topic.replace(' ', '')}", f"#{topic.replace(' ', '').lower()}"]
+
+    async def generate_hashtags_async(
+        self,
+        topic: str,
+        platform: str = "general",
+        count: int = 20,
+        use_cache: bool = True
+    ) -> List[str]:
+        """Generate relevant hashtags using Gemini AI"""
+        topic = self.generation.clip("topic", topic)
         try:
-            response = self.model.generate_content(prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            hashtags = [
-                tag.strip() 
-                for tag in response.text.split('\n') 
-                if tag.strip().startswith('#')
-            ]
-            # If no hashtags found, try to extract from text
-            if not hashtags:
-                # Try to find hashtags without # prefix
-                lines = [line.strip() for line in response.text.split('\n') if line.strip()]
-                hashtags = [f"#{line.replace('#', '')}" for line in lines[:20] if line]
-            # Limit to 20 hashtags
-            return hashtags[:20] if hashtags else [f"#{topic.replace(' ', '')}", f"#{topic.replace(' ', '').lower()}"]
+            text = await self._generate_async(
+                "generate_hashtags",
+                self._hashtags_prompt(topic, platform, count),
+                use_cache,
+                self._generation_config("generate_hashtags", hashtag_output_tokens(count)),
+                fuzzy_input=(f"{platform}\n{count}", topic)
+            )
+            return self._parse_hashtags(text, topic, count)
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate hashtags: {str(e)}")
-    
-    def process_prompt(self, prompt: str) -> Dict:
-        """Process a general prompt and provide content suggestions"""
-        
-        analysis_prompt = f"""Analyze this content creation prompt and provide suggestions:
+
+    def _analysis_prompt(self, prompt: str) -> str:
+        prompt = self.generation.clip("prompt", prompt)
+        return f"""Analyze this content creation prompt and provide suggestions:
 
 "{prompt}"
 
@@ -177,22 +748,33 @@ Provide:
 
 Format as a structured analysis."""
 
+    def _parse_analysis(self, text: str) -> Dict:
+        return {
+            "analysis": text,
+            "suggested_tools": self._extract_suggested_tools(text),
+            "recommendations": text
+        }
+
+    async def process_prompt_async(self, prompt: str, use_cache: bool = True) -> Dict:
+        """Process a general prompt and provide content suggestions"""
+        prompt = self.generation.clip("prompt", prompt)
         try:
-            response = self.model.generate_content(analysis_prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            return {
-                "analysis": response.text,
-                "suggested_tools": self._extract_suggested_tools(response.text),
-                "recommendations": response.text
-            }
+            text = await self._generate_async(
+                "process_prompt",
+                self._analysis_prompt(prompt),
+                use_cache,
+                self._generation_config("process_prompt"),
+                fuzzy_input=("", prompt)
+            )
+            return self._parse_analysis(text)
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to process prompt: {str(e)}")
-    
-    def get_video_editing_suggestions(self, prompt: str) -> Dict:
-        """Get AI-powered video editing suggestions"""
-        
-        suggestion_prompt = f"""Based on this video content description, provide editing suggestions:
+
+    def _suggestion_prompt(self, prompt: str) -> str:
+        prompt = self.generation.clip("prompt", prompt)
+        return f"""Based on this video content description, provide editing suggestions:
 
 "{prompt}"
 
@@ -206,18 +788,126 @@ Suggest:
 
 Format as actionable editing recommendations."""
 
+    def parse_video_editing_suggestions(self, text: str) -> Dict:
+        """Build the suggestions payload from raw (or streamed and joined) model text"""
+        return {
+            "suggestions": text,
+            "editing_style": self._extract_editing_style(text),
+            "recommendations": text
+        }
+
+    async def get_video_editing_suggestions_async(self, prompt: str, use_cache: bool = True) -> Dict:
+        """Get AI-powered video editing suggestions"""
         try:
-            response = self.model.generate_content(suggestion_prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            return {
-                "suggestions": response.text,
-                "editing_style": self._extract_editing_style(response.text),
-                "recommendations": response.text
-            }
+            text = await self._generate_async(
+                "get_video_editing_suggestions",
+                self._suggestion_prompt(prompt),
+                use_cache,
+                self._generation_config("get_video_editing_suggestions")
+            )
+            return self.parse_video_editing_suggestions(text)
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             raise Exception(f"Failed to get video suggestions: {str(e)}")
-    
+
+    def stream_video_editing_suggestions_async(self, prompt: str) -> AsyncIterator[str]:
+        """Stream video editing suggestions chunk by chunk as they are generated"""
+        return self._stream_async(
+            "get_video_editing_suggestions",
+            self._suggestion_prompt(prompt),
+            "Failed to get video suggestions",
+            self._generation_config("get_video_editing_suggestions")
+        )
+
+    def _pack_prompt(
+        self,
+        topic: str,
+        tone: str,
+        duration: str,
+        keywords: Optional[str],
+        platform: str
+    ) -> str:
+        word_count = script_words(duration)
+        topic = self.generation.clip("topic", topic)
+        keywords = self.generation.clip("keywords", keywords)
+        return f"""Create a complete content pack for a {duration}-minute video about "{topic}" for {platform}.
+
+Return a JSON object with:
+- analysis: a short analysis of the idea and how to make it perform well
+- script: the full video script (tone: {tone}, about {word_count} words) with a hook,
+  main content in clear sections and a call to action, written for narration
+- hashtags: 15-20 relevant hashtags for {platform}, each starting with #
+- editing_style: the editing style that best fits the video
+- editing_suggestions: concrete suggestions for pacing, transitions, color grading, music and text overlays
+- suggested_tools: the Creator Studio tools that would help produce this video
+
+{f"Key points to include: {keywords}" if keywords else ""}"""
+
+    def _parse_pack(self, text: str) -> Dict:
+        """Validate the JSON content pack and normalize its hashtags"""
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Content pack is not valid JSON: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("Content pack is not a JSON object")
+
+        for field in ("analysis", "script", "editing_suggestions"):
+            if not isinstance(data.get(field), str) or not data[field].strip():
+                raise ValueError(f"Content pack field '{field}' must be a non-empty string")
+        if data.get("editing_style") not in EDITING_STYLES:
+            raise ValueError(f"Content pack editing_style must be one of {', '.join(EDITING_STYLES)}")
+        for field in ("hashtags", "suggested_tools"):
+            if not isinstance(data.get(field), list) or not all(isinstance(value, str) for value in data[field]):
+                raise ValueError(f"Content pack field '{field}' must be a list of strings")
+        unknown_tools = set(data["suggested_tools"]) - set(SUGGESTED_TOOLS)
+        if unknown_tools:
+            raise ValueError(f"Unknown suggested tools: {', '.join(sorted(unknown_tools))}")
+
+        hashtags = []
+        for tag in data["hashtags"]:
+            tag = "#" + tag.strip().lstrip("#").replace(" ", "")
+            if len(tag) > 1 and tag not in hashtags:
+                hashtags.append(tag)
+        return {
+            "analysis": data["analysis"].strip(),
+            "script": data["script"].strip(),
+            "hashtags": hashtags[:20],
+            "editing_style": data["editing_style"],
+            "editing_suggestions": data["editing_suggestions"].strip(),
+            "suggested_tools": list(dict.fromkeys(data["suggested_tools"]))
+        }
+
+    async def generate_pack_async(
+        self,
+        topic: str,
+        tone: str = "professional",
+        duration: str = "5",
+        keywords: Optional[str] = None,
+        platform: str = "general",
+        use_cache: bool = True
+    ) -> Dict:
+        """Generate analysis, script, hashtags and editing suggestions in one structured call.
+
+        Raises ValueError when a pack of this duration cannot fit in one
+        response: a pack cut off at the output limit is invalid JSON.
+        """
+        max_output_tokens = pack_output_tokens(duration)
+        if max_output_tokens > self.generation.output_limit(self.router.primary_name("generate_pack")):
+            raise ValueError(
+                f"A {duration}-minute content pack does not fit in one response; "
+                "generate long scripts with /api/scripts/generate"
+            )
+        prompt = self._pack_prompt(topic, tone, duration, keywords, platform)
+        config = self._generation_config("generate_pack", max_output_tokens)
+        try:
+            return self._parse_pack(await self._generate_async("generate_pack", prompt, use_cache, config))
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to generate content pack: {str(e)}")
+
     def _extract_suggested_tools(self, text: str) -> List[str]:
         """Extract suggested tools from analysis text"""
         tools = []
@@ -0,0 +1,196 @@
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# Spoken words per minute of video, used for script length targets
+WORDS_PER_MINUTE = 150
+
+# Rough tokens per English word; scripts also carry headings and cues, and
+# models overshoot word targets, so the derived cap keeps generous headroom
+TOKENS_PER_WORD = 1.4
+SCRIPT_HEADROOM = 1.5
+SCRIPT_OVERHEAD_TOKENS = 256
+
+# Analysis, hashtags and editing suggestions on top of a pack's script; a pack
+# cut off by the cap is invalid JSON, so this errs on the large side
+PACK_EXTRA_TOKENS = 1536
+
+# A hashtag line is a handful of tokens; the slack absorbs long compound tags
+TOKENS_PER_HASHTAG = 10
+HASHTAG_SLACK_TOKENS = 32
+
+# Base generation settings per GeminiService method. Methods whose length
+# depends on the request (scripts, packs, hashtags) get max_output_tokens
+# derived per call; the others have fixed caps sized to what we display.
+DEFAULT_SETTINGS = {
+    "generate_script": {"temperature": 0.9},
+    "generate_pack": {"temperature": 0.7},
+    "generate_hashtags": {"temperature": 0.7},
+    "generate_image": {"temperature": 0.8, "max_output_tokens": 512},
+    "process_prompt": {"temperature": 0.4, "max_output_tokens": 1024},
+    "get_video_editing_suggestions": {"temperature": 0.6, "max_output_tokens": 1024},
+}
+
+# Most output tokens a model can produce per call; a larger max_output_tokens
+# fails the call, so every config is clamped to its model's limit
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+
+# Characters of each free-text input that reach the prompt; longer input is cut
+DEFAULT_INPUT_BUDGETS = {
+    "topic": 300,
+    "keywords": 500,
+    "prompt": 2000,
+}
+
+SETTING_TYPES = {
+    "temperature": float,
+    "top_p": float,
+    "top_k": int,
+    "max_output_tokens": int,
+    # Escapes let an env file express newlines, e.g. stop_sequences=\n\n|END
+    "stop_sequences": lambda value: [
+        stop.encode("utf-8").decode("unicode_escape") for stop in value.split("|") if stop
+    ],
+}
+
+
+def parse_settings(value: Optional[str]) -> Dict[str, Dict]:
+    """Parse "method.setting=value,..." overrides; stop_sequences take "a|b" """
+    overrides: Dict[str, Dict] = {}
+    for entry in (value or "").split(","):
+        if "=" not in entry or "." not in entry.split("=", 1)[0]:
+            continue
+        name, raw = entry.split("=", 1)
+        method, setting = name.strip().rsplit(".", 1)
+        if setting not in SETTING_TYPES:
+            raise ValueError(f"Unknown generation setting: {setting}")
+        overrides.setdefault(method, {})[setting] = SETTING_TYPES[setting](raw.strip())
+    return overrides
+
+
+def parse_input_budgets(value: Optional[str]) -> Dict[str, int]:
+    """Parse "field=chars,field=chars" overrides on top of the defaults"""
+    budgets = dict(DEFAULT_INPUT_BUDGETS)
+    for entry in (value or "").split(","):
+        if "=" not in entry:
+            continue
+        field, chars = entry.split("=", 1)
+        budgets[field.strip()] = int(chars)
+    return budgets
+
+
+def parse_output_limits(value: Optional[str]) -> Tuple[int, Dict[str, int]]:
+    """Parse "tokens" or "model=tokens,..." into (limit for other models, per-model limits)"""
+    default = DEFAULT_MAX_OUTPUT_TOKENS
+    limits: Dict[str, int] = {}
+    for entry in (value or "").split(","):
+        if not entry.strip():
+            continue
+        if "=" in entry:
+            model, tokens = entry.split("=", 1)
+            limits[model.strip()] = int(tokens)
+        else:
+            default = int(entry)
+    return default, limits
+
+
+def script_words(duration: str) -> int:
+    return int(duration) * WORDS_PER_MINUTE
+
+
+def script_output_tokens(duration: str) -> int:
+    return math.ceil(script_words(duration) * TOKENS_PER_WORD * SCRIPT_HEADROOM) + SCRIPT_OVERHEAD_TOKENS
+
+
+def pack_output_tokens(duration: str) -> int:
+    return script_output_tokens(duration) + PACK_EXTRA_TOKENS
+
+
+def hashtag_output_tokens(count: int) -> int:
+    return count * TOKENS_PER_HASHTAG + HASHTAG_SLACK_TOKENS
+
+
+def truncate(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, at a word boundary when there is one"""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = cut.rfind(" ")
+    return cut[:boundary] if boundary > limit // 2 else cut
+
+
+class GenerationSettings:
+    """Generation config and input budgets for each GeminiService method.
+
+    A call's config is the method's defaults, then the output cap derived
+    from the request (script duration, hashtag count), then operator
+    overrides from GEMINI_GENERATION_CONFIG, so an override always wins.
+    Whatever the source, max_output_tokens is clamped to the limit of the
+    model that serves the call (GEMINI_MAX_OUTPUT_TOKENS).
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Dict[str, Dict]] = None,
+        input_budgets: Optional[Dict[str, int]] = None,
+        output_limits: Optional[Tuple[int, Dict[str, int]]] = None
+    ):
+        self.defaults = {method: dict(settings) for method, settings in DEFAULT_SETTINGS.items()}
+        self.overrides = overrides or {}
+        self.input_budgets = input_budgets if input_budgets is not None else dict(DEFAULT_INPUT_BUDGETS)
+        self.default_output_limit, self.output_limits = output_limits or (DEFAULT_MAX_OUTPUT_TOKENS, {})
+        self._lock = threading.Lock()
+        self._truncated: Dict[str, int] = {}
+        self._clamped: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "GenerationSettings":
+        """Build from GEMINI_GENERATION_CONFIG, GEMINI_INPUT_BUDGETS and GEMINI_MAX_OUTPUT_TOKENS"""
+        return cls(
+            overrides=parse_settings(os.getenv("GEMINI_GENERATION_CONFIG")),
+            input_budgets=parse_input_budgets(os.getenv("GEMINI_INPUT_BUDGETS")),
+            output_limits=parse_output_limits(os.getenv("GEMINI_MAX_OUTPUT_TOKENS"))
+        )
+
+    def config(self, method: str, max_output_tokens: Optional[int] = None) -> Dict:
+        """generation_config settings for one call of method"""
+        config = dict(self.defaults.get(method, {}))
+        if max_output_tokens:
+            config["max_output_tokens"] = max_output_tokens
+        config.update(self.overrides.get(method, {}))
+        return config
+
+    def output_limit(self, model_name: str) -> int:
+        """Most output tokens model_name can produce per call"""
+        # The SDK reports names as "models/<name>"; limits are keyed on the bare name
+        return self.output_limits.get(model_name.rsplit("/", 1)[-1], self.default_output_limit)
+
+    def for_model(self, model_name: str, config: Optional[Dict]) -> Optional[Dict]:
+        """config with max_output_tokens clamped to what model_name can produce"""
+        limit = self.output_limit(model_name)
+        if not config or config.get("max_output_tokens", 0) <= limit:
+            return config
+        with self._lock:
+            self._clamped[model_name] = self._clamped.get(model_name, 0) + 1
+        return {**config, "max_output_tokens": limit}
+
+    def clip(self, field: str, text: Optional[str]) -> Optional[str]:
+        """Cut a free-text input to its budget, counting how often that happens"""
+        limit = self.input_budgets.get(field)
+        if not text or not limit or len(text) <= limit:
+            return text
+        with self._lock:
+            self._truncated[field] = self._truncated.get(field, 0) + 1
+        return truncate(text, limit)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            truncated = dict(self._truncated)
+            clamped = dict(self._clamped)
+        return {
+            "overrides": self.overrides,
+            "input_budgets": self.input_budgets,
+            "truncated": truncated,
+            "output_tokens_clamped": clamped
+        }
@@ -0,0 +1,117 @@
+import bisect
+import math
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from services.metrics import UPSTREAM_HEDGES
+
+# Cheap, short-output methods where a duplicate call costs little
+DEFAULT_HEDGE_METHODS = ("generate_hashtags", "process_prompt", "generate_image")
+
+
+class Hedger:
+    """Decides when a slow upstream call gets a duplicate (hedged) request.
+
+    Successful call latencies are kept per (method, model) over a sliding
+    window. Once enough samples exist, a call still running after the
+    configured percentile of that window is hedged. Every call earns
+    `budget_ratio` of a hedge token and every hedge spends a whole one, so
+    hedging adds at most that fraction of extra upstream load. A hedge
+    that finds no free rate-limit token or concurrency slot is refunded.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        methods: Tuple[str, ...] = DEFAULT_HEDGE_METHODS,
+        percentile: float = 95,
+        window: int = 500,
+        min_samples: int = 20,
+        budget_ratio: float = 0.05,
+        max_tokens: float = 10
+    ):
+        self.enabled = enabled
+        self.methods = set(methods)
+        self.percentile = percentile
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        # (method, model) -> (arrival order, sorted samples)
+        self._samples: Dict[Tuple[str, str], Tuple[deque, list]] = {}
+        self._tokens = 0.0
+        self._stats = {"calls": 0, "hedged": 0, "won": 0, "denied": 0, "saturated": 0}
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        """Build from GEMINI_HEDGE_* settings (hedging is off unless GEMINI_HEDGE_ENABLED)"""
+        methods = os.getenv("GEMINI_HEDGE_METHODS")
+        return cls(
+            enabled=os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            methods=tuple(m.strip() for m in methods.split(",") if m.strip()) if methods else DEFAULT_HEDGE_METHODS,
+            percentile=float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95")),
+            window=int(os.getenv("GEMINI_HEDGE_WINDOW", "500")),
+            min_samples=int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20")),
+            budget_ratio=float(os.getenv("GEMINI_HEDGE_BUDGET", "0.05"))
+        )
+
+    def observe(self, method: str, model: str, seconds: float):
+        """Record the latency of a successful call"""
+        with self._lock:
+            order, ordered = self._samples.setdefault((method, model), (deque(), []))
+            order.append(seconds)
+            bisect.insort(ordered, seconds)
+            if len(order) > self.window:
+                del ordered[bisect.bisect_left(ordered, order.popleft())]
+
+    def delay(self, method: str, model: str) -> Optional[float]:
+        """Seconds after which a call should be hedged, or None to never hedge it"""
+        if not self.enabled or method not in self.methods:
+            return None
+        with self._lock:
+            self._stats["calls"] += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+            _, ordered = self._samples.get((method, model), (None, []))
+            if len(ordered) < self.min_samples:
+                return None
+            rank = max(1, math.ceil(self.percentile / 100.0 * len(ordered)))
+            return ordered[min(rank, len(ordered)) - 1]
+
+    def try_hedge(self, method: str) -> bool:
+        """Spend a hedge token; False when hedging would exceed the load budget"""
+        with self._lock:
+            if self._tokens < 1:
+                self._stats["denied"] += 1
+                UPSTREAM_HEDGES.inc(method=method, outcome="denied")
+                return False
+            self._tokens -= 1
+        return True
+
+    def record_sent(self, method: str):
+        """Count a hedge that was actually started"""
+        with self._lock:
+            self._stats["hedged"] += 1
+        UPSTREAM_HEDGES.inc(method=method, outcome="sent")
+
+    def refund(self, method: str):
+        """Return the token of a hedge skipped because upstream capacity was exhausted"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + 1)
+            self._stats["saturated"] += 1
+        UPSTREAM_HEDGES.inc(method=method, outcome="saturated")
+
+    def record_win(self, method: str):
+        """Count a hedge that answered before the original call"""
+        with self._lock:
+            self._stats["won"] += 1
+        UPSTREAM_HEDGES.inc(method=method, outcome="won")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["extra_load"] = round(stats["hedged"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
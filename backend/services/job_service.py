@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from services.batch_service import BatchService
+from services.content_service import ContentFilter, ContentService
+from services.gemini_service import GeminiService
+from services.shared_state import FileLock, WorkerLease
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Seconds between repeated status events while a watched job is unchanged
+WATCH_HEARTBEAT = 15
+
+# Seconds between store reads while watching a job another worker runs
+WATCH_POLL_INTERVAL = 0.5
+
+# Seconds between sweeps for finished jobs past JOB_RETENTION_HOURS
+PRUNE_INTERVAL = 600
+
+
+class JobService:
+    """Background generation jobs with submit/poll semantics.
+
+    Jobs run the same generation types as BatchService on a pool of worker
+    tasks. Job state lives in a dedicated "jobs" store of the configured
+    content backend, so queued and interrupted jobs are picked up again
+    after a restart. Finished scripts and images are saved to the gallery
+    through ContentService.save_content.
+
+    With several worker processes on a shared store, a job belongs to the
+    worker that accepted it. On startup a worker adopts only the unfinished
+    jobs whose owner is no longer running, so no job runs twice.
+
+    Finished jobs are deleted once they are older than JOB_RETENTION_HOURS
+    (0 keeps them forever), so the store and the startup scan stay bounded.
+    """
+
+    def __init__(
+        self,
+        gemini_service: GeminiService,
+        content_service: ContentService,
+        workers: Optional[int] = None
+    ):
+        self.content_service = content_service
+        self.batch = BatchService(gemini_service, content_service)
+        self.store = content_service.open_store("jobs")
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.retention = float(os.getenv("JOB_RETENTION_HOURS", "24")) * 3600
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._events: Dict[str, asyncio.Event] = {}
+        data_dir = os.path.dirname(content_service.storage_file)
+        self.lease = WorkerLease(os.path.join(data_dir, "workers"))
+        self._recovery_lock = FileLock(os.path.join(data_dir, "jobs.recovery.lock"))
+
+    def start(self):
+        """Start the worker pool and the maintenance task (call from the event loop)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def _maintain(self):
+        """Prune old jobs and requeue orphaned ones, then keep pruning every PRUNE_INTERVAL"""
+        await asyncio.to_thread(self.prune)
+        for job_id in await asyncio.to_thread(self._adopt_orphans):
+            self._queue.put_nowait(job_id)
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL)
+            await asyncio.to_thread(self.prune)
+
+    def _adopt_orphans(self) -> List[str]:
+        """Take over unfinished jobs whose owner is gone and return their ids"""
+        adopted = []
+        # One worker at a time, so an orphan is adopted by exactly one of them
+        with self._recovery_lock:
+            for record in self.store.list():
+                job = self._from_record(record)
+                if job["status"] in TERMINAL_STATUSES or self.lease.is_alive(job["owner"]):
+                    continue
+                # Jobs that were running when their worker died start over
+                job["status"] = "queued"
+                job["owner"] = self.lease.worker_id
+                self._write(job)
+                adopted.append(job["id"])
+        return adopted
+
+    def prune(self) -> int:
+        """Delete finished jobs created more than JOB_RETENTION_HOURS ago and return how many"""
+        if self.retention <= 0:
+            return 0
+        cutoff = (datetime.now() - timedelta(seconds=self.retention)).isoformat()
+        return sum(
+            len(self.store.delete_where(ContentFilter(created_before=cutoff, metadata={"status": status})))
+            for status in TERMINAL_STATUSES
+        )
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs stay queued in the store"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+        self.lease.release()
+
+    async def submit(self, job_type: str, params: Dict) -> Dict:
+        """Persist a new job, queue it and return its state"""
+        now = datetime.now().isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "status": "queued",
+            "params": params,
+            "result": None,
+            "error": None,
+            "content_id": None,
+            "owner": self.lease.worker_id,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self._save(job)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get a job's current state"""
+        record = self.store.get(job_id)
+        return self._from_record(record) if record else None
+
+    async def get_job_async(self, job_id: str) -> Optional[Dict]:
+        """get_job on a worker thread, since a shared store answers with a SQLite query"""
+        return await asyncio.to_thread(self.get_job, job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict]:
+        """Yield the job's state now, on every change and as a heartbeat, until it finishes"""
+        sent_at, sent_update = 0.0, None
+        while True:
+            # Register before reading so a change in between is not missed
+            event = self._events.setdefault(job_id, asyncio.Event())
+            job = await self.get_job_async(job_id)
+            if job is None:
+                return
+            now = time.monotonic()
+            if job["updated_at"] != sent_update or now - sent_at >= WATCH_HEARTBEAT:
+                yield job
+                sent_at, sent_update = now, job["updated_at"]
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            if job["owner"] != self.lease.worker_id:
+                # Another worker's saves cannot wake us, so poll the store
+                self._events.pop(job_id, None)
+                await asyncio.sleep(WATCH_POLL_INTERVAL)
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), timeout=WATCH_HEARTBEAT)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await self.get_job_async(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return
+        job["status"] = "running"
+        await self._save(job)
+
+        try:
+            result, entry = await self.batch.run_job({"type": job["type"], **job["params"]})
+            if entry is not None:
+                job["content_id"] = await self.content_service.save_content_async(**entry)
+            job["result"] = result
+            job["status"] = "succeeded"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "failed"
+        await self._save(job)
+
+    def _write(self, job: Dict):
+        job["updated_at"] = datetime.now().isoformat()
+        self.store.put(self._to_record(job))
+
+    async def _save(self, job: Dict):
+        """Persist on a worker thread (the store waits for its commit), then wake watchers"""
+        await asyncio.to_thread(self._write, job)
+        event = self._events.pop(job["id"], None)
+        if event is not None:
+            event.set()
+
+    def _to_record(self, job: Dict) -> Dict:
+        """Map job state onto the item shape the content stores persist"""
+        return {
+            "id": job["id"],
+            "type": job["type"],
+            "title": job["type"],
+            "content": json.dumps(job["result"]) if job["result"] is not None else "",
+            "created_at": job["created_at"],
+            "metadata": {
+                "status": job["status"],
+                "params": job["params"],
+                "error": job["error"],
+                "content_id": job["content_id"],
+                "owner": job["owner"],
+                "updated_at": job["updated_at"]
+            }
+        }
+
+    def _from_record(self, record: Dict) -> Dict:
+        metadata = record.get("metadata") or {}
+        return {
+            "id": record["id"],
+            "type": record["type"],
+            "status": metadata.get("status", "queued"),
+            "params": metadata.get("params") or {},
+            "result": json.loads(record["content"]) if record.get("content") else None,
+            "error": metadata.get("error"),
+            "content_id": metadata.get("content_id"),
+            "owner": metadata.get("owner"),
+            "created_at": record["created_at"],
+            "updated_at": metadata.get("updated_at")
+        }
@@ -0,0 +1,186 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds, from cache hits up to long script generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Copy a running total kept elsewhere; it must only grow, as with inc()"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            position = bisect.bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        lines = []
+        inf = 'le="+Inf"'
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, inf)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP layer (recorded by the middleware in main.py)
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to response headers by route", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"))
+
+# Upstream Gemini calls
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "gemini_upstream_duration_seconds", "generate_content latency by GeminiService method and model", ("method", "model", "outcome")))
+UPSTREAM_PROMPT_CHARS = REGISTRY.register(Counter(
+    "gemini_prompt_characters_total", "Characters sent upstream by GeminiService method", ("method",)))
+UPSTREAM_RESPONSE_CHARS = REGISTRY.register(Counter(
+    "gemini_response_characters_total", "Characters received from upstream by GeminiService method", ("method",)))
+UPSTREAM_TOKENS = REGISTRY.register(Counter(
+    "gemini_tokens_total", "Tokens reported by upstream usage metadata", ("method", "kind")))
+UPSTREAM_FALLBACKS = REGISTRY.register(Counter(
+    "gemini_fallbacks_total", "Fallback model calls by method and reason (error, latency, won, saturated)", ("method", "reason")))
+UPSTREAM_HEDGES = REGISTRY.register(Counter(
+    "gemini_hedges_total", "Hedged duplicate calls by method and outcome (sent, won, denied, saturated)", ("method", "outcome")))
+UPSTREAM_STATE = REGISTRY.register(Gauge(
+    "gemini_upstream_state", "GeminiService concurrency and queue state, sampled at scrape time", ("state",)))
+CACHE_EVENTS = REGISTRY.register(Counter(
+    "gemini_cache_events_total", "Response cache events since start by cache and event, sampled at scrape time", ("cache", "event")))
+CACHE_ENTRIES = REGISTRY.register(Gauge(
+    "gemini_cache_entries", "Entries held in memory by each response cache, sampled at scrape time", ("cache",)))
+
+# Content storage
+CONTENT_STORE_LATENCY = REGISTRY.register(Histogram(
+    "content_store_duration_seconds", "ContentService operation latency", ("operation", "backend")))
+
+# Background jobs
+JOB_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "jobs_queued", "Jobs waiting for a worker, sampled at scrape time"))
+
+# Process lifecycle (set once by the startup warmup in main.py)
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "startup_phase_seconds", "Duration of each startup phase; phase=ready is the total until /ready passes", ("phase",)))
+FIRST_REQUEST_SECONDS = REGISTRY.register(Gauge(
+    "first_request_seconds", "Latency of the first non-probe request after start"))
@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from services.metrics import UPSTREAM_FALLBACKS
+
+# Primary and fallback model per GeminiService method. Short, structured
+# outputs go to the flash tier; long-form writing stays on pro.
+DEFAULT_ROUTES = {
+    "generate_script": ("gemini-1.5-pro", "gemini-1.5-flash"),
+    "generate_pack": ("gemini-1.5-pro", "gemini-1.5-flash"),
+    "get_video_editing_suggestions": ("gemini-1.5-pro", "gemini-1.5-flash"),
+    "process_prompt": ("gemini-1.5-flash", "gemini-1.5-pro"),
+    "generate_hashtags": ("gemini-1.5-flash", "gemini-1.5-pro"),
+    "generate_image": ("gemini-1.5-flash", "gemini-1.5-pro"),
+}
+
+# Seconds the primary may run before the fallback is started alongside it; 0 waits indefinitely.
+# Scripts and packs scale with the requested duration, so a long one is not
+# slow, and a second full generation on another model would double its cost.
+DEFAULT_LATENCY_BUDGETS = {
+    "generate_script": 0,
+    "generate_pack": 0,
+    "get_video_editing_suggestions": 20,
+    "process_prompt": 10,
+    "generate_hashtags": 8,
+    "generate_image": 10,
+}
+
+DEFAULT_MODEL = "gemini-1.5-pro"
+
+
+def parse_routes(value: Optional[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+    """Parse "method=primary|fallback,method=primary" overrides on top of the defaults"""
+    routes = dict(DEFAULT_ROUTES)
+    for entry in (value or "").split(","):
+        if "=" not in entry:
+            continue
+        method, models = entry.split("=", 1)
+        primary, _, fallback = models.partition("|")
+        routes[method.strip()] = (primary.strip(), fallback.strip() or None)
+    return routes
+
+
+def parse_budgets(value: Optional[str]) -> Dict[str, float]:
+    """Parse "method=seconds,method=seconds" overrides on top of the defaults"""
+    budgets = {method: float(seconds) for method, seconds in DEFAULT_LATENCY_BUDGETS.items()}
+    for entry in (value or "").split(","):
+        if "=" not in entry:
+            continue
+        method, seconds = entry.split("=", 1)
+        budgets[method.strip()] = float(seconds)
+    return budgets
+
+
+class ModelRouter:
+    """Routing table from GeminiService methods to a primary and fallback model.
+
+    Model objects are created on first use by model_factory (building a
+    GenerativeModel makes no API call) and shared between routes naming the
+    same model. GeminiService falls back once per request, when retries of
+    the primary run out on a server error or the primary runs past the
+    method's latency budget, and reports each fallback here.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[str], object],
+        routes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+        budgets: Optional[Dict[str, float]] = None
+    ):
+        self.model_factory = model_factory
+        self.routes = routes if routes is not None else dict(DEFAULT_ROUTES)
+        self.budgets = budgets if budgets is not None else parse_budgets(None)
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._fallbacks: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls, model_factory: Callable[[str], object]) -> "ModelRouter":
+        """Build the router from GEMINI_MODEL_ROUTES and GEMINI_LATENCY_BUDGETS"""
+        return cls(
+            model_factory,
+            routes=parse_routes(os.getenv("GEMINI_MODEL_ROUTES")),
+            budgets=parse_budgets(os.getenv("GEMINI_LATENCY_BUDGETS"))
+        )
+
+    def model(self, name: str):
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def primary_name(self, method: str) -> str:
+        return self.routes.get(method, (DEFAULT_MODEL, None))[0]
+
+    def route(self, method: str) -> Tuple[object, Optional[object], float]:
+        """Return (primary model, fallback model or None, latency budget in seconds)"""
+        primary, fallback = self.routes.get(method, (DEFAULT_MODEL, None))
+        return (
+            self.model(primary),
+            self.model(fallback) if fallback and fallback != primary else None,
+            self.budgets.get(method, 0.0)
+        )
+
+    def record_fallback(self, method: str, reason: str):
+        """Count a fallback by reason.
+
+        reason is "error", "latency", "won" (the fallback answered first) or
+        "saturated" (a latency fallback skipped for lack of upstream capacity).
+        """
+        with self._lock:
+            counts = self._fallbacks.setdefault(method, {"error": 0, "latency": 0, "won": 0, "saturated": 0})
+            counts[reason] += 1
+        UPSTREAM_FALLBACKS.inc(method=method, reason=reason)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            fallbacks = {method: dict(counts) for method, counts in self._fallbacks.items()}
+        return {
+            "routes": {
+                method: {"primary": primary, "fallback": fallback, "latency_budget_s": self.budgets.get(method, 0.0)}
+                for method, (primary, fallback) in self.routes.items()
+            },
+            "fallbacks": fallbacks
+        }
@@ -0,0 +1,293 @@
+import asyncio
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict
+
+from services.shared_state import multi_process, shared_path
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error signals throttling or an unhealthy upstream and is worth retrying.
+
+    Anything else (bad request, auth, safety blocks) fails immediately.
+    """
+    # Imported on first use so loading this module does not pull in the Google SDK
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(error, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServerError,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+        TimeoutError,
+    ))
+
+
+def is_throttled(error: Exception) -> bool:
+    """Whether an error is upstream refusing calls over quota (429 / ResourceExhausted)"""
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(error, google_exceptions.TooManyRequests)
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when upstream cannot serve a call right now.
+
+    Either the circuit breaker is open (upstream is not called at all) or
+    retries on a retryable error ran out. status_code is 429 when upstream
+    was throttling and 503 otherwise.
+    """
+
+    def __init__(self, retry_after: float, throttled: bool = False):
+        reason = "rate limit reached" if throttled else "temporarily unavailable"
+        super().__init__(f"Gemini API {reason}, retry after {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+        self.status_code = 429 if throttled else 503
+
+
+class TokenBucket:
+    """Client-side rate limiter sized to the upstream quota.
+
+    Callers reserve a token and are told how long to wait for it, so the
+    same bucket serves threads (time.sleep) and coroutines (asyncio.sleep).
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def reserve(self) -> float:
+        """Take one token and return the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            self.throttled += 1
+            return -self._tokens / self.rate
+
+    async def reserve_async(self) -> float:
+        """reserve() for coroutines; the in-memory bucket never blocks"""
+        return self.reserve()
+
+    def try_reserve(self) -> bool:
+        """Take one token only if it is available right now"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    async def try_reserve_async(self) -> bool:
+        return self.try_reserve()
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket kept in a SQLite file, so all worker processes draw from one quota.
+
+    Each reservation is a short write transaction on the bucket's row, timed
+    with the wall clock so every process agrees on the refill.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, path: str, name: str = "gemini"):
+        super().__init__(rate_per_minute, burst)
+        self.path = path
+        self.name = name
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, float(self.capacity), time.time())
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self) -> float:
+        """Take one token from the shared bucket and return the seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate) - 1
+            conn.execute(
+                "UPDATE token_buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name)
+            )
+        if tokens >= 0:
+            return 0.0
+        with self._lock:
+            self.throttled += 1
+        return -tokens / self.rate
+
+    async def reserve_async(self) -> float:
+        """reserve() on a worker thread, since the transaction may wait on other processes"""
+        if self.rate <= 0:
+            return 0.0
+        return await asyncio.to_thread(self.reserve)
+
+    def try_reserve(self) -> bool:
+        """Take one token from the shared bucket only if it is available right now"""
+        if self.rate <= 0:
+            return True
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            if tokens < 1:
+                return False
+            conn.execute(
+                "UPDATE token_buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens - 1, now, self.name)
+            )
+        return True
+
+    async def try_reserve_async(self) -> bool:
+        if self.rate <= 0:
+            return True
+        return await asyncio.to_thread(self.try_reserve)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures.
+
+    After `failure_threshold` consecutive retryable failures the breaker
+    opens and rejects calls for `reset_timeout` seconds. It then lets a
+    single trial call through (half-open): success closes it, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise UpstreamUnavailable unless a call may go upstream now"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            now = time.monotonic()
+            if self.state == "open" and now - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            remaining = self._opened_at + self.reset_timeout - now
+            raise UpstreamUnavailable(max(1.0, remaining))
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through (0 when closed)"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def release_trial(self):
+        """End a trial call whose outcome says nothing about upstream health"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for retryable upstream errors"""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def max_delay_for(self, attempt: int) -> float:
+        """Longest backoff before retry number `attempt` (0-based)"""
+        return min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        return random.uniform(0, self.max_delay_for(attempt))
+
+
+class Resilience:
+    """Rate limiter, retry policy and circuit breaker configured from GEMINI_* settings.
+
+    With several worker processes the rate limit is shared through SQLite so
+    the quota holds for the whole deployment; the breaker stays per process.
+    """
+
+    def __init__(self):
+        rate_per_minute = float(os.getenv("GEMINI_RATE_LIMIT_RPM", "0"))
+        burst = int(os.getenv("GEMINI_RATE_LIMIT_BURST", "10"))
+        if multi_process():
+            self.rate_limiter = SharedTokenBucket(rate_per_minute, burst, shared_path("shared_state.db"))
+        else:
+            self.rate_limiter = TokenBucket(rate_per_minute, burst)
+        self.retry = RetryPolicy(
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+            base_delay=float(os.getenv("GEMINI_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("GEMINI_RETRY_MAX_DELAY", "8"))
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_TIMEOUT", "30"))
+        )
+
+    def get_stats(self) -> Dict:
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_rejected": self.breaker.rejected,
+            "retries": self.retry.retries,
+            "rate_limited": self.rate_limiter.throttled
+        }
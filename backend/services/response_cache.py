@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from services.shared_state import multi_process, shared_path
+
+# Default time-to-live in seconds per GeminiService method; 0 disables caching
+DEFAULT_TTLS = {
+    "generate_script": 0,
+    "generate_pack": 0,
+    "generate_image": 3600,
+    "generate_hashtags": 6 * 3600,
+    "process_prompt": 3600,
+    "get_video_editing_suggestions": 3600,
+}
+
+
+def parse_ttls(value: Optional[str]) -> Dict[str, int]:
+    """Parse "method=seconds,method=seconds" overrides on top of the defaults"""
+    ttls = dict(DEFAULT_TTLS)
+    for entry in (value or "").split(","):
+        if "=" not in entry:
+            continue
+        method, seconds = entry.split("=", 1)
+        ttls[method.strip()] = int(seconds)
+    return ttls
+
+
+# Expired disk entries are purged on a store at most this often
+DISK_PURGE_INTERVAL = 60.0
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace and case so trivially different renderings share a key"""
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache for raw model responses.
+
+    The memory tier is an LRU bounded by entry count. The optional disk tier
+    is a SQLite file that survives restarts; memory misses fall through to
+    it and disk hits are promoted back into memory. Entries expire after the
+    TTL configured for the method that produced them.
+
+    get_async/set_async serve the memory tier inline and run disk I/O on a
+    worker thread, so coroutines never wait on SQLite locks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttls: Optional[Dict[str, int]] = None,
+        disk_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttls = ttls if ttls is not None else dict(DEFAULT_TTLS)
+        self.disk_path = disk_path
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._local = threading.local()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._next_purge = 0.0
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            with self._disk() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses (expires_at)")
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Build the cache from GEMINI_CACHE_* settings, or None when disabled.
+
+        With several worker processes the disk tier defaults to on, so a
+        response cached by one worker is a hit for all of them.
+        """
+        if os.getenv("GEMINI_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+            return None
+        disk_path = os.getenv("GEMINI_CACHE_DISK_PATH") or None
+        if disk_path is None and multi_process():
+            disk_path = shared_path("gemini_cache.db")
+        return cls(
+            max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "1000")),
+            ttls=parse_ttls(os.getenv("GEMINI_CACHE_TTLS")),
+            disk_path=disk_path
+        )
+
+    def _disk(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def ttl_for(self, method: str) -> int:
+        return self.ttls.get(method, 0)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        value = self._memory_get(key)
+        return value if value is not None else self._disk_get(key)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """Async variant of get; only a memory miss with a disk tier goes to a thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        if self.disk_path:
+            return await asyncio.to_thread(self._disk_get, key)
+        return self._disk_get(key)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        """Look key up in the memory tier, counting only hits"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        """Look key up in the disk tier (if any) after a memory miss"""
+        if self.disk_path:
+            row = self._disk().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            if row is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, row[0], row[1])
+                return row[0]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str, ttl: int):
+        """Store a response for ttl seconds"""
+        expires_at = self._memory_set(key, value, ttl)
+        if expires_at is not None and self.disk_path:
+            self._disk_set(key, value, expires_at)
+
+    async def set_async(self, key: str, value: str, ttl: int):
+        """Async variant of set; the disk write runs on a thread"""
+        expires_at = self._memory_set(key, value, ttl)
+        if expires_at is not None and self.disk_path:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    def _memory_set(self, key: str, value: str, ttl: int) -> Optional[float]:
+        """Store in the memory tier and return the expiry, or None when ttl disables caching"""
+        if ttl <= 0:
+            return None
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._stats["stores"] += 1
+            self._remember(key, value, expires_at)
+        return expires_at
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        now = time.time()
+        with self._disk() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            if now >= self._next_purge:
+                self._next_purge = now + DISK_PURGE_INTERVAL
+                conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        """Insert into the memory tier, evicting least recently used entries (caller holds the lock)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["max_entries"] = self.max_entries
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,210 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Title tokens count this many times towards term frequency
+TITLE_WEIGHT = 2
+
+# Query tokens shorter than this match whole terms only; longer ones also
+# match every term they prefix
+MIN_PREFIX_LENGTH = 3
+
+# Upper bound on vocabulary terms a single query token may expand to; a
+# broader prefix is rejected rather than silently matched against a subset
+MAX_PREFIX_EXPANSIONS = 500
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of text"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class QueryTooBroad(ValueError):
+    """Raised when a query token prefixes more terms than MAX_PREFIX_EXPANSIONS"""
+
+    def __init__(self, token: str):
+        super().__init__(f"Search term '{token}' matches too many words; type more of it")
+        self.token = token
+
+
+class SearchIndex:
+    """Incremental in-memory inverted index with prefix matching and BM25 ranking.
+
+    Postings map each term to {content_id: term frequency}. A sorted copy of
+    the vocabulary lets a query token of MIN_PREFIX_LENGTH or more characters
+    match every term it prefixes; a token prefixing more than
+    MAX_PREFIX_EXPANSIONS terms raises QueryTooBroad. Every
+    query token must match a document (AND semantics); documents are ranked
+    by summed BM25, taking the best-scoring expansion of each token.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._doc_types: Dict[str, str] = {}
+        self._total_length = 0
+        self.built = False
+
+    def build(self, items: Callable[[], Iterable[Dict]]):
+        """Index every item returned by the loader once, on first use"""
+        with self._lock:
+            if self.built:
+                return
+            for item in items():
+                self._add(item)
+            self.built = True
+
+    def reset(self):
+        """Forget every document; the next build() loads them again"""
+        with self._lock:
+            self._postings = {}
+            self._vocabulary = []
+            self._doc_terms = {}
+            self._doc_lengths = {}
+            self._doc_types = {}
+            self._total_length = 0
+            self.built = False
+
+    def add(self, item: Dict):
+        """Index (or re-index) one content item"""
+        with self._lock:
+            if self.built:
+                self._add(item)
+
+    def remove(self, content_id: str):
+        """Drop one content item from the index"""
+        with self._lock:
+            if self.built:
+                self._remove(content_id)
+
+    def _add(self, item: Dict):
+        content_id = item["id"]
+        if content_id in self._doc_terms:
+            self._remove(content_id)
+
+        terms = Counter(tokenize(item.get("content", "")))
+        for token in tokenize(item.get("title", "")):
+            terms[token] += TITLE_WEIGHT
+
+        postings_by_term = self._postings
+        for term, frequency in terms.items():
+            postings = postings_by_term.get(term)
+            if postings is None:
+                postings = postings_by_term[term] = {}
+                bisect.insort(self._vocabulary, term)
+            postings[content_id] = frequency
+
+        length = sum(terms.values())
+        self._doc_terms[content_id] = terms
+        self._doc_lengths[content_id] = length
+        self._doc_types[content_id] = item.get("type", "")
+        self._total_length += length
+
+    def _remove(self, content_id: str):
+        terms = self._doc_terms.pop(content_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[content_id]
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._vocabulary, term)
+                del self._vocabulary[position]
+        self._total_length -= self._doc_lengths.pop(content_id)
+        del self._doc_types[content_id]
+
+    def _expand(self, token: str) -> List[str]:
+        """Vocabulary terms that start with token (just token itself when it is short)"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self._postings else []
+        start = bisect.bisect_left(self._vocabulary, token)
+        # One past the cap tells a complete expansion from a truncated one
+        matches = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            raise QueryTooBroad(token)
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = 20,
+        offset: int = 0,
+        content_type: Optional[str] = None
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """Return ([(content_id, score)] for the requested page, total matches).
+
+        A limit of None returns every match from offset on.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return [], 0
+            avg_length = self._total_length / doc_count
+
+            # Intersect starting from the most selective token so later tokens
+            # only score the surviving candidates
+            expansions = sorted(
+                (self._expand(token) for token in tokens),
+                key=lambda terms: sum(len(self._postings[term]) for term in terms)
+            )
+
+            scores: Optional[Dict[str, float]] = None
+            for terms in expansions:
+                token_scores: Dict[str, float] = {}
+                for term in terms:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is None:
+                        matches = postings.items()
+                    elif len(scores) < len(postings):
+                        matches = [(content_id, postings[content_id]) for content_id in scores if content_id in postings]
+                    else:
+                        matches = [(content_id, frequency) for content_id, frequency in postings.items() if content_id in scores]
+                    for content_id, frequency in matches:
+                        norm = K1 * (1 - B + B * self._doc_lengths[content_id] / avg_length)
+                        score = idf * frequency * (K1 + 1) / (frequency + norm)
+                        if score > token_scores.get(content_id, 0.0):
+                            token_scores[content_id] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        content_id: scores[content_id] + score
+                        for content_id, score in token_scores.items()
+                    }
+                if not scores:
+                    return [], 0
+
+            if content_type:
+                scores = {
+                    content_id: score for content_id, score in scores.items()
+                    if self._doc_types.get(content_id) == content_type
+                }
+
+        if limit is None:
+            ranked = sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
+        else:
+            ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda entry: entry[1])
+        return ranked[offset:], len(scores)
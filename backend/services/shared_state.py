@@ -0,0 +1,144 @@
+import os
+import socket
+import sys
+import uuid
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): run a single worker there
+    fcntl = None
+
+# Default home of the files worker processes share (stores, caches, locks)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def workers_from_argv(argv: List[str]) -> Optional[int]:
+    """The worker count given to uvicorn (--workers) or gunicorn (--workers, -w) on its command line.
+
+    uvicorn's spawned workers and gunicorn's forked ones see the server's
+    own argv, so each worker can tell how many peers it has.
+    """
+    # argv[0] is the console script, or .../uvicorn/__main__.py under python -m
+    program = argv[0] if argv else ""
+    if "uvicorn" in program:
+        options = ("--workers",)
+    elif "gunicorn" in program:
+        options = ("--workers", "-w")
+    else:
+        return None
+    for position, arg in enumerate(argv[1:], start=1):
+        for option in options:
+            if arg == option and position + 1 < len(argv):
+                value = argv[position + 1]
+            elif arg.startswith(option + "="):
+                value = arg[len(option) + 1:]
+            elif option == "-w" and arg.startswith("-w") and len(arg) > 2:
+                value = arg[2:]
+            else:
+                continue
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def worker_count() -> int:
+    """Server processes sharing the data directory.
+
+    WEB_CONCURRENCY (read by uvicorn and gunicorn) when set, otherwise the
+    worker count on the server's command line.
+    """
+    value = os.getenv("WEB_CONCURRENCY")
+    if value:
+        return max(1, int(value))
+    return max(1, workers_from_argv(sys.argv) or 1)
+
+
+def multi_process() -> bool:
+    return worker_count() > 1
+
+
+def shared_path(name: str) -> str:
+    """Path of a file shared between workers, under SHARED_STATE_DIR (default: data/)"""
+    return os.path.join(os.getenv("SHARED_STATE_DIR") or DATA_DIR, name)
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, held across processes and threads.
+
+    Uses flock, so the lock is dropped by the OS when the holder exits or
+    crashes. Without flock support acquiring always succeeds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False return False instead of waiting"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                lock_file.close()
+                return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            # Closing the descriptor releases the flock
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class WorkerLease:
+    """Identifies this process to its peers for as long as it runs.
+
+    Each worker holds the lock on <directory>/<worker_id>.lock. A peer finds
+    a worker dead when it can take that lock, which happens as soon as the
+    process exits or crashes, so no heartbeats are needed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._lock = FileLock(self._path(self.worker_id))
+        self._lock.acquire()
+
+    def _path(self, worker_id: str) -> str:
+        return os.path.join(self.directory, f"{worker_id}.lock")
+
+    def is_alive(self, worker_id: Optional[str]) -> bool:
+        """Whether the worker holding worker_id is still running"""
+        if worker_id == self.worker_id:
+            return True
+        if not worker_id or not os.path.exists(self._path(worker_id)):
+            return False
+        probe = FileLock(self._path(worker_id))
+        if not probe.acquire(blocking=False):
+            return True
+        probe.release()
+        try:
+            os.remove(self._path(worker_id))
+        except FileNotFoundError:
+            pass
+        return False
+
+    def release(self):
+        self._lock.release()
+        try:
+            os.remove(self._path(self.worker_id))
+        except FileNotFoundError:
+            pass
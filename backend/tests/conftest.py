@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.content_service import ContentService
+from services.gemini_service import GeminiService
+from services.model_routing import ModelRouter
+
+
+@pytest.fixture
+def content_svc(tmp_path, monkeypatch):
+    """A log-backed ContentService in tmp_path, installed as the app's service"""
+    monkeypatch.delenv("CONTENT_STORE_BACKEND", raising=False)
+    monkeypatch.delenv("BLOB_STORE_PATH", raising=False)
+    service = ContentService(str(tmp_path / "content.json"))
+    monkeypatch.setattr(main, "content_service", service)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def client(content_svc):
+    # Not used as a context manager, so the startup warmup does not run
+    return TestClient(main.app)
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel.
+
+    Each call takes the next entry of `results`: a string to answer with, an
+    exception to raise, or a callable returning either (run on the calling
+    thread). Once they run out it answers "<name> answer".
+    `delay` seconds pass before each answer, and `release`, when set, holds
+    calls until it is set.
+    """
+
+    def __init__(self, name: str):
+        self.model_name = f"models/{name}"
+        self.results = []
+        self.calls = []
+        self.delay = 0.0
+        self.release = None
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None):
+        with self._lock:
+            self.calls.append((prompt, generation_config))
+            result = self.results.pop(0) if self.results else f"{self.model_name[7:]} answer"
+        if self.release is not None:
+            self.release.wait(5)
+        if self.delay:
+            time.sleep(self.delay)
+        if callable(result):
+            result = result()
+        if isinstance(result, Exception):
+            raise result
+        return SimpleNamespace(text=result, usage_metadata=None)
+
+
+@pytest.fixture
+def gemini_svc(monkeypatch):
+    """GeminiService on FakeModels with defaults for every GEMINI_* setting and no retry backoff"""
+    for name in list(os.environ):
+        if name.startswith("GEMINI_") or name == "WEB_CONCURRENCY":
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("GEMINI_RETRY_BASE_DELAY", "0")
+    service = GeminiService()
+    service.router = ModelRouter.from_env(FakeModel)
+    monkeypatch.setattr(main, "gemini_service", service)
+    yield service
+    service.close()
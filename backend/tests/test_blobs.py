@@ -0,0 +1,161 @@
+import base64
+import hashlib
+import os
+
+import pytest
+
+from services import blob_store
+from services.blob_store import BlobStore, sniff_media_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+def temp_files(store):
+    return os.listdir(os.path.join(store.root, "tmp"))
+
+
+def test_blobs_are_content_addressed_and_stored_once(store, monkeypatch):
+    monkeypatch.setattr(blob_store, "CHUNK_SIZE", 100)
+    blob = store.put_bytes(PNG)
+    assert blob == {"hash": hashlib.sha256(PNG).hexdigest(), "size": len(PNG)}
+    assert store.put_stream([PNG[:10], PNG[10:]]) == blob
+    path = store.path(blob["hash"])
+    assert path.endswith(os.path.join(blob["hash"][:2], blob["hash"]))
+    with open(path, "rb") as f:
+        assert f.read() == PNG
+    assert temp_files(store) == []
+
+
+def test_base64_and_data_urls_decode_in_chunks(store, monkeypatch):
+    monkeypatch.setattr(blob_store, "CHUNK_SIZE", 30)
+    encoded = base64.b64encode(PNG).decode()
+    wrapped = "\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))
+    assert store.put_base64(f"data:image/png;base64,{wrapped}") == store.put_bytes(PNG)
+
+
+def test_invalid_base64_leaves_nothing_behind(store):
+    with pytest.raises(ValueError):
+        store.put_base64("not base64!")
+    assert temp_files(store) == []
+
+
+@pytest.mark.parametrize("value", ["abc", "../" + "0" * 61, "G" * 64, ""])
+def test_paths_only_accept_sha256_hashes(store, value):
+    with pytest.raises(ValueError):
+        store.path(value)
+    assert not store.exists(value)
+    assert store.stat(value) is None
+
+
+@pytest.mark.parametrize("head, media_type", [
+    (PNG[:16], "image/png"),
+    (b"\xff\xd8\xff\xe0rest", "image/jpeg"),
+    (b"GIF89a....", "image/gif"),
+    (b"RIFF\0\0\0\0WEBPVP8 ", "image/webp"),
+    (b"plain text", "application/octet-stream"),
+])
+def test_sniff_media_type(head, media_type):
+    assert sniff_media_type(head) == media_type
+
+
+def test_read_returns_inclusive_ranges(store, monkeypatch):
+    monkeypatch.setattr(blob_store, "CHUNK_SIZE", 7)
+    blob_hash = store.put_bytes(PNG)["hash"]
+    assert b"".join(store.read(blob_hash)) == PNG
+    assert b"".join(store.read(blob_hash, 5, 20)) == PNG[5:21]
+    assert store.stat(blob_hash) == {"hash": blob_hash, "size": len(PNG), "media_type": "image/png"}
+
+
+def test_save_image_blob_moves_base64_out_of_the_record(content_svc):
+    blob_hash = content_svc.save_image_blob({"image_base64": base64.b64encode(PNG).decode()})
+    assert content_svc.blobs.exists(blob_hash)
+    assert content_svc.save_image_blob({"prompt": "no image"}) is None
+
+
+@pytest.fixture
+def uploaded(client):
+    response = client.post("/api/blobs", files={"file": ("image.png", PNG, "image/png")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["size"] == len(PNG)
+    assert body["url"] == f"/api/blobs/{body['hash']}"
+    return body["url"], f'"{body["hash"]}"'
+
+
+def test_get_blob_is_immutable_and_revalidates(client, uploaded):
+    url, etag = uploaded
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == etag
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        assert client.get(url, headers={"If-None-Match": if_none_match}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=0-9", 0, 9),
+    ("bytes=1000-", 1000, len(PNG) - 1),
+    ("bytes=-8", len(PNG) - 8, len(PNG) - 1),
+    ("bytes=1020-99999", 1020, len(PNG) - 1),
+])
+def test_single_ranges_are_partial_content(client, uploaded, range_header, start, end):
+    url, _ = uploaded
+    response = client.get(url, headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.content == PNG[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(PNG)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+
+@pytest.mark.parametrize("range_header", ["bytes=0-1,5-9", "items=0-9", "bytes=a-b"])
+def test_unsupported_ranges_get_the_whole_blob(client, uploaded, range_header):
+    url, _ = uploaded
+    response = client.get(url, headers={"Range": range_header})
+    assert response.status_code == 200
+    assert response.content == PNG
+
+
+@pytest.mark.parametrize("range_header", [f"bytes={len(PNG)}-", "bytes=9-5"])
+def test_unsatisfiable_ranges_are_416(client, uploaded, range_header):
+    url, _ = uploaded
+    response = client.get(url, headers={"Range": range_header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(PNG)}"
+
+
+def test_if_range_must_match_the_etag(client, uploaded):
+    url, etag = uploaded
+    assert client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PNG
+
+
+def test_head_sends_headers_only(client, uploaded):
+    url, _ = uploaded
+    response = client.head(url, headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+def test_empty_blob(client):
+    blob = client.post("/api/blobs", files={"file": ("empty", b"")}).json()
+    response = client.get(blob["url"], headers={"Range": "bytes=0-9"})
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("blob_hash", ["0" * 64, "not-a-hash"])
+def test_unknown_blobs_are_404(client, blob_hash):
+    assert client.get(f"/api/blobs/{blob_hash}").status_code == 404
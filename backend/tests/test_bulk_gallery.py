@@ -0,0 +1,128 @@
+import pytest
+
+import main
+from services.content_service import ContentFilter, ContentService, metadata_value
+
+
+@pytest.fixture(params=["log", "sqlite"])
+def content_svc(request, tmp_path, monkeypatch):
+    """The app's ContentService on each store backend"""
+    monkeypatch.delenv("CONTENT_SQLITE_PATH", raising=False)
+    monkeypatch.delenv("BLOB_STORE_PATH", raising=False)
+    service = ContentService(str(tmp_path / "content.json"), backend=request.param)
+    monkeypatch.setattr(main, "content_service", service)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def ids(content_svc):
+    """Ids of four items: draft/published posts, a draft image, and a post with a numeric score"""
+    return content_svc.save_many([
+        {"content_type": "post", "title": "Draft post", "content": "sourdough", "metadata": {"status": "draft"}},
+        {"content_type": "post", "title": "Published post", "content": "baguette", "metadata": {"status": "published"}},
+        {"content_type": "image", "title": "Draft image", "content": "crumb", "metadata": {"status": "draft"}},
+        {"content_type": "post", "title": "Scored post", "content": "focaccia", "metadata": {"score": 1}},
+    ])
+
+
+def titles(client):
+    return sorted(item["title"] for item in client.get("/api/gallery").json()["items"])
+
+
+def test_metadata_values_match_by_type():
+    assert metadata_value("1") == "1"
+    assert metadata_value(1) == "1"
+    assert metadata_value(None) is None
+    content_filter = ContentFilter(metadata={"score": 1, "tags": ["a"]})
+    assert content_filter.matches_metadata({"score": 1, "tags": ["a"], "other": True})
+    assert not content_filter.matches_metadata({"score": 1})
+    assert not content_filter.matches_metadata({"score": 2, "tags": ["a"]})
+
+
+def test_filter_keys_are_range_checked_and_ids_deduplicated():
+    content_filter = ContentFilter(
+        ids=["b", "a", "b"], content_type="post",
+        created_from="2024-01-01T00:00:00", created_before="2024-02-01T00:00:00"
+    )
+    assert content_filter.ids == ["b", "a"]
+    assert content_filter.matches_key("2024-01-01T00:00:00", "post")
+    assert not content_filter.matches_key("2024-02-01T00:00:00", "post")
+    assert not content_filter.matches_key("2023-12-31T23:59:59", "post")
+    assert not content_filter.matches_key("2024-01-15T00:00:00", "image")
+
+
+def test_dry_run_lists_matches_without_deleting(client, ids):
+    response = client.post("/api/gallery/bulk-delete", json={"metadata": {"status": "draft"}, "dry_run": True})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["dry_run"], body["matched"], body["deleted"]) == (True, 2, 0)
+    assert sorted(body["would_delete"]) == sorted([ids[0], ids[2]])
+    assert len(titles(client)) == 4
+
+
+def test_bulk_delete_applies_every_criterion(client, content_svc, ids):
+    etag = client.get("/api/gallery").headers["etag"]
+    response = client.post("/api/gallery/bulk-delete", json={"content_type": "post", "metadata": {"status": "draft"}})
+    assert response.json()["ids"] == [ids[0]]
+    assert titles(client) == ["Draft image", "Published post", "Scored post"]
+    assert client.get("/api/gallery", headers={"If-None-Match": etag}).status_code == 200
+    assert content_svc.search_content("sourdough") == []
+
+
+def test_bulk_delete_by_ids_ignores_unknown_ones(client, ids):
+    response = client.post("/api/gallery/bulk-delete", json={"ids": [ids[1], "missing"]})
+    assert (response.json()["matched"], response.json()["ids"]) == (1, [ids[1]])
+
+
+def test_metadata_filter_matches_normalized_values(client, ids):
+    # Values compare as normalized by metadata_value, so 1 and "1" are equal
+    for score in (1, "1"):
+        response = client.post("/api/gallery/bulk-delete", json={"metadata": {"score": score}, "dry_run": True})
+        assert response.json()["would_delete"] == [ids[3]]
+    response = client.post("/api/gallery/bulk-delete", json={"metadata": {"score": 2}, "dry_run": True})
+    assert response.json()["matched"] == 0
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/gallery/bulk-delete", {}),
+    ("/api/gallery/bulk-delete", {"dry_run": True}),
+    ("/api/gallery/bulk-delete", {"created_from": "last week"}),
+    ("/api/gallery/bulk-update", {"content_type": "post"}),
+    ("/api/gallery/bulk-update", {"set_metadata": {"status": "done"}}),
+])
+def test_requests_that_could_cover_everything_are_rejected(client, ids, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert len(titles(client)) == 4
+
+
+def test_too_many_ids_are_rejected(client):
+    response = client.post("/api/gallery/bulk-delete", json={"ids": ["x"] * (main.MAX_BULK_IDS + 1)})
+    assert response.status_code == 422
+
+
+def test_bulk_update_sets_and_removes_metadata(client, content_svc, ids):
+    response = client.post("/api/gallery/bulk-update", json={
+        "metadata": {"status": "draft"},
+        "set_metadata": {"status": "review", "owner": "sam"},
+        "remove_metadata": ["score"]
+    })
+    body = response.json()
+    assert (body["matched"], body["updated"]) == (2, 2)
+    assert content_svc.get_content(ids[2])["metadata"] == {"status": "review", "owner": "sam"}
+    assert content_svc.get_content(ids[1])["metadata"] == {"status": "published"}
+
+
+def test_bulk_update_dry_run_and_no_op_leave_the_etag(client, content_svc, ids):
+    etag = client.get("/api/gallery").headers["etag"]
+    response = client.post("/api/gallery/bulk-update", json={
+        "content_type": "image", "remove_metadata": ["status"], "dry_run": True
+    })
+    assert response.json()["would_update"] == [ids[2]]
+    response = client.post("/api/gallery/bulk-update", json={
+        "ids": [ids[1]], "set_metadata": {"status": "published"}
+    })
+    assert (response.json()["matched"], response.json()["updated"]) == (1, 0)
+    assert content_svc.get_content(ids[2])["metadata"] == {"status": "draft"}
+    assert client.get("/api/gallery", headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,102 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from services import compression
+from services.compression import CompressionMiddleware, negotiate_encoding
+
+PAYLOAD = {"items": [{"id": n, "title": f"Title {n}"} for n in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return PAYLOAD
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/missing")
+    async def missing():
+        return JSONResponse(PAYLOAD, status_code=404)
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\0" * 4096, media_type="application/octet-stream")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(b"x" * 4096), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for n in range(3):
+                yield f"data: {n}\n\n" * 200
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("gzip;q=0, br;q=0", None),
+    ("identity", None),
+    ("br;q=bogus, gzip;q=0.1", "gzip"),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_large_json_is_compressed(client, encoding, decompress):
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    # The test client decodes the body; check the declared length is the compressed one
+    assert int(response.headers["content-length"]) < len(json.dumps(PAYLOAD))
+    assert response.json() == PAYLOAD
+
+
+def test_large_threadpool_body_is_compressed(client, monkeypatch):
+    monkeypatch.setattr(compression, "THREADPOOL_THRESHOLD", 100)
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == PAYLOAD
+
+
+@pytest.mark.parametrize("path", ["/small", "/missing", "/binary", "/stream"])
+def test_left_alone(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+
+
+def test_already_encoded_response_is_not_compressed_again(client):
+    response = client.get("/encoded", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "x" * 4096
+
+
+def test_no_accept_encoding_passes_through(client):
+    response = client.get("/large", headers={"Accept-Encoding": ""})
+    assert "content-encoding" not in response.headers
+    assert response.json() == PAYLOAD
@@ -0,0 +1,84 @@
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time main.py sees, starting half a second into second 1000"""
+    now = [1000.5]
+    monkeypatch.setattr(main, "time", SimpleNamespace(time=lambda: now[0], perf_counter=time.perf_counter))
+    return now
+
+
+def save(content_svc, title, modified_at):
+    content_svc.save_content("post", title, f"Body of {title}")
+    content_svc._modified_at = modified_at
+
+
+def test_etag_revalidates_and_changes_on_every_write(client, content_svc):
+    save(content_svc, "first", time.time())
+    first = client.get("/api/gallery")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert client.get("/api/gallery", headers={"If-None-Match": etag}).status_code == 304
+
+    for write in (
+        lambda: content_svc.save_content("post", "second", "Body"),
+        lambda: content_svc.delete_content(first.json()["items"][0]["id"]),
+    ):
+        write()
+        response = client.get("/api/gallery", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        etag = response.headers["etag"]
+
+
+def test_last_modified_is_withheld_within_the_write_second(client, content_svc, clock):
+    save(content_svc, "first", 1000.2)
+    assert "last-modified" not in client.get("/api/gallery").headers
+
+    clock[0] = 1001.0
+    assert client.get("/api/gallery").headers["last-modified"] == formatdate(1000.2, usegmt=True)
+
+
+def test_if_modified_since_sees_writes_in_a_later_second(client, content_svc, clock):
+    save(content_svc, "first", 1000.2)
+    clock[0] = 1001.5
+    last_modified = client.get("/api/gallery").headers["last-modified"]
+    assert client.get("/api/gallery", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    save(content_svc, "second", 1001.6)
+    clock[0] = 1001.7
+    assert client.get("/api/gallery", headers={"If-Modified-Since": last_modified}).status_code == 200
+    clock[0] = 1002.0
+    assert client.get("/api/gallery", headers={"If-Modified-Since": last_modified}).status_code == 200
+
+
+def test_if_none_match_wins_over_if_modified_since(client, content_svc, clock):
+    save(content_svc, "first", 1000.2)
+    clock[0] = 1002.0
+    current = client.get("/api/gallery").headers
+    response = client.get("/api/gallery", headers={
+        "If-None-Match": 'W/"stale"',
+        "If-Modified-Since": current["last-modified"]
+    })
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("header", ["not a date", ""])
+def test_unparseable_if_modified_since_is_ignored(client, content_svc, header):
+    save(content_svc, "first", 1000.2)
+    assert client.get("/api/gallery", headers={"If-Modified-Since": header}).status_code == 200
+
+
+def test_single_item_and_search_share_the_gallery_validators(client, content_svc):
+    content_id = content_svc.save_content("post", "findable", "Body")
+    etag = client.get("/api/gallery").headers["etag"]
+    for path in (f"/api/gallery/{content_id}", "/api/gallery/search?q=findable"):
+        assert client.get(path).headers["etag"] == etag
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,119 @@
+import pytest
+
+from services.content_service import ContentFilter, LogContentStore, SQLiteContentStore
+
+
+def make_item(content_id, created_at, content_type="post", **metadata):
+    return {
+        "id": content_id,
+        "type": content_type,
+        "title": f"Title {content_id}",
+        "content": f"Body {content_id}",
+        "created_at": created_at,
+        "metadata": metadata
+    }
+
+
+ITEMS = [
+    make_item("p1", "2024-01-01T00:00:00", status="draft"),
+    make_item("i1", "2024-01-02T00:00:00", "image", status="draft", score=1),
+    make_item("p3", "2024-01-03T00:00:00", status="published"),
+    make_item("p2", "2024-01-03T00:00:00", status="draft"),
+    make_item("i2", "2024-01-04T00:00:00", "image", status="published"),
+]
+
+
+@pytest.fixture(params=["log", "sqlite"])
+def store(request, tmp_path):
+    storage_file = str(tmp_path / "content.json")
+    if request.param == "log":
+        store = LogContentStore(storage_file)
+    else:
+        store = SQLiteContentStore(str(tmp_path / "content.db"), storage_file)
+    store.put_many(ITEMS)
+    yield store
+    store.close()
+
+
+def ids(items):
+    return [item["id"] for item in items]
+
+
+def test_page_orders_by_created_at_then_id(store):
+    assert ids(store.page(None, 10)) == ["p1", "i1", "p2", "p3", "i2"]
+
+
+def test_page_resumes_after_key(store):
+    first = store.page(None, 3)
+    assert ids(first) == ["p1", "i1", "p2"]
+    # p2 and p3 share created_at; the id breaks the tie
+    after = (first[-1]["created_at"], first[-1]["id"])
+    assert ids(store.page(None, 3, after)) == ["p3", "i2"]
+    assert store.page(None, 3, ("2024-01-04T00:00:00", "i2")) == []
+
+
+def test_page_filters_by_type(store):
+    assert ids(store.page("post", 2)) == ["p1", "p2"]
+    assert ids(store.page("post", 2, ("2024-01-03T00:00:00", "p2"))) == ["p3"]
+    assert ids(store.page("image", 10)) == ["i1", "i2"]
+
+
+def test_page_reflects_overwrites_and_deletes(store):
+    store.put(make_item("p1", "2024-01-05T00:00:00"))
+    store.delete("i1")
+    assert ids(store.page(None, 10)) == ["p2", "p3", "i2", "p1"]
+
+
+def test_filter_requires_a_criterion():
+    with pytest.raises(ValueError):
+        ContentFilter()
+    with pytest.raises(ValueError):
+        ContentFilter(created_from="yesterday")
+
+
+@pytest.mark.parametrize("content_filter, expected", [
+    (lambda: ContentFilter(ids=["p2", "missing", "i1"]), ["i1", "p2"]),
+    (lambda: ContentFilter(ids=[]), []),
+    (lambda: ContentFilter(content_type="image"), ["i1", "i2"]),
+    (lambda: ContentFilter(created_from="2024-01-02T00:00:00", created_before="2024-01-04T00:00:00"), ["i1", "p2", "p3"]),
+    (lambda: ContentFilter(content_type="post", metadata={"status": "draft"}), ["p1", "p2"]),
+    (lambda: ContentFilter(metadata={"score": 1}), ["i1"]),
+    (lambda: ContentFilter(ids=["p1", "p3"], metadata={"status": "published"}), ["p3"]),
+])
+def test_delete_where(store, content_filter, expected):
+    deleted = store.delete_where(content_filter())
+    assert sorted(deleted) == sorted(expected)
+    remaining = ids(store.page(None, 10))
+    assert not set(remaining) & set(expected)
+    assert len(remaining) == len(ITEMS) - len(expected)
+
+
+def test_delete_where_dry_run_changes_nothing(store):
+    matched = store.delete_where(ContentFilter(content_type="image"), dry_run=True)
+    assert sorted(matched) == ["i1", "i2"]
+    assert len(store.page(None, 10)) == len(ITEMS)
+
+
+def test_patch_where_sets_and_removes_metadata(store):
+    matched, changed = store.patch_where(
+        ContentFilter(metadata={"status": "draft"}), {"status": "review", "owner": "ana"}, ["score"]
+    )
+    assert matched == 3
+    assert sorted(changed) == ["i1", "p1", "p2"]
+    assert store.get("i1")["metadata"] == {"status": "review", "owner": "ana"}
+    assert store.get("p3")["metadata"] == {"status": "published"}
+    # The metadata filter sees the patched values
+    assert store.delete_where(ContentFilter(metadata={"status": "draft"}), dry_run=True) == []
+    assert sorted(store.delete_where(ContentFilter(metadata={"owner": "ana"}), dry_run=True)) == ["i1", "p1", "p2"]
+
+
+def test_patch_where_skips_unchanged_items(store):
+    matched, changed = store.patch_where(ContentFilter(content_type="post"), {"status": "published"}, [])
+    assert matched == 3
+    assert sorted(changed) == ["p1", "p2"]
+
+
+def test_patch_where_dry_run_changes_nothing(store):
+    matched, changed = store.patch_where(ContentFilter(content_type="image"), {}, ["status"], dry_run=True)
+    assert (matched, sorted(changed)) == (2, ["i1", "i2"])
+    assert store.get("i1")["metadata"] == {"status": "draft", "score": 1}
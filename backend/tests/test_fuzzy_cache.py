@@ -0,0 +1,125 @@
+import pytest
+
+from services import fuzzy_cache
+from services.fuzzy_cache import FuzzyCache, jaccard, word_set
+
+METHOD = "generate_hashtags"
+
+
+@pytest.fixture
+def cache():
+    return FuzzyCache(thresholds={METHOD: 0.8}, ttls={METHOD: 60})
+
+
+def test_word_set_drops_stopwords_order_and_plurals():
+    assert word_set("Give me some tips for Baking bread!") == {"tip", "baking", "bread"}
+    assert word_set("bread baking tip") == word_set("tips for baking bread")
+    assert word_set("easy recipes") == {"easy", "recipe"}
+    # Negations change the meaning and are kept
+    assert "not" in word_set("not vegan")
+    assert word_set("the and of") == frozenset()
+
+
+def test_jaccard():
+    assert jaccard(frozenset("ab"), frozenset("bc")) == pytest.approx(1 / 3)
+    assert jaccard(frozenset(), frozenset()) == 0.0
+
+
+def test_near_duplicates_hit_with_their_similarity(cache):
+    cache.set(METHOD, "general", "baking tips for beginners", "#baking")
+    assert cache.get(METHOD, "general", "Beginner baking tips") == ("#baking", 1.0)
+    cache.set(METHOD, "general", "sourdough bread starter feeding schedule", "#sourdough")
+    value, similarity = cache.get(METHOD, "general", "sourdough bread starter feeding schedule guide")
+    assert value == "#sourdough"
+    assert similarity == pytest.approx(5 / 6, abs=1e-4)
+
+
+def test_dissimilar_inputs_miss(cache):
+    cache.set(METHOD, "general", "sourdough bread starter", "#sourdough")
+    assert cache.get(METHOD, "general", "sourdough pizza starter") is None
+    assert cache.get(METHOD, "general", "vegan sourdough bread starter") is None
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_scope_and_method_must_match_exactly(cache):
+    cache.set(METHOD, "instagram", "baking tips", "#baking")
+    assert cache.get(METHOD, "tiktok", "baking tips") is None
+    assert cache.get("process_prompt", "instagram", "baking tips") is None
+
+
+def test_disabled_methods_and_empty_inputs_are_ignored():
+    cache = FuzzyCache(thresholds={METHOD: 0.8}, ttls={METHOD: 0})
+    cache.set(METHOD, "general", "baking tips", "#baking")
+    assert cache.get(METHOD, "general", "baking tips") is None
+    assert cache.get_stats()["stores"] == 0
+
+    cache = FuzzyCache(thresholds={METHOD: 0.8}, ttls={METHOD: 60})
+    cache.set(METHOD, "general", "the and of", "#nothing")
+    assert cache.get(METHOD, "general", "the and of") is None
+    assert cache.get_stats()["size"] == 0
+
+
+def test_entries_expire(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fuzzy_cache.time, "time", lambda: now[0])
+    cache.set(METHOD, "general", "baking tips", "#baking")
+    now[0] += 60
+    assert cache.get(METHOD, "general", "baking tips") is None
+    assert cache.get_stats()["size"] == 0
+    assert cache._bands == {}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = FuzzyCache(thresholds={METHOD: 0.8}, ttls={METHOD: 60}, max_entries=2)
+    cache.set(METHOD, "general", "baking tips", "#baking")
+    cache.set(METHOD, "general", "grilling tips", "#grilling")
+    assert cache.get(METHOD, "general", "baking tips") is not None
+    cache.set(METHOD, "general", "brewing tips", "#brewing")
+    assert cache.get(METHOD, "general", "grilling tips") is None
+    assert cache.get(METHOD, "general", "baking tips") is not None
+    assert cache.get_stats()["evictions"] == 1
+    # Band postings of the evicted entry are gone too
+    assert sum(len(members) for members in cache._bands.values()) == 2 * fuzzy_cache.BANDS
+
+
+def test_replacing_an_entry_keeps_one_copy(cache):
+    cache.set(METHOD, "general", "baking tips", "#old")
+    cache.set(METHOD, "general", "tips baking", "#new")
+    assert cache.get(METHOD, "general", "baking tips") == ("#new", 1.0)
+    assert cache.get_stats()["size"] == 1
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv("GEMINI_FUZZY_CACHE_ENABLED", raising=False)
+    assert FuzzyCache.from_env() is None
+    monkeypatch.setenv("GEMINI_FUZZY_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_FUZZY_THRESHOLDS", "process_prompt=0, generate_image=0.9")
+    cache = FuzzyCache.from_env()
+    assert cache.thresholds == {METHOD: 0.8, "generate_image": 0.9}
+
+
+def test_route_marks_approximate_answers(client, gemini_svc):
+    gemini_svc.fuzzy_cache = FuzzyCache()
+    flash = gemini_svc.router.model("gemini-1.5-flash")
+    flash.results = ["#baking\n#beginner", "#fresh"]
+
+    first = client.post("/api/hashtags/generate", json={"topic": "baking tips for beginners", "count": 2})
+    assert "x-cache" not in first.headers
+
+    second = client.post("/api/hashtags/generate", json={"topic": "Beginner baking tips", "count": 2})
+    assert second.json()["hashtags"] == ["#baking", "#beginner"]
+    assert second.headers["x-cache"] == "approximate"
+    assert second.headers["x-cache-similarity"] == "1.0"
+
+    # Another count is another scope; no-cache skips the lookup
+    other = client.post("/api/hashtags/generate", json={"topic": "Beginner baking tips", "count": 3})
+    assert other.json()["hashtags"] == ["#fresh"]
+    assert "x-cache" not in other.headers
+    fresh = client.post(
+        "/api/hashtags/generate",
+        json={"topic": "Beginner baking tips", "count": 2},
+        headers={"Cache-Control": "no-cache"}
+    )
+    assert fresh.json()["hashtags"] == ["#gemini-1.5-flash answer"]
+    assert "x-cache" not in fresh.headers
+    assert len(flash.calls) == 3
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from services.content_service import parse_import_line
+
+
+def split_lines(chunks, max_line_bytes=100):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in main.ndjson_lines(stream(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_are_reassembled_across_chunks():
+    assert split_lines([b'{"a"', b': 1}\n{"b": 2}\n{"c"', b": 3}"]) == [
+        (1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b'{"c": 3}')
+    ]
+
+
+def test_blank_lines_are_skipped_but_counted():
+    assert split_lines([b"one\n\n  \r\ntwo\r\n", b"\n"]) == [(1, b"one"), (4, b"two\r")]
+
+
+def test_long_lines_are_reported_as_none():
+    long_line = b"x" * 20
+    assert split_lines([b"ok\n" + long_line + b"\nnext\n"], max_line_bytes=10) == [
+        (1, b"ok"), (2, None), (3, b"next")
+    ]
+    # A long line spread over chunks is dropped without being buffered whole
+    assert split_lines([b"ok\n", long_line, long_line, b"\nnext"], max_line_bytes=10) == [
+        (1, b"ok"), (2, None), (3, b"next")
+    ]
+    assert split_lines([b"ok\n", long_line], max_line_bytes=10) == [(1, b"ok"), (2, None)]
+
+
+def test_parse_import_line_keeps_ids_and_fills_gaps():
+    item = {"id": "a", "type": "post", "title": "T", "content": "C",
+            "created_at": "2024-01-01T00:00:00", "metadata": {"k": 1}, "score": 3}
+    assert parse_import_line(json.dumps(item).encode()) == {key: item[key] for key in item if key != "score"}
+
+    generated = parse_import_line(b'{"type": "post", "title": "T", "content": "C", "metadata": null}')
+    assert generated["id"] and generated["created_at"]
+    assert generated["metadata"] == {}
+
+
+@pytest.mark.parametrize("line, message", [
+    (b"[1, 2]", "not a JSON object"),
+    (b'{"type": "post", "title": "T"}', "content"),
+    (b'{"type": "post", "title": 5, "content": "C"}', "title"),
+    (b'{"id": 7, "type": "post", "title": "T", "content": "C"}', "must be strings"),
+    (b'{"type": "post", "title": "T", "content": "C", "created_at": "yesterday"}', "isoformat"),
+    (b'{"type": "post", "title": "T", "content": "C", "metadata": [1]}', "metadata"),
+    (b'{"type": "post",', "Expecting"),
+    (b'{"title": "\xff"}', "codec"),
+])
+def test_parse_import_line_rejects_invalid_records(line, message):
+    with pytest.raises(ValueError, match=message):
+        parse_import_line(line)
+
+
+def fill(content_svc):
+    content_svc.save_many([
+        {"content_type": "post", "title": f"Post {n}", "content": f"Body {n}", "metadata": {"n": n}}
+        for n in range(5)
+    ] + [{"content_type": "image", "title": "Image", "content": "Alt text"}])
+
+
+def export(client, **params):
+    response = client.get("/api/gallery/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_streams_every_item_in_order(client, content_svc, monkeypatch):
+    monkeypatch.setattr(main, "EXPORT_BATCH_SIZE", 2)
+    fill(content_svc)
+    items = export(client)
+    assert len(items) == 6
+    assert items == sorted(items, key=lambda item: (item["created_at"], item["id"]))
+    assert [item["type"] for item in export(client, content_type="image")] == ["image"]
+    assert list(content_svc.iter_content(batch_size=2)) == items
+
+
+def test_export_reimports_into_an_empty_gallery(client, content_svc):
+    fill(content_svc)
+    body = client.get("/api/gallery/export").content
+    content_svc.bulk_delete(main.ContentFilter(content_type="post"))
+    content_svc.bulk_delete(main.ContentFilter(content_type="image"))
+
+    response = client.post("/api/gallery/import", content=body)
+    assert response.json() == {"success": True, "imported": 6, "failed": 0, "errors": []}
+    assert export(client) == [json.loads(line) for line in body.splitlines()]
+
+    # Importing again replaces the items rather than duplicating them
+    client.post("/api/gallery/import", content=body)
+    assert len(export(client)) == 6
+    assert content_svc.search_content("Alt")[0]["title"] == "Image"
+
+
+def test_import_reports_each_rejected_line(client, content_svc, monkeypatch):
+    monkeypatch.setattr(main, "GALLERY_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(main, "GALLERY_IMPORT_MAX_LINE_BYTES", 200)
+    good = b'{"type": "post", "title": "T", "content": "C"}'
+    body = b"\n".join([good, b"not json", b"", good, b'{"title": "' + b"x" * 300 + b'"}', good])
+
+    result = client.post("/api/gallery/import", content=body).json()
+    assert (result["imported"], result["failed"]) == (3, 2)
+    assert [error["line"] for error in result["errors"]] == [2, 5]
+    assert result["errors"][1]["error"] == "Line too long"
+    assert len(export(client)) == 3
+
+
+def test_import_lists_at_most_max_import_errors(client, content_svc, monkeypatch):
+    monkeypatch.setattr(main, "MAX_IMPORT_ERRORS", 3)
+    monkeypatch.setattr(main, "GALLERY_IMPORT_BATCH_SIZE", 2)
+    result = client.post("/api/gallery/import", content=b"\n".join([b"{}"] * 7)).json()
+    assert (result["imported"], result["failed"]) == (0, 7)
+    assert [error["line"] for error in result["errors"]] == [1, 2, 3]
+
+
+def test_import_changes_the_gallery_etag(client, content_svc):
+    etag = client.get("/api/gallery").headers["etag"]
+    client.post("/api/gallery/import", content=b'{"type": "post", "title": "T", "content": "C"}')
+    assert client.get("/api/gallery", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from services.hedging import Hedger
+
+METHOD = "generate_hashtags"
+FLASH = "models/gemini-1.5-flash"
+
+
+def test_no_hedging_unless_enabled_for_the_method():
+    hedger = Hedger(enabled=False, min_samples=1)
+    hedger.observe(METHOD, FLASH, 1.0)
+    assert hedger.delay(METHOD, FLASH) is None
+
+    hedger = Hedger(enabled=True, methods=("process_prompt",), min_samples=1)
+    hedger.observe(METHOD, FLASH, 1.0)
+    assert hedger.delay(METHOD, FLASH) is None
+    assert hedger.get_stats()["calls"] == 0
+
+
+def test_delay_is_the_latency_percentile_once_warm():
+    hedger = Hedger(enabled=True, percentile=90, min_samples=5)
+    for seconds in (0.5, 0.1, 0.4, 0.2):
+        hedger.observe(METHOD, FLASH, seconds)
+    assert hedger.delay(METHOD, FLASH) is None
+    for seconds in (0.3, 0.6, 0.7, 0.8, 0.9, 1.0):
+        hedger.observe(METHOD, FLASH, seconds)
+    assert hedger.delay(METHOD, FLASH) == 0.9
+    # Samples are kept per model
+    assert hedger.delay(METHOD, "models/gemini-1.5-pro") is None
+
+
+def test_window_drops_the_oldest_samples():
+    hedger = Hedger(enabled=True, percentile=100, window=3, min_samples=1)
+    for seconds in (5.0, 1.0, 2.0, 3.0):
+        hedger.observe(METHOD, FLASH, seconds)
+    assert hedger.delay(METHOD, FLASH) == 3.0
+
+
+def test_budget_limits_extra_load():
+    hedger = Hedger(enabled=True, min_samples=1, budget_ratio=0.25, max_tokens=1)
+    hedger.observe(METHOD, FLASH, 1.0)
+    allowed = []
+    for _ in range(8):
+        hedger.delay(METHOD, FLASH)
+        allowed.append(hedger.try_hedge(METHOD))
+    # One hedge per four calls
+    assert allowed == [False, False, False, True] * 2
+    assert hedger.get_stats()["denied"] == 6
+
+
+def test_refund_returns_the_token():
+    hedger = Hedger(enabled=True, min_samples=1, budget_ratio=1, max_tokens=1)
+    hedger.observe(METHOD, FLASH, 1.0)
+    hedger.delay(METHOD, FLASH)
+    assert hedger.try_hedge(METHOD)
+    assert not hedger.try_hedge(METHOD)
+    hedger.refund(METHOD)
+    assert hedger.try_hedge(METHOD)
+    hedger.record_sent(METHOD)
+    hedger.record_win(METHOD)
+    stats = hedger.get_stats()
+    assert (stats["hedged"], stats["won"], stats["saturated"], stats["extra_load"]) == (1, 1, 1, 1.0)
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("GEMINI_HEDGE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_HEDGE_METHODS", "process_prompt, generate_image")
+    monkeypatch.setenv("GEMINI_HEDGE_PERCENTILE", "99")
+    hedger = Hedger.from_env()
+    assert hedger.enabled and hedger.percentile == 99
+    assert hedger.methods == {"process_prompt", "generate_image"}
+
+
+@pytest.fixture
+def hedged(gemini_svc):
+    """Hedge hashtag calls still running after 20ms, with a token for every call"""
+    gemini_svc.hedger = Hedger(enabled=True, percentile=50, min_samples=1, budget_ratio=1)
+    gemini_svc.hedger.observe(METHOD, FLASH, 0.02)
+    flash = gemini_svc.router.model("gemini-1.5-flash")
+    flash.results = [lambda: time.sleep(0.5) or "#slow", "#hedge"]
+    return gemini_svc, flash
+
+
+def hashtags(gemini_svc):
+    return asyncio.run(gemini_svc.generate_hashtags_async("baking", count=1, use_cache=False))
+
+
+def test_slow_call_is_hedged_and_the_hedge_wins(hedged):
+    gemini_svc, flash = hedged
+    assert hashtags(gemini_svc) == ["#hedge"]
+    assert len(flash.calls) == 2
+    stats = gemini_svc.get_stats()["hedging"]
+    assert (stats["hedged"], stats["won"]) == (1, 1)
+
+
+def test_hedge_without_budget_is_denied(hedged):
+    gemini_svc, flash = hedged
+    gemini_svc.hedger.budget_ratio = 0.5
+    assert hashtags(gemini_svc) == ["#slow"]
+    assert len(flash.calls) == 1
+    assert gemini_svc.get_stats()["hedging"]["denied"] == 1
+
+
+def test_hedge_without_a_free_slot_is_refunded(hedged, monkeypatch):
+    gemini_svc, flash = hedged
+    monkeypatch.setattr(gemini_svc, "_semaphore", asyncio.Semaphore(1))
+    assert hashtags(gemini_svc) == ["#slow"]
+    assert len(flash.calls) == 1
+    stats = gemini_svc.get_stats()["hedging"]
+    assert (stats["hedged"], stats["saturated"]) == (0, 1)
+    assert gemini_svc.hedger._tokens == 1
+
+
+def test_losing_hedge_holds_its_slot_until_it_ends(hedged):
+    gemini_svc, flash = hedged
+    flash.results = [lambda: time.sleep(0.1) or "#primary", lambda: time.sleep(0.5) or "#hedge"]
+
+    async def run():
+        result = await gemini_svc.generate_hashtags_async("baking", count=1, use_cache=False)
+        # The cancelled hedge keeps running on its worker thread
+        busy = gemini_svc._semaphore._value
+        await asyncio.sleep(0.6)
+        return result, busy, gemini_svc._semaphore._value
+
+    result, busy, idle = asyncio.run(run())
+    assert result == ["#primary"]
+    assert busy == gemini_svc.max_concurrency - 1
+    assert idle == gemini_svc.max_concurrency
+    assert gemini_svc.get_stats()["hedging"]["won"] == 0
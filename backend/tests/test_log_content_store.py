@@ -0,0 +1,231 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from services import content_service
+from services.content_service import LogContentStore
+
+
+def make_item(content_id, created_at="2024-01-01T00:00:00", content_type="post", **metadata):
+    return {
+        "id": content_id,
+        "type": content_type,
+        "title": f"Title {content_id}",
+        "content": f"Body {content_id}",
+        "created_at": created_at,
+        "metadata": metadata
+    }
+
+
+def read_records(log_file):
+    with open(log_file, 'rb') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def storage_file(tmp_path):
+    return str(tmp_path / "content.json")
+
+
+@pytest.fixture
+def store(storage_file):
+    store = LogContentStore(storage_file)
+    yield store
+    store.close()
+
+
+def test_torn_tail_is_truncated_on_reopen(storage_file):
+    store = LogContentStore(storage_file)
+    store.put(make_item("a"))
+    store.put(make_item("b"))
+    intact_size = os.path.getsize(store.log_file)
+    store.close()
+
+    # A crash in the middle of an append leaves a line without its newline
+    with open(store.log_file, 'ab') as f:
+        f.write(b'{"op": "put", "item": {"id": "c", "ti')
+
+    store = LogContentStore(storage_file)
+    try:
+        assert os.path.getsize(store.log_file) == intact_size
+        assert [item["id"] for item in store.list()] == ["a", "b"]
+        assert store.get("c") is None
+
+        # New records start on a clean line boundary
+        store.put(make_item("d"))
+        assert [record["item"]["id"] for record in read_records(store.log_file)] == ["a", "b", "d"]
+    finally:
+        store.close()
+
+
+def test_corrupt_record_drops_everything_after_it(storage_file):
+    store = LogContentStore(storage_file)
+    store.put(make_item("a"))
+    intact_size = os.path.getsize(store.log_file)
+    store.close()
+
+    with open(store.log_file, 'ab') as f:
+        f.write(b'{"op": "put", "item": garbage}\n')
+        f.write(store._encode({"op": "put", "item": make_item("b")}))
+
+    store = LogContentStore(storage_file)
+    try:
+        assert os.path.getsize(store.log_file) == intact_size
+        assert [item["id"] for item in store.list()] == ["a"]
+    finally:
+        store.close()
+
+
+def test_compaction_keeps_only_live_records(store, storage_file):
+    for version in range(3):
+        store.put(make_item("a", version=version))
+    store.put(make_item("b"))
+    store.put(make_item("c"))
+    store.delete("c")
+
+    store.compact()
+
+    assert read_records(store.log_file) == [
+        {"op": "put", "item": make_item("a", version=2)},
+        {"op": "put", "item": make_item("b")}
+    ]
+    assert store._dead == 0
+    assert store.get("a")["metadata"] == {"version": 2}
+    assert store.get("c") is None
+
+
+def test_compaction_carries_over_records_appended_during_copy(store, storage_file, monkeypatch):
+    store.put(make_item("a", version=1))
+    store.put(make_item("b"))
+    store.put(make_item("c"))
+
+    # Write while compaction copies the snapshot: the first open of the log
+    # for reading after this point is compaction's copy source
+    real_open = open
+    armed = [True]
+
+    def open_during_copy(path, mode='r', *args, **kwargs):
+        if armed[0] and path == store.log_file and mode == 'rb':
+            armed[0] = False
+            writer = threading.Thread(target=lambda: (
+                store.put(make_item("a", version=2)),
+                store.put(make_item("d")),
+                store.delete("b")
+            ))
+            writer.start()
+            writer.join()
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(content_service, "open", open_during_copy, raising=False)
+    store.compact()
+    monkeypatch.undo()
+
+    assert not armed[0]
+    expected = {"a": make_item("a", version=2), "c": make_item("c"), "d": make_item("d")}
+    assert {item["id"]: item for item in store.list()} == expected
+    assert store.get("b") is None
+    # The copied snapshot plus the carried-over tail: a@1, b, c, then a@2, d, del b
+    assert len(read_records(store.log_file)) == 6
+    assert store._dead == 3
+    assert store._log_size == os.path.getsize(store.log_file)
+
+    # Writes after the swap go to the new log and the offsets survive a reopen
+    store.put(make_item("e"))
+    store.close()
+    reopened = LogContentStore(storage_file)
+    try:
+        expected["e"] = make_item("e")
+        assert {item["id"]: item for item in reopened.list()} == expected
+    finally:
+        reopened.close()
+
+
+def test_background_compaction_after_bulk_overwrites(store, monkeypatch):
+    monkeypatch.setattr(content_service, "COMPACTION_MIN_DEAD", 10)
+    items = [make_item(f"id-{n}") for n in range(20)]
+    # Dead records must outnumber live ones before compaction starts
+    for _ in range(3):
+        store.put_many(items)
+
+    for _ in range(100):
+        if not store._compacting:
+            break
+        threading.Event().wait(0.01)
+
+    assert not store._compacting
+    assert len(read_records(store.log_file)) == 20
+    assert [item["id"] for item in store.list()] == [item["id"] for item in items]
+
+
+def test_commit_from_before_compaction_returns_without_sync(store, monkeypatch):
+    store.put(make_item("a"))
+    # Append like put() does, but leave the commit pending
+    record = {"op": "put", "item": make_item("b")}
+    with store._lock:
+        store._apply(record, store._append(record))
+        generation, end = store._generation, store._log_size
+
+    # Compaction fsyncs the new log, which covers the pending commit even
+    # though its end offset refers to the old log
+    store.put(make_item("a", version=2))
+    store.compact()
+    assert store._generation == generation + 1
+    assert store._durable_size == os.path.getsize(store.log_file)
+
+    def fail_sync():
+        raise AssertionError("commit should not sync")
+
+    monkeypatch.setattr(store, "_sync", fail_sync)
+    store._commit(generation, end + 10 ** 6)
+    store._commit(store._generation, store._durable_size)
+
+
+def test_concurrent_writers_share_commits(store):
+    threads = [
+        threading.Thread(target=store.put, args=(make_item(f"id-{n}"),))
+        for n in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert not store._syncing
+    assert store._durable_size == store._log_size == os.path.getsize(store.log_file)
+    assert len(store.list()) == 16
+
+
+def test_log_has_a_single_owner(store, storage_file):
+    with pytest.raises(RuntimeError, match="in use by another process"):
+        LogContentStore(storage_file)
+
+
+def test_log_owned_by_another_process_is_refused(store, storage_file):
+    script = (
+        "import sys\n"
+        "from services.content_service import LogContentStore\n"
+        "try:\n"
+        f"    LogContentStore({storage_file!r})\n"
+        "except RuntimeError:\n"
+        "    sys.exit(3)\n"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir)
+    assert result.returncode == 3
+
+
+def test_ownership_is_released_on_close(storage_file):
+    store = LogContentStore(storage_file)
+    store.put(make_item("a"))
+    store.close()
+
+    reopened = LogContentStore(storage_file)
+    try:
+        assert reopened.get("a") == make_item("a")
+    finally:
+        reopened.close()
@@ -0,0 +1,46 @@
+from services.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_renders_type_and_labels():
+    registry = Registry()
+    events = registry.register(Counter("cache_events_total", "Cache events", ("cache", "event")))
+    events.inc(cache="exact", event="hits")
+    events.inc(2, cache="exact", event="hits")
+    events.set_total(7, cache="fuzzy", event="misses")
+
+    assert registry.render().splitlines() == [
+        "# HELP cache_events_total Cache events",
+        "# TYPE cache_events_total counter",
+        'cache_events_total{cache="exact",event="hits"} 3',
+        'cache_events_total{cache="fuzzy",event="misses"} 7',
+    ]
+
+
+def test_gauge_moves_both_ways():
+    gauge = Gauge("in_flight", "In flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render()[1:] == ["# TYPE in_flight gauge", "in_flight 1"]
+    gauge.set(0.5)
+    assert gauge.render()[-1] == "in_flight 0.5"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, route="/a")
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 4.05',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("errors_total", "Errors", ("message",))
+    counter.inc(message='bad "quote"\nnext')
+    assert counter.render()[-1] == 'errors_total{message="bad \\"quote\\"\\nnext"} 1'
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services.model_routing import DEFAULT_MODEL, ModelRouter, parse_budgets, parse_routes
+from services.resilience import UpstreamUnavailable
+
+
+def test_parse_routes_and_budgets_override_defaults():
+    routes = parse_routes("generate_script=pro-2|flash-2, generate_image = flash-2 ,malformed")
+    assert routes["generate_script"] == ("pro-2", "flash-2")
+    assert routes["generate_image"] == ("flash-2", None)
+    assert routes["process_prompt"] == ("gemini-1.5-flash", "gemini-1.5-pro")
+
+    budgets = parse_budgets("process_prompt=2.5")
+    assert budgets["process_prompt"] == 2.5
+    assert budgets["generate_script"] == 0
+    with pytest.raises(ValueError):
+        parse_budgets("process_prompt=fast")
+
+
+def test_route_shares_models_and_drops_self_fallback():
+    built = []
+    router = ModelRouter(
+        lambda name: built.append(name) or name,
+        routes={"a": ("pro", "flash"), "b": ("flash", "flash"), "c": ("pro", None)},
+        budgets={"a": 5}
+    )
+    assert router.route("a") == ("pro", "flash", 5)
+    assert router.route("b") == ("flash", None, 0.0)
+    assert router.route("c") == ("pro", None, 0.0)
+    assert router.route("unknown") == (DEFAULT_MODEL, None, 0.0)
+    assert sorted(built) == sorted(["pro", "flash", DEFAULT_MODEL])
+
+
+def models(gemini_svc):
+    return gemini_svc.router.model("gemini-1.5-flash"), gemini_svc.router.model("gemini-1.5-pro")
+
+
+def hashtags(gemini_svc):
+    return asyncio.run(gemini_svc.generate_hashtags_async("baking", count=1, use_cache=False))
+
+
+def fallbacks(gemini_svc, method="generate_hashtags"):
+    return gemini_svc.get_stats()["routing"]["fallbacks"].get(method, {})
+
+
+def test_server_errors_fall_back_once_retries_run_out(gemini_svc):
+    flash, pro = models(gemini_svc)
+    flash.results = [google_exceptions.ServiceUnavailable("down")] * 4
+    assert hashtags(gemini_svc) == ["#gemini-1.5-pro answer"]
+    # The primary and its three retries, then one fallback call
+    assert (len(flash.calls), len(pro.calls)) == (4, 1)
+    assert fallbacks(gemini_svc)["error"] == 1
+
+
+def test_failed_fallback_becomes_503(gemini_svc):
+    flash, pro = models(gemini_svc)
+    flash.results = [google_exceptions.ServiceUnavailable("down")] * 4
+    pro.results = [google_exceptions.InternalServerError("also down")]
+    with pytest.raises(UpstreamUnavailable) as raised:
+        hashtags(gemini_svc)
+    assert raised.value.status_code == 503
+    assert raised.value.retry_after >= 1
+    assert (len(flash.calls), len(pro.calls)) == (4, 1)
+
+
+def test_throttling_never_falls_back(gemini_svc):
+    flash, pro = models(gemini_svc)
+    flash.results = [google_exceptions.ResourceExhausted("quota")] * 4
+    with pytest.raises(UpstreamUnavailable) as raised:
+        hashtags(gemini_svc)
+    assert raised.value.status_code == 429
+    assert (len(flash.calls), len(pro.calls)) == (4, 0)
+    assert "error" not in fallbacks(gemini_svc)
+
+
+def test_client_errors_never_fall_back(gemini_svc):
+    flash, pro = models(gemini_svc)
+    flash.results = [google_exceptions.InvalidArgument("bad prompt")]
+    with pytest.raises(Exception, match="bad prompt"):
+        hashtags(gemini_svc)
+    assert (len(flash.calls), len(pro.calls)) == (1, 0)
+
+
+def test_slow_primary_starts_the_fallback(gemini_svc):
+    flash, pro = models(gemini_svc)
+    gemini_svc.router.budgets["generate_hashtags"] = 0.05
+    flash.delay = 0.5
+    assert hashtags(gemini_svc) == ["#gemini-1.5-pro answer"]
+    assert fallbacks(gemini_svc) == {"error": 0, "latency": 1, "won": 1, "saturated": 0}
+
+
+def test_fallback_runs_at_most_once_per_request(gemini_svc):
+    flash, pro = models(gemini_svc)
+    gemini_svc.router.budgets["generate_hashtags"] = 0.02
+    flash.delay = 0.1
+    flash.results = [google_exceptions.ServiceUnavailable("down")] * 4
+    pro.results = [google_exceptions.ServiceUnavailable("down")]
+    with pytest.raises(UpstreamUnavailable):
+        hashtags(gemini_svc)
+    # The latency fallback of the first attempt used up the fallback
+    assert (len(flash.calls), len(pro.calls)) == (4, 1)
+    assert fallbacks(gemini_svc)["latency"] == 1
+    assert fallbacks(gemini_svc)["error"] == 0
+
+
+def test_latency_fallback_needs_a_free_slot(gemini_svc, monkeypatch):
+    flash, pro = models(gemini_svc)
+    monkeypatch.setattr(gemini_svc, "_semaphore", asyncio.Semaphore(1))
+    gemini_svc.router.budgets["generate_hashtags"] = 0.02
+    flash.delay = 0.1
+    assert hashtags(gemini_svc) == ["#gemini-1.5-flash answer"]
+    assert len(pro.calls) == 0
+    assert fallbacks(gemini_svc)["saturated"] == 1
+
+
+@pytest.mark.parametrize("error, status", [
+    (google_exceptions.ServiceUnavailable("down"), 503),
+    (google_exceptions.ResourceExhausted("quota"), 429),
+])
+def test_routes_answer_with_retry_after(client, gemini_svc, error, status):
+    flash, pro = models(gemini_svc)
+    flash.results = [error] * 4
+    pro.results = [error]
+    response = client.post("/api/hashtags/generate", json={"topic": "baking", "count": 1})
+    assert response.status_code == status
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_client_error_is_a_500_without_retry_after(client, gemini_svc):
+    flash, _ = models(gemini_svc)
+    flash.results = [google_exceptions.InvalidArgument("bad prompt")]
+    response = client.post("/api/hashtags/generate", json={"topic": "baking", "count": 1})
+    assert response.status_code == 500
+    assert "retry-after" not in response.headers
@@ -0,0 +1,221 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services import resilience
+from services.resilience import (
+    CircuitBreaker,
+    RetryPolicy,
+    SharedTokenBucket,
+    TokenBucket,
+    UpstreamUnavailable,
+    is_retryable,
+    is_throttled,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drives both clocks resilience.py reads"""
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(resilience.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize("error, retryable, throttled", [
+    (google_exceptions.ResourceExhausted("quota"), True, True),
+    (google_exceptions.TooManyRequests("slow down"), True, True),
+    (google_exceptions.ServiceUnavailable("down"), True, False),
+    (google_exceptions.InternalServerError("oops"), True, False),
+    (google_exceptions.DeadlineExceeded("late"), True, False),
+    (ConnectionError(), True, False),
+    (TimeoutError(), True, False),
+    (google_exceptions.InvalidArgument("bad"), False, False),
+    (google_exceptions.PermissionDenied("key"), False, False),
+    (ValueError("parse"), False, False),
+])
+def test_error_classification(error, retryable, throttled):
+    assert is_retryable(error) is retryable
+    assert is_throttled(error) is throttled
+
+
+def test_upstream_unavailable_status():
+    assert UpstreamUnavailable(2.5).status_code == 503
+    throttled = UpstreamUnavailable(2.5, throttled=True)
+    assert throttled.status_code == 429
+    assert str(throttled) == "Gemini API rate limit reached, retry after 3s"
+
+
+@pytest.fixture(params=["memory", "shared"])
+def bucket_factory(request, tmp_path):
+    def make(rate_per_minute, burst, name="gemini"):
+        if request.param == "memory":
+            return TokenBucket(rate_per_minute, burst)
+        return SharedTokenBucket(rate_per_minute, burst, str(tmp_path / "state.db"), name)
+    return make
+
+
+def test_bucket_allows_burst_then_paces(bucket_factory, clock):
+    bucket = bucket_factory(60, 2)
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    # One token per second; each reservation queues behind the previous one
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+    assert bucket.throttled == 2
+    clock[0] += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_try_reserve_never_goes_into_debt(bucket_factory, clock):
+    bucket = bucket_factory(60, 1)
+    assert bucket.try_reserve()
+    assert not bucket.try_reserve()
+    clock[0] += 1
+    assert bucket.try_reserve()
+    assert bucket.throttled == 0
+
+
+def test_zero_rate_disables_limiting(bucket_factory):
+    bucket = bucket_factory(0, 1)
+    assert [bucket.reserve() for _ in range(5)] == [0.0] * 5
+    assert all(bucket.try_reserve() for _ in range(5))
+
+
+def test_shared_bucket_is_one_quota_across_instances(tmp_path, clock):
+    path = str(tmp_path / "state.db")
+    first = SharedTokenBucket(60, 2, path)
+    second = SharedTokenBucket(60, 2, path)
+    assert first.reserve() == 0.0
+    assert second.reserve() == 0.0
+    assert first.reserve() == pytest.approx(1.0)
+    # Buckets under another name keep their own quota
+    assert SharedTokenBucket(60, 2, path, name="other").reserve() == 0.0
+
+
+def test_shared_bucket_async_reservations(tmp_path, clock):
+    bucket = SharedTokenBucket(60, 1, str(tmp_path / "state.db"))
+
+    async def run():
+        return await bucket.try_reserve_async(), await bucket.try_reserve_async(), await bucket.reserve_async()
+
+    assert asyncio.run(run()) == (True, False, pytest.approx(1.0))
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock[0] += 10
+    assert breaker.retry_after() == pytest.approx(20)
+    with pytest.raises(UpstreamUnavailable) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == pytest.approx(20)
+    assert raised.value.status_code == 503
+    assert breaker.rejected == 1
+
+
+def test_half_open_breaker_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    assert breaker.retry_after() == 0.0
+    with pytest.raises(UpstreamUnavailable):
+        breaker.before_call()
+
+    # A failed trial reopens it for another full timeout
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == pytest.approx(30)
+
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_released_trial_frees_the_slot_without_closing(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.release_trial()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def test_retry_delays_grow_exponentially_with_jitter(monkeypatch):
+    policy = RetryPolicy(max_retries=3, base_delay=0.5, max_delay=3)
+    assert [policy.max_delay_for(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3]
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert policy.delay(1) == 1.0
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: low)
+    assert policy.delay(3) == 0
+    assert RetryPolicy(max_retries=-1, base_delay=1, max_delay=1).max_retries == 0
+
+
+def pro(gemini_svc):
+    return gemini_svc.router.model("gemini-1.5-pro")
+
+
+def generate_script(gemini_svc):
+    return asyncio.run(gemini_svc.generate_script_async("bread", "youtube", 1, "casual"))
+
+
+def test_retryable_errors_are_retried(gemini_svc):
+    pro(gemini_svc).results = [google_exceptions.ServiceUnavailable("down"), google_exceptions.DeadlineExceeded("late")]
+    assert generate_script(gemini_svc) == "gemini-1.5-pro answer"
+    assert len(pro(gemini_svc).calls) == 3
+    assert gemini_svc.get_stats()["resilience"]["retries"] == 2
+    assert gemini_svc.resilience.breaker.state == "closed"
+
+
+def test_client_errors_fail_without_retry(gemini_svc):
+    pro(gemini_svc).results = [google_exceptions.InvalidArgument("bad prompt")]
+    with pytest.raises(Exception, match="bad prompt"):
+        generate_script(gemini_svc)
+    assert len(pro(gemini_svc).calls) == 1
+    assert gemini_svc.get_stats()["resilience"]["retries"] == 0
+
+
+def test_open_breaker_fails_fast(gemini_svc, monkeypatch):
+    monkeypatch.setattr(gemini_svc.resilience, "breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    gemini_svc.router.routes["generate_script"] = ("gemini-1.5-pro", None)
+    pro(gemini_svc).results = [google_exceptions.ServiceUnavailable("down")] * 4
+    with pytest.raises(UpstreamUnavailable):
+        generate_script(gemini_svc)
+    # The breaker opened on the second failure and refused the remaining retries
+    assert len(pro(gemini_svc).calls) == 2
+    assert gemini_svc.resilience.breaker.state == "open"
+
+    with pytest.raises(UpstreamUnavailable) as raised:
+        generate_script(gemini_svc)
+    assert raised.value.retry_after > 50
+    assert len(pro(gemini_svc).calls) == 2
+
+
+def test_rate_limiter_paces_upstream_calls(gemini_svc, monkeypatch):
+    bucket = TokenBucket(60 * 20, 1)
+    monkeypatch.setattr(gemini_svc.resilience, "rate_limiter", bucket)
+    flash = gemini_svc.router.model("gemini-1.5-flash")
+
+    async def run():
+        await asyncio.gather(*[
+            gemini_svc.generate_hashtags_async(f"topic {n}", count=1, use_cache=False) for n in range(3)
+        ])
+
+    asyncio.run(run())
+    assert len(flash.calls) == 3
+    assert bucket.throttled == 2
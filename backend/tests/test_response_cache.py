@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from services import response_cache
+from services.response_cache import ResponseCache, cache_key, parse_ttls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_ignores_whitespace_and_case_but_not_model():
+    assert cache_key("flash", "Hello   World\n") == cache_key("flash", "hello world")
+    assert cache_key("flash", "hello world") != cache_key("pro", "hello world")
+    assert cache_key("flash", "hello world") != cache_key("flash", "hello, world")
+
+
+def test_parse_ttls_overrides_defaults():
+    ttls = parse_ttls("generate_script=60, process_prompt = 0,malformed")
+    assert ttls["generate_script"] == 60
+    assert ttls["process_prompt"] == 0
+    assert ttls["generate_hashtags"] == response_cache.DEFAULT_TTLS["generate_hashtags"]
+    with pytest.raises(ValueError):
+        parse_ttls("generate_script=soon")
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "A", 60)
+    cache.set("b", "B", 60)
+    assert cache.get("a") == "A"
+    cache.set("c", "C", 60)
+    # "b" was least recently used
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    stats = cache.get_stats()
+    assert (stats["evictions"], stats["size"], stats["hits"], stats["misses"]) == (1, 2, 3, 1)
+    assert stats["hit_rate"] == 0.75
+
+
+def test_entries_expire(clock):
+    cache = ResponseCache()
+    cache.set("a", "A", 10)
+    clock[0] += 9.9
+    assert cache.get("a") == "A"
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert cache.get_stats()["size"] == 0
+
+
+def test_zero_ttl_disables_caching():
+    cache = ResponseCache(ttls={"generate_script": 0})
+    assert cache.ttl_for("generate_script") == 0
+    assert cache.ttl_for("unknown_method") == 0
+    cache.set("a", "A", 0)
+    assert cache.get("a") is None
+    assert cache.get_stats()["stores"] == 0
+
+
+def test_disk_tier_survives_restart_and_is_promoted(tmp_path):
+    path = str(tmp_path / "cache" / "responses.db")
+    ResponseCache(disk_path=path).set("a", "A", 60)
+
+    cache = ResponseCache(disk_path=path)
+    assert cache.get("a") == "A"
+    assert cache.get("a") == "A"
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["hits"], stats["size"]) == (1, 1, 1)
+
+
+def test_expired_disk_entries_are_missed_and_purged(tmp_path, clock):
+    path = str(tmp_path / "responses.db")
+    cache = ResponseCache(disk_path=path)
+    cache.set("old", "A", 10)
+    clock[0] += 20
+    assert ResponseCache(disk_path=path).get("old") is None
+
+    # Stores purge expired rows at most every DISK_PURGE_INTERVAL
+    cache.set("new", "B", 120)
+    assert cache._disk().execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 2
+    clock[0] += response_cache.DISK_PURGE_INTERVAL
+    cache.set("newer", "C", 60)
+    rows = cache._disk().execute("SELECT key FROM responses").fetchall()
+    assert sorted(rows) == [("new",), ("newer",)]
+
+
+def test_async_variants_share_the_tiers(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        cache = ResponseCache(disk_path=path)
+        await cache.set_async("a", "A", 60)
+        assert await cache.get_async("a") == "A"
+        assert await ResponseCache(disk_path=path).get_async("a") == "A"
+        assert await cache.get_async("missing") is None
+
+    asyncio.run(run())
+
+
+def test_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("GEMINI_CACHE_ENABLED", "false")
+    assert ResponseCache.from_env() is None
+    monkeypatch.setenv("GEMINI_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_CACHE_MAX_ENTRIES", "5")
+    monkeypatch.setenv("GEMINI_CACHE_TTLS", "generate_script=30")
+    monkeypatch.setenv("GEMINI_CACHE_DISK_PATH", str(tmp_path / "responses.db"))
+    cache = ResponseCache.from_env()
+    assert (cache.max_entries, cache.ttl_for("generate_script")) == (5, 30)
+    assert cache.disk_path == str(tmp_path / "responses.db")
+
+
+def flash(gemini_svc):
+    return gemini_svc.router.model("gemini-1.5-flash")
+
+
+def test_repeat_requests_are_served_from_cache(gemini_svc):
+    flash(gemini_svc).results = ["#one\n#two"]
+
+    async def run():
+        first = await gemini_svc.generate_hashtags_async("baking", count=2)
+        second = await gemini_svc.generate_hashtags_async("baking", count=2)
+        bypassed = await gemini_svc.generate_hashtags_async("baking", count=2, use_cache=False)
+        return first, second, bypassed
+
+    first, second, bypassed = asyncio.run(run())
+    assert first == second == ["#one", "#two"]
+    # use_cache=False goes upstream (and refreshes the entry)
+    assert bypassed == ["#gemini-1.5-flash answer"]
+    assert len(flash(gemini_svc).calls) == 2
+    assert gemini_svc.get_stats()["cache"]["hits"] == 1
+
+
+def test_uncacheable_methods_always_go_upstream(gemini_svc):
+    async def run():
+        for _ in range(2):
+            await gemini_svc.generate_script_async("bread", "youtube", 1, "casual")
+
+    asyncio.run(run())
+    assert len(gemini_svc.router.model("gemini-1.5-pro").calls) == 2
+    assert gemini_svc.get_stats()["cache"]["stores"] == 0
+
+
+def test_errors_are_not_cached(gemini_svc):
+    flash(gemini_svc).results = [google_exceptions.InvalidArgument("bad prompt")]
+
+    async def run():
+        with pytest.raises(Exception, match="bad prompt"):
+            await gemini_svc.generate_hashtags_async("baking", count=1)
+        return await gemini_svc.generate_hashtags_async("baking", count=1)
+
+    assert asyncio.run(run()) == ["#gemini-1.5-flash answer"]
+    assert len(flash(gemini_svc).calls) == 2
+
+
+def test_concurrent_identical_requests_share_one_call(gemini_svc):
+    flash(gemini_svc).delay = 0.05
+
+    async def run():
+        return await asyncio.gather(*[gemini_svc.generate_hashtags_async("baking", count=1) for _ in range(5)])
+
+    assert asyncio.run(run()) == [["#gemini-1.5-flash answer"]] * 5
+    assert len(flash(gemini_svc).calls) == 1
+    assert gemini_svc.get_stats()["coalesced"] == 4
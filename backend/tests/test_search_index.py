@@ -0,0 +1,124 @@
+import pytest
+
+from services import search_index
+from services.search_index import QueryTooBroad, SearchIndex, tokenize
+
+
+def make_item(content_id, title, content, content_type="post"):
+    return {"id": content_id, "type": content_type, "title": title, "content": content}
+
+
+ITEMS = [
+    make_item("cooking", "Cooking pasta", "Boil water, add salt and pasta"),
+    make_item("baking", "Baking bread", "Knead the dough and let it rise before baking"),
+    make_item("travel", "Travel vlog", "A day of cooking street food in Rome", "video"),
+    make_item("camera", "Camera setup", "Lighting and lenses for a cooking channel"),
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.build(lambda: ITEMS)
+    return index
+
+
+def ids(results):
+    return [content_id for content_id, _ in results[0]]
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Hello, World! 2024") == ["hello", "world", "2024"]
+    assert tokenize(None) == []
+
+
+def test_every_query_token_must_match(index):
+    assert sorted(ids(index.search("cooking"))) == ["camera", "cooking", "travel"]
+    assert ids(index.search("cooking rome")) == ["travel"]
+    assert index.search("cooking bread") == ([], 0)
+
+
+def test_title_matches_rank_first(index):
+    # Only "cooking" has the term in its title, which counts TITLE_WEIGHT times
+    assert ids(index.search("cooking"))[0] == "cooking"
+
+
+def test_rare_terms_outweigh_common_ones(index):
+    # Both terms occur once in "camera"; "lenses" is in no other document
+    rare = dict(index.search("lenses")[0])["camera"]
+    common = dict(index.search("cooking")[0])["camera"]
+    assert rare > common
+    ranked = index.search("lenses cooking")[0]
+    assert ranked == [("camera", pytest.approx(rare + common))]
+
+
+def test_prefix_matches_longer_terms(index):
+    assert sorted(ids(index.search("bak"))) == ["baking"]
+    assert sorted(ids(index.search("cook"))) == ["camera", "cooking", "travel"]
+    # Short tokens match whole terms only
+    assert index.search("ro") == ([], 0)
+    assert ids(index.search("rome")) == ["travel"]
+
+
+def test_overly_broad_prefix_is_rejected(index, monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_PREFIX_EXPANSIONS", 2)
+    for n in range(3):
+        index.add(make_item(f"x{n}", f"word{n}", ""))
+    with pytest.raises(QueryTooBroad) as raised:
+        index.search("wor")
+    assert raised.value.token == "wor"
+    # Exactly at the cap is still fine
+    index.remove("x2")
+    assert sorted(ids(index.search("wor"))) == ["x0", "x1"]
+
+
+def test_paging_and_type_filter(index):
+    page, total = index.search("cooking", limit=1, offset=1)
+    assert total == 3
+    assert len(page) == 1
+    everything, _ = index.search("cooking", limit=None)
+    assert page[0] == everything[1]
+    assert ids(index.search("cooking", content_type="video")) == ["travel"]
+    assert index.search("cooking", content_type="image") == ([], 0)
+
+
+def test_reindex_and_remove(index):
+    index.add(make_item("cooking", "Grilling", "Charcoal and smoke"))
+    assert "cooking" not in ids(index.search("pasta"))
+    assert ids(index.search("charcoal")) == ["cooking"]
+
+    index.remove("cooking")
+    index.remove("missing")
+    assert index.search("charcoal") == ([], 0)
+    # Terms only the removed document used leave the vocabulary
+    assert "charcoal" not in index._vocabulary
+
+
+def test_changes_before_build_are_ignored():
+    index = SearchIndex()
+    index.add(ITEMS[0])
+    assert index.search("pasta") == ([], 0)
+    index.build(lambda: ITEMS[1:])
+    assert index.search("pasta") == ([], 0)
+    index.reset()
+    assert not index.built and index.search("bread") == ([], 0)
+
+
+@pytest.mark.parametrize("query", ["", "   ", "!!!"])
+def test_empty_queries_match_nothing(index, query):
+    assert index.search(query) == ([], 0)
+
+
+def test_search_route_rejects_broad_queries(client, content_svc, monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_PREFIX_EXPANSIONS", 1)
+    content_svc.save_content("post", "word one", "")
+    content_svc.save_content("post", "words two", "")
+
+    response = client.get("/api/gallery/search", params={"q": "wor"})
+    assert response.status_code == 400
+    assert "type more of it" in response.json()["detail"]
+
+    response = client.get("/api/gallery/search", params={"q": "words"})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()["items"]] == ["words two"]
+    assert response.json()["items"][0]["score"] > 0
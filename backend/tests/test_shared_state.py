@@ -0,0 +1,29 @@
+import pytest
+
+from services import shared_state
+from services.shared_state import worker_count, workers_from_argv
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["/venv/bin/uvicorn", "main:app", "--workers", "4"], 4),
+    (["/venv/lib/python3.11/site-packages/uvicorn/__main__.py", "main:app", "--workers=2"], 2),
+    (["/venv/bin/gunicorn", "-w", "3", "main:app"], 3),
+    (["/venv/bin/gunicorn", "-w5", "main:app"], 5),
+    (["/venv/bin/gunicorn", "--workers=6", "main:app"], 6),
+    (["/venv/bin/uvicorn", "main:app", "--workers", "many"], None),
+    # -w is gunicorn's short option only
+    (["/venv/bin/uvicorn", "main:app", "-w", "2"], None),
+    (["/venv/bin/uvicorn", "main:app"], None),
+    (["main.py", "--workers", "2"], None),
+    ([], None),
+])
+def test_workers_from_argv(argv, expected):
+    assert workers_from_argv(argv) == expected
+
+
+def test_web_concurrency_wins_over_argv(monkeypatch):
+    monkeypatch.setattr(shared_state.sys, "argv", ["/venv/bin/uvicorn", "main:app", "--workers", "4"])
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    assert worker_count() == 2
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    assert worker_count() == 4